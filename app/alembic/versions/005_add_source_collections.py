@@ -0,0 +1,49 @@
+"""add source collections for playlist and channel expansion
+
+Revision ID: 005_add_source_collections
+Revises: 004_add_review_source_url_and_fix_schema
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '005_add_source_collections'
+down_revision = '004_add_review_source_url_and_fix_schema'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Create source_collections table
+    op.create_table('source_collections',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('platform', sa.String(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('next_index', sa.Integer(), nullable=True),
+        sa.Column('last_seen_video_id', sa.String(), nullable=True),
+        sa.Column('total_enqueued', sa.Integer(), server_default='0', nullable=True),
+        sa.Column('synced_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_source_collections_id'), 'source_collections', ['id'], unique=False)
+    op.create_index(op.f('ix_source_collections_url'), 'source_collections', ['url'], unique=True)
+
+    # Link expanded sources back to their collection
+    op.add_column('sources', sa.Column('collection_id', sa.Integer(), nullable=True))
+    op.create_foreign_key('fk_sources_collection_id', 'sources', 'source_collections', ['collection_id'], ['id'])
+    op.create_index(op.f('ix_sources_collection_id'), 'sources', ['collection_id'], unique=False)
+    op.create_index(op.f('ix_sources_status'), 'sources', ['status'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_sources_status'), table_name='sources')
+    op.drop_index(op.f('ix_sources_collection_id'), table_name='sources')
+    op.drop_constraint('fk_sources_collection_id', 'sources', type_='foreignkey')
+    op.drop_column('sources', 'collection_id')
+    op.drop_index(op.f('ix_source_collections_url'), table_name='source_collections')
+    op.drop_index(op.f('ix_source_collections_id'), table_name='source_collections')
+    op.drop_table('source_collections')
@@ -0,0 +1,93 @@
+"""move sources.raw_data into a compressed content-addressed raw_payloads table
+
+Revision ID: 006_add_raw_payloads
+Revises: 005_add_source_collections
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+import json
+import hashlib
+
+from alembic import op
+import sqlalchemy as sa
+import zstandard
+
+# revision identifiers, used by Alembic.
+revision = '006_add_raw_payloads'
+down_revision = '005_add_source_collections'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 500
+
+def upgrade():
+    # Create raw_payloads table
+    op.create_table('raw_payloads',
+        sa.Column('hash', sa.String(length=64), nullable=False),
+        sa.Column('codec', sa.String(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('hash')
+    )
+
+    op.add_column('sources', sa.Column('raw_data_hash', sa.String(length=64), nullable=True))
+    op.create_foreign_key('fk_sources_raw_data_hash', 'sources', 'raw_payloads', ['raw_data_hash'], ['hash'])
+
+    # Backfill existing payloads in batches, keyed by id so memory stays bounded
+    conn = op.get_bind()
+    compressor = zstandard.ZstdCompressor(level=3)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, raw_data FROM sources "
+                "WHERE id > :last_id AND raw_data IS NOT NULL ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE},
+        ).fetchall()
+        if not rows:
+            break
+
+        for source_id, raw_data in rows:
+            try:
+                payload = json.loads(raw_data)
+            except ValueError:
+                payload = {"raw_data": raw_data}
+            raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+            payload_hash = hashlib.sha256(raw).hexdigest()
+
+            conn.execute(
+                sa.text(
+                    "INSERT INTO raw_payloads (hash, codec, size, data) VALUES (:hash, 'zstd', :size, :data) "
+                    "ON CONFLICT (hash) DO NOTHING"
+                ),
+                {"hash": payload_hash, "size": len(raw), "data": compressor.compress(raw)},
+            )
+            conn.execute(
+                sa.text("UPDATE sources SET raw_data_hash = :hash WHERE id = :id"),
+                {"hash": payload_hash, "id": source_id},
+            )
+        last_id = rows[-1][0]
+
+    op.drop_column('sources', 'raw_data')
+
+def downgrade():
+    op.add_column('sources', sa.Column('raw_data', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    decompressor = zstandard.ZstdDecompressor()
+    rows = conn.execute(
+        sa.text(
+            "SELECT s.id, p.data FROM sources s JOIN raw_payloads p ON p.hash = s.raw_data_hash"
+        )
+    )
+    for source_id, data in rows:
+        conn.execute(
+            sa.text("UPDATE sources SET raw_data = :raw_data WHERE id = :id"),
+            {"raw_data": decompressor.decompress(data).decode("utf-8"), "id": source_id},
+        )
+
+    op.drop_constraint('fk_sources_raw_data_hash', 'sources', type_='foreignkey')
+    op.drop_column('sources', 'raw_data_hash')
+    op.drop_table('raw_payloads')
@@ -0,0 +1,22 @@
+"""index reviews.source_id for source to place lookups
+
+Revision ID: 007_index_reviews_source_id
+Revises: 006_add_raw_payloads
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_index_reviews_source_id'
+down_revision = '006_add_raw_payloads'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Reprocessing and link lookups resolve a source's place through its review
+    op.create_index(op.f('ix_reviews_source_id'), 'reviews', ['source_id'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_reviews_source_id'), table_name='reviews')
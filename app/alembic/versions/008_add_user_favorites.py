@@ -0,0 +1,33 @@
+"""add user favorites
+
+Revision ID: 008_add_user_favorites
+Revises: 007_index_reviews_source_id
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008_add_user_favorites'
+down_revision = '007_index_reviews_source_id'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('user_favorites',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('place_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['place_id'], ['places.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'place_id', name='uq_user_favorite_place')
+    )
+    # Composite index for per-user keyset pagination, newest first
+    op.create_index('ix_user_favorites_user_id_id', 'user_favorites', ['user_id', 'id'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_user_favorites_user_id_id', table_name='user_favorites')
+    op.drop_table('user_favorites')
@@ -0,0 +1,39 @@
+"""add geohash cell columns to places
+
+Revision ID: 009_add_place_geohash_cells
+Revises: 008_add_user_favorites
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_add_place_geohash_cells'
+down_revision = '008_add_user_favorites'
+branch_labels = None
+depends_on = None
+
+GEOHASH_PRECISIONS = (4, 6, 8)
+
+def upgrade():
+    for precision in GEOHASH_PRECISIONS:
+        op.add_column('places', sa.Column(f'geohash_{precision}', sa.String(length=precision), nullable=True))
+
+    # Backfill existing places; coarser cells are prefixes of the finest one
+    op.execute(
+        "UPDATE places SET geohash_8 = ST_GeoHash(geom, 8) WHERE geom IS NOT NULL"
+    )
+    op.execute(
+        "UPDATE places SET geohash_4 = left(geohash_8, 4), geohash_6 = left(geohash_8, 6) "
+        "WHERE geohash_8 IS NOT NULL"
+    )
+
+    # Plain B-tree indexes serve equality and IN (...) lookups on cell sets
+    for precision in GEOHASH_PRECISIONS:
+        op.create_index(op.f(f'ix_places_geohash_{precision}'), 'places', [f'geohash_{precision}'], unique=False)
+
+def downgrade():
+    for precision in GEOHASH_PRECISIONS:
+        op.drop_index(op.f(f'ix_places_geohash_{precision}'), table_name='places')
+        op.drop_column('places', f'geohash_{precision}')
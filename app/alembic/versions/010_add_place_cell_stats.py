@@ -0,0 +1,37 @@
+"""add materialized per-cell place aggregates
+
+Revision ID: 010_add_place_cell_stats
+Revises: 009_add_place_geohash_cells
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010_add_place_cell_stats'
+down_revision = '009_add_place_geohash_cells'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('place_cell_stats',
+        sa.Column('cell', sa.String(length=8), nullable=False),
+        sa.Column('precision', sa.Integer(), nullable=False),
+        sa.Column('place_count', sa.Integer(), nullable=False),
+        sa.Column('review_count', sa.Integer(), nullable=False),
+        sa.Column('lat', sa.Float(), nullable=False),
+        sa.Column('lng', sa.Float(), nullable=False),
+        sa.Column('top_place_id', sa.Integer(), nullable=True),
+        sa.Column('thumbnail_url', sa.String(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['top_place_id'], ['places.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('cell')
+    )
+    # Viewport lookups filter one precision by centroid
+    op.create_index('ix_place_cell_stats_precision_lat_lng', 'place_cell_stats', ['precision', 'lat', 'lng'], unique=False)
+    # The table is filled by `python worker.py rebuild-cell-stats` after upgrading
+
+def downgrade():
+    op.drop_index('ix_place_cell_stats_precision_lat_lng', table_name='place_cell_stats')
+    op.drop_table('place_cell_stats')
@@ -0,0 +1,48 @@
+"""make places.geom the only spatial column and add generated lat/lng
+
+Migration 001 created places.location (Geography) and 003 added places.geom
+(Geometry). The worker wrote location while the API read geom; this folds
+location into geom and drops it.
+
+Revision ID: 011_unify_place_geom
+Revises: 010_add_place_cell_stats
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from geoalchemy2 import Geography
+
+# revision identifiers, used by Alembic.
+revision = '011_unify_place_geom'
+down_revision = '010_add_place_cell_stats'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Carry over points that were only ever written to location
+    op.execute(
+        "UPDATE places SET geom = location::geometry WHERE geom IS NULL AND location IS NOT NULL"
+    )
+    op.drop_column('places', 'location')
+
+    # 003 created this index; make sure it exists on databases that skipped it
+    op.execute("CREATE INDEX IF NOT EXISTS ix_places_geom ON places USING gist (geom)")
+
+    op.add_column('places', sa.Column('lat', sa.Float(), sa.Computed('ST_Y(geom)', persisted=True), nullable=True))
+    op.add_column('places', sa.Column('lng', sa.Float(), sa.Computed('ST_X(geom)', persisted=True), nullable=True))
+
+    # Places recovered from location have no cells yet
+    op.execute(
+        "UPDATE places SET geohash_8 = ST_GeoHash(geom, 8), "
+        "geohash_6 = left(ST_GeoHash(geom, 8), 6), geohash_4 = left(ST_GeoHash(geom, 8), 4) "
+        "WHERE geohash_8 IS NULL AND geom IS NOT NULL"
+    )
+    # Cell aggregates built before this point missed those places; run
+    # `python worker.py rebuild-cell-stats` after upgrading
+
+def downgrade():
+    op.drop_column('places', 'lng')
+    op.drop_column('places', 'lat')
+    op.add_column('places', sa.Column('location', Geography(geometry_type='POINT', srid=4326), nullable=True))
+    op.execute("UPDATE places SET location = geom::geography WHERE geom IS NOT NULL")
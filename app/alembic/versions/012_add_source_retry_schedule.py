@@ -0,0 +1,33 @@
+"""add retry scheduling columns to sources
+
+Revision ID: 012_add_source_retry_schedule
+Revises: 011_unify_place_geom
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '012_add_source_retry_schedule'
+down_revision = '011_unify_place_geom'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('sources', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('sources', sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.add_column('sources', sa.Column('last_error', sa.String(), nullable=True))
+
+    # Only queued rows are ever claimed, so the index stays small however
+    # many links have finished
+    op.create_index(
+        'ix_sources_runnable', 'sources', ['next_attempt_at'], unique=False,
+        postgresql_where=sa.text("status = 'queued'")
+    )
+
+def downgrade():
+    op.drop_index('ix_sources_runnable', table_name='sources')
+    op.drop_column('sources', 'last_error')
+    op.drop_column('sources', 'next_attempt_at')
+    op.drop_column('sources', 'attempts')
@@ -0,0 +1,35 @@
+"""add priority lanes to sources
+
+Revision ID: 013_add_source_priority
+Revises: 012_add_source_retry_schedule
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013_add_source_priority'
+down_revision = '012_add_source_retry_schedule'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Existing links were all queued by batch paths or have long finished,
+    # so they start in the bulk lane
+    op.add_column('sources', sa.Column('priority', sa.Integer(), server_default='10', nullable=False))
+
+    # Claims order by lane, then due time
+    op.drop_index('ix_sources_runnable', table_name='sources')
+    op.create_index(
+        'ix_sources_runnable', 'sources', ['priority', 'next_attempt_at'], unique=False,
+        postgresql_where=sa.text("status = 'queued'")
+    )
+
+def downgrade():
+    op.drop_index('ix_sources_runnable', table_name='sources')
+    op.create_index(
+        'ix_sources_runnable', 'sources', ['next_attempt_at'], unique=False,
+        postgresql_where=sa.text("status = 'queued'")
+    )
+    op.drop_column('sources', 'priority')
@@ -0,0 +1,69 @@
+"""add a trigger-maintained queue depth counter per source lane
+
+Revision ID: 014_add_source_queue_depth
+Revises: 013_add_source_priority
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '014_add_source_queue_depth'
+down_revision = '013_add_source_priority'
+branch_labels = None
+depends_on = None
+
+# Statement-level triggers see every changed row through transition tables,
+# so a bulk insert of N links bumps its lane counter once rather than N times.
+# Lanes are upserted in priority order so concurrent writers lock them in the
+# same order.
+TRACK_FUNCTION = """
+CREATE FUNCTION track_source_queue_depth() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO source_queue_depth (priority, depth)
+        SELECT priority, -count(*) FROM old_rows WHERE status = 'queued'
+        GROUP BY priority ORDER BY priority
+        ON CONFLICT (priority) DO UPDATE SET depth = source_queue_depth.depth + EXCLUDED.depth;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO source_queue_depth (priority, depth)
+        SELECT priority, count(*) FROM new_rows WHERE status = 'queued'
+        GROUP BY priority ORDER BY priority
+        ON CONFLICT (priority) DO UPDATE SET depth = source_queue_depth.depth + EXCLUDED.depth;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+# Transition tables are only allowed on single-event triggers
+TRIGGERS = {
+    'sources_queue_depth_insert': "AFTER INSERT ON sources REFERENCING NEW TABLE AS new_rows",
+    'sources_queue_depth_update': "AFTER UPDATE ON sources REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    'sources_queue_depth_delete': "AFTER DELETE ON sources REFERENCING OLD TABLE AS old_rows",
+}
+
+def upgrade():
+    op.create_table('source_queue_depth',
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('priority')
+    )
+
+    op.execute(TRACK_FUNCTION)
+    for name, timing in TRIGGERS.items():
+        op.execute(f"CREATE TRIGGER {name} {timing} FOR EACH STATEMENT EXECUTE FUNCTION track_source_queue_depth()")
+
+    # Seed the counters from the current queue
+    op.execute(
+        "INSERT INTO source_queue_depth (priority, depth) "
+        "SELECT priority, count(*) FROM sources WHERE status = 'queued' GROUP BY priority"
+    )
+
+def downgrade():
+    for name in TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {name} ON sources")
+    op.execute("DROP FUNCTION IF EXISTS track_source_queue_depth()")
+    op.drop_table('source_queue_depth')
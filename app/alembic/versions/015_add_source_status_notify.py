@@ -0,0 +1,40 @@
+"""notify listeners when a source finishes processing
+
+Revision ID: 015_add_source_status_notify
+Revises: 014_add_source_queue_depth
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '015_add_source_status_notify'
+down_revision = '014_add_source_queue_depth'
+branch_labels = None
+depends_on = None
+
+# Notifications are delivered on commit, so listeners never see a status
+# that is rolled back. Payload: {"id": ..., "status": ...}
+NOTIFY_FUNCTION = """
+CREATE FUNCTION notify_source_status() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('source_status', json_build_object('id', NEW.id, 'status', NEW.status)::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+def upgrade():
+    op.execute(NOTIFY_FUNCTION)
+    # Only the worker's outcome (processed, dead or requeued for a retry) is
+    # of interest to waiting clients
+    op.execute(
+        "CREATE TRIGGER sources_status_notify AFTER UPDATE OF status ON sources FOR EACH ROW "
+        "WHEN (OLD.status = 'processing' AND NEW.status IS DISTINCT FROM 'processing') "
+        "EXECUTE FUNCTION notify_source_status()"
+    )
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS sources_status_notify ON sources")
+    op.execute("DROP FUNCTION IF EXISTS notify_source_status()")
@@ -0,0 +1,57 @@
+"""notify listeners of new and changed places
+
+Revision ID: 016_add_place_change_notify
+Revises: 015_add_source_status_notify
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '016_add_place_change_notify'
+down_revision = '015_add_source_status_notify'
+branch_labels = None
+depends_on = None
+
+# AFTER triggers see the generated lat/lng columns. Updates carry the
+# previous position too, so streams learn about places leaving their cells.
+NOTIFY_FUNCTION = """
+CREATE FUNCTION notify_place_change() RETURNS trigger AS $$
+DECLARE
+    payload jsonb;
+BEGIN
+    payload := jsonb_build_object(
+        'op', lower(TG_OP), 'id', NEW.id, 'name', NEW.name, 'slug', NEW.slug,
+        'address', NEW.address, 'lat', NEW.lat, 'lng', NEW.lng, 'geohash_8', NEW.geohash_8
+    );
+    IF TG_OP = 'UPDATE' THEN
+        payload := payload || jsonb_build_object(
+            'old_lat', OLD.lat, 'old_lng', OLD.lng, 'old_geohash_8', OLD.geohash_8
+        );
+    END IF;
+    PERFORM pg_notify('place_changes', payload::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+def upgrade():
+    op.execute(NOTIFY_FUNCTION)
+    op.execute(
+        "CREATE TRIGGER places_change_notify_insert AFTER INSERT ON places FOR EACH ROW "
+        "EXECUTE FUNCTION notify_place_change()"
+    )
+    # Only changes a map marker shows are streamed
+    op.execute(
+        "CREATE TRIGGER places_change_notify_update AFTER UPDATE ON places FOR EACH ROW "
+        "WHEN (OLD.name IS DISTINCT FROM NEW.name OR OLD.slug IS DISTINCT FROM NEW.slug "
+        "OR OLD.address IS DISTINCT FROM NEW.address "
+        "OR OLD.lat IS DISTINCT FROM NEW.lat OR OLD.lng IS DISTINCT FROM NEW.lng) "
+        "EXECUTE FUNCTION notify_place_change()"
+    )
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS places_change_notify_update ON places")
+    op.execute("DROP TRIGGER IF EXISTS places_change_notify_insert ON places")
+    op.execute("DROP FUNCTION IF EXISTS notify_place_change()")
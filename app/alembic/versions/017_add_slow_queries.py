@@ -0,0 +1,36 @@
+"""add slow_queries diagnostics table
+
+Revision ID: 017_add_slow_queries
+Revises: 016_add_place_change_notify
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '017_add_slow_queries'
+down_revision = '016_add_place_change_notify'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('slow_queries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('fingerprint', sa.String(length=16), nullable=False),
+        sa.Column('statement', sa.Text(), nullable=False),
+        sa.Column('parameters', sa.Text(), nullable=True),
+        sa.Column('duration_ms', sa.Float(), nullable=False),
+        sa.Column('plan', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_slow_queries_id'), 'slow_queries', ['id'], unique=False)
+    op.create_index(op.f('ix_slow_queries_created_at'), 'slow_queries', ['created_at'], unique=False)
+    op.create_index('ix_slow_queries_fingerprint_created_at', 'slow_queries', ['fingerprint', 'created_at'], unique=False)
+
+def downgrade():
+    op.drop_index('ix_slow_queries_fingerprint_created_at', table_name='slow_queries')
+    op.drop_index(op.f('ix_slow_queries_created_at'), table_name='slow_queries')
+    op.drop_index(op.f('ix_slow_queries_id'), table_name='slow_queries')
+    op.drop_table('slow_queries')
@@ -0,0 +1,22 @@
+"""add a GIST index on places.geom::geography for meter-based KNN
+
+Revision ID: 018_add_place_geography_index
+Revises: 017_add_slow_queries
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '018_add_place_geography_index'
+down_revision = '017_add_slow_queries'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # /api/places/nearby orders by geom::geography <-> point, which only this
+    # index can answer; ix_places_geom orders by planar degree distance
+    op.execute("CREATE INDEX IF NOT EXISTS ix_places_geog ON places USING gist ((geom::geography))")
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_places_geog")
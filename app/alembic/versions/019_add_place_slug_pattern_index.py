@@ -0,0 +1,23 @@
+"""add a text_pattern_ops index on places.slug for numbered slug lookups
+
+Revision ID: 019_add_place_slug_pattern_index
+Revises: 018_add_place_geography_index
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '019_add_place_slug_pattern_index'
+down_revision = '018_add_place_geography_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # ix_places_slug uses the database collation, which cannot answer
+    # slug LIKE 'base-%'; slug allocation would otherwise scan places
+    op.create_index('ix_places_slug_pattern', 'places', ['slug'], unique=False,
+                    postgresql_ops={'slug': 'text_pattern_ops'})
+
+def downgrade():
+    op.drop_index('ix_places_slug_pattern', table_name='places')
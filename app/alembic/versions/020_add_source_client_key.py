@@ -0,0 +1,24 @@
+"""record the ingesting client on sources for per-client queue limits
+
+Revision ID: 020_add_source_client_key
+Revises: 019_add_place_slug_pattern_index
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '020_add_source_client_key'
+down_revision = '019_add_place_slug_pattern_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('sources', sa.Column('client_key', sa.String(), nullable=True))
+    op.create_index('ix_sources_client_queued', 'sources', ['client_key', 'priority'], unique=False,
+                    postgresql_where=sa.text("status = 'queued'"))
+
+def downgrade():
+    op.drop_index('ix_sources_client_queued', table_name='sources')
+    op.drop_column('sources', 'client_key')
@@ -0,0 +1,23 @@
+"""add an expansion lease and last error to source_collections
+
+Revision ID: 021_add_collection_expansion_lease
+Revises: 020_add_source_client_key
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '021_add_collection_expansion_lease'
+down_revision = '020_add_source_client_key'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('source_collections', sa.Column('expanding_since', sa.DateTime(), nullable=True))
+    op.add_column('source_collections', sa.Column('last_error', sa.String(), nullable=True))
+
+def downgrade():
+    op.drop_column('source_collections', 'last_error')
+    op.drop_column('source_collections', 'expanding_since')
@@ -0,0 +1,40 @@
+"""add geohash 2 and 3 cells to places and a rating sum to cell stats
+
+Revision ID: 022_add_coarse_geohash_cells
+Revises: 021_add_collection_expansion_lease
+Create Date: 2026-10-20 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '022_add_coarse_geohash_cells'
+down_revision = '021_add_collection_expansion_lease'
+branch_labels = None
+depends_on = None
+
+GEOHASH_PRECISIONS = (2, 3)
+
+def upgrade():
+    for precision in GEOHASH_PRECISIONS:
+        op.add_column('places', sa.Column(f'geohash_{precision}', sa.String(length=precision), nullable=True))
+
+    # Coarser cells are prefixes of the finest one
+    op.execute(
+        "UPDATE places SET geohash_2 = left(geohash_8, 2), geohash_3 = left(geohash_8, 3) "
+        "WHERE geohash_8 IS NOT NULL"
+    )
+
+    for precision in GEOHASH_PRECISIONS:
+        op.create_index(op.f(f'ix_places_geohash_{precision}'), 'places', [f'geohash_{precision}'], unique=False)
+
+    op.add_column('place_cell_stats', sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+    # Fill the new precisions and rating sums with `python worker.py rebuild-cell-stats` after upgrading
+
+def downgrade():
+    op.drop_column('place_cell_stats', 'rating_sum')
+    op.execute("DELETE FROM place_cell_stats WHERE precision IN (2, 3)")
+    for precision in GEOHASH_PRECISIONS:
+        op.drop_index(op.f(f'ix_places_geohash_{precision}'), table_name='places')
+        op.drop_column('places', f'geohash_{precision}')
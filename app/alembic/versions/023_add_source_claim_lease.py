@@ -0,0 +1,26 @@
+"""add a claim lease to sources so links of crashed workers are re-claimed
+
+Revision ID: 023_add_source_claim_lease
+Revises: 022_add_coarse_geohash_cells
+Create Date: 2026-10-20 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '023_add_source_claim_lease'
+down_revision = '022_add_coarse_geohash_cells'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('sources', sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True))
+    # Links stuck in processing before this migration have no lease; expire them now
+    op.execute("UPDATE sources SET claimed_at = to_timestamp(0) WHERE status = 'processing'")
+    op.create_index('ix_sources_processing_claimed', 'sources', ['claimed_at'], unique=False,
+                    postgresql_where=sa.text("status = 'processing'"))
+
+def downgrade():
+    op.drop_index('ix_sources_processing_claimed', table_name='sources')
+    op.drop_column('sources', 'claimed_at')
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+from sqlalchemy import func, desc
+from typing import Dict, Any
+from datetime import datetime, timedelta
+import json
+
+from app.core.auth import get_current_superuser
+from app.database import get_db
+from app.models import SlowQuery, User
+from app.utils.profiling import list_profiles, profile_path
+from app.utils.slow_queries import fingerprint
+
+router = APIRouter()
+
+
+@router.get("/slow-queries", response_model=Dict[str, Any])
+async def list_slow_queries(
+    limit: int = Query(20, ge=1, le=100, description="Number of query shapes to return"),
+    hours: int = Query(24, ge=1, le=24 * 30, description="Only count queries logged in the last N hours"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_superuser)
+):
+    """
+    List the slowest query shapes recorded by the slow-query log (SLOW_QUERY_MS).
+    
+    Queries are grouped by fingerprint (the statement with parameters and
+    literals stripped) and ranked by total time spent. Each shape comes with
+    its most recent plan, and the statement and parameters it was captured with.
+    """
+    since = datetime.utcnow() - timedelta(hours=hours)
+    total_ms = func.sum(SlowQuery.duration_ms).label("total_ms")
+    shapes = db.query(
+        SlowQuery.fingerprint,
+        func.count().label("calls"),
+        total_ms,
+        func.avg(SlowQuery.duration_ms).label("mean_ms"),
+        func.max(SlowQuery.duration_ms).label("max_ms"),
+        func.max(SlowQuery.created_at).label("last_seen")
+    ).filter(
+        SlowQuery.created_at >= since
+    ).group_by(SlowQuery.fingerprint).order_by(desc(total_ms)).limit(limit).all()
+    
+    # Latest sample per shape, preferring one with a plan
+    samples = {}
+    if shapes:
+        rows = db.query(SlowQuery).filter(
+            SlowQuery.fingerprint.in_([shape.fingerprint for shape in shapes])
+        ).order_by(
+            SlowQuery.fingerprint, SlowQuery.plan.is_(None), desc(SlowQuery.created_at)
+        ).distinct(SlowQuery.fingerprint).all()
+        samples = {row.fingerprint: row for row in rows}
+    
+    items = []
+    for shape in shapes:
+        sample = samples.get(shape.fingerprint)
+        items.append({
+            "fingerprint": shape.fingerprint,
+            "query": fingerprint(sample.statement)[1] if sample else None,
+            "calls": shape.calls,
+            "total_ms": round(shape.total_ms, 1),
+            "mean_ms": round(shape.mean_ms, 1),
+            "max_ms": round(shape.max_ms, 1),
+            "last_seen": shape.last_seen,
+            "sample": {
+                "statement": sample.statement,
+                "parameters": json.loads(sample.parameters) if sample.parameters else None,
+                "duration_ms": sample.duration_ms,
+                "plan": json.loads(sample.plan) if sample.plan else None,
+                "created_at": sample.created_at
+            } if sample else None
+        })
+    
+    return {"items": items}
+
+
+@router.get("/profiles", response_model=Dict[str, Any])
+async def get_profiles(current_user: User = Depends(get_current_superuser)):
+    """
+    List the profiles kept by the sampling profiler (PROFILING), newest first.
+    
+    Each profile is a request or worker batch that exceeded PROFILE_THRESHOLD_MS.
+    """
+    return {"items": list_profiles()}
+
+
+@router.get("/profiles/{name}")
+async def download_profile(name: str, current_user: User = Depends(get_current_superuser)):
+    """Download a kept profile as a speedscope flame graph (open it at speedscope.app)."""
+    path = profile_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=name)
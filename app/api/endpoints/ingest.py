@@ -1,19 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request
 from sqlalchemy.orm import Session
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Literal
 from pydantic import BaseModel, HttpUrl
 
 # Use absolute imports instead of relative imports
-from app.database import get_db
-from app.models import Source, Review, Place
-from app.schemas.place import PlaceResponse, PlaceDetailResponse
+from app.database import get_db, SessionLocal
+from app.models import Source, Review, Place, SourceCollection, SourceQueueDepth, User, SOURCE_PRIORITIES
+from app.core.auth import get_current_user_optional
+from app.schemas.place import PlaceResponse, PlaceDetailResponse, LinkStatusResponse
+from app.extractors.youtube import YouTubeExtractor
+from app.utils.collection_expander import get_or_create_collection, claim_collection, expand_collection, release_collection
+from app.utils.pg_listener import listener
+from app.utils.source_events import SourceEventBus
+import asyncio
+import logging
 import uuid
 import subprocess
 import sys
 import os
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+def parse_limits(value: str) -> Dict[str, int]:
+    """Parse a "key=limit,..." setting into a dict."""
+    return {
+        key.strip(): int(limit)
+        for key, _, limit in (item.partition("=") for item in value.split(",") if item)
+    }
+
+# Queued links per lane above which ingest is refused with a 429; a lane
+# without a limit is never shed
+INGEST_MAX_QUEUE_DEPTH = parse_limits(os.getenv("INGEST_MAX_QUEUE_DEPTH", "interactive=1000,bulk=50000"))
+
+# Per-client limits on a client's own queued links per lane, keyed by
+# username or client IP, e.g. "importer=5000,10.0.0.7=100". A client listed
+# here is held to its own backlog instead of the lane total
+INGEST_CLIENT_MAX_QUEUE_DEPTH = parse_limits(os.getenv("INGEST_CLIENT_MAX_QUEUE_DEPTH", ""))
+
+# Retry-After sent with a 429, in seconds
+INGEST_RETRY_AFTER_SECONDS = int(os.getenv("INGEST_RETRY_AFTER_SECONDS", "60"))
+
+# Upper bound on the timeout of a long-poll request, in seconds
+LONG_POLL_MAX_SECONDS = int(os.getenv("LONG_POLL_MAX_SECONDS", "60"))
+
+# Source statuses a long-poll waits on
+PENDING_STATUSES = ("queued", "processing")
+
+# Wakes long-poll requests when their link finishes
+source_events = SourceEventBus(listener)
+
+def client_key(request: Request, user: Optional[User]) -> Optional[str]:
+    """Identify the caller for per-client limits: username if signed in, else IP."""
+    if user:
+        return user.username
+    return request.client.host if request.client else None
+
+def check_queue_depth(db: Session, lane: str, client: Optional[str] = None):
+    """
+    Refuse new work for a lane whose queue is over its limit.
+    
+    The lane's depth is read from the trigger-maintained source_queue_depth
+    counter, a single primary key lookup however long the queue is. A client
+    with its own limit is checked against the links it has queued in the
+    lane instead, counted through the partial index on queued sources and
+    never past the limit, so one noisy client can be shed while the lane
+    still has room.
+    
+    Raises:
+        HTTPException: 429 with a Retry-After header when the queue is full
+    """
+    if client in INGEST_CLIENT_MAX_QUEUE_DEPTH:
+        limit = INGEST_CLIENT_MAX_QUEUE_DEPTH[client]
+        depth = db.query(Source.id).filter(
+            Source.client_key == client,
+            Source.priority == SOURCE_PRIORITIES[lane],
+            Source.status == "queued"
+        ).limit(limit).count()
+        whose = f"Your {lane} ingest queue"
+    else:
+        limit = INGEST_MAX_QUEUE_DEPTH.get(lane)
+        if not limit:
+            return
+        depth = db.query(SourceQueueDepth.depth).filter(
+            SourceQueueDepth.priority == SOURCE_PRIORITIES[lane]
+        ).scalar() or 0
+        whose = f"The {lane} ingest queue"
+    
+    if depth >= limit:
+        raise HTTPException(
+            status_code=429,
+            detail=f"{whose} is full ({depth} links waiting), try again later",
+            headers={"Retry-After": str(INGEST_RETRY_AFTER_SECONDS)}
+        )
+
 def add_source_link(db: Session, url: str, platform: str = "unknown"):
     """
     Add a new source link to the database.
@@ -39,25 +120,32 @@ def add_source_link(db: Session, url: str, platform: str = "unknown"):
 
 class LinkIngest(BaseModel):
     url: HttpUrl
+    # Queue lane; scripted imports should use "bulk" so users pasting links don't wait behind them
+    lane: Literal["interactive", "bulk"] = "interactive"
 
 @router.post("/link")
 async def ingest_link(
     link: LinkIngest, 
     background_tasks: BackgroundTasks,
+    request: Request,
     run_worker: bool = True,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
 ) -> Dict:
     """
     Ingest a URL to be processed and added to the map.
     
     This endpoint accepts a URL, stores it in the database with 'queued' status,
-    and returns a confirmation that it was received.
+    and returns a confirmation that it was received. When the link's queue lane
+    is over its depth limit, the link is refused with a 429 and a Retry-After
+    header instead.
     
     Args:
         link: The URL to ingest
         background_tasks: FastAPI BackgroundTasks for running the worker
         run_worker: Whether to run the worker immediately (True) or let it run on schedule
     """
+    client = client_key(request, current_user)
     try:
         # Determine platform from URL
         platform = "unknown"
@@ -66,11 +154,39 @@ async def ingest_link(
         elif "tiktok.com" in str(link.url):
             platform = "tiktok"
         
+        # Playlists and channels are expanded into one source per video
+        if platform == "youtube":
+            kind = YouTubeExtractor().collection_kind(str(link.url))
+            if kind:
+                check_queue_depth(db, "bulk", client)
+                collection = get_or_create_collection(db, str(link.url), platform, kind)
+                
+                # A second expansion would race the running one on its cursor
+                # and enqueue the same videos twice, so only the claim holder runs
+                if not claim_collection(db, collection.id):
+                    message = f"{kind.capitalize()} is already being expanded"
+                else:
+                    background_tasks.add_task(run_collection_expansion, collection.id, None, run_worker, client)
+                    message = f"{kind.capitalize()} received and queued for expansion"
+                
+                return {
+                    "status": "success",
+                    "message": message,
+                    "collection_id": collection.id,
+                    "url": collection.url,
+                    "platform": collection.platform,
+                    "kind": collection.kind
+                }
+        
+        check_queue_depth(db, link.lane, client)
+        
         # Create a new source record
         source = Source(
             url=str(link.url),
             platform=platform,
-            status="queued"
+            status="queued",
+            priority=SOURCE_PRIORITIES[link.lane],
+            client_key=client
         )
         
         db.add(source)
@@ -89,6 +205,8 @@ async def ingest_link(
             "platform": source.platform
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
         # Roll back in case of error
         db.rollback()
@@ -107,6 +225,93 @@ def run_worker_process():
         print(f"Error running worker: {str(e)}")
 
 
+def run_collection_expansion(collection_id: int, max_pages: Optional[int] = None, run_worker: bool = True,
+                             client: Optional[str] = None):
+    """
+    Expand a claimed playlist or channel in the background on behalf of client, then run the worker.
+    
+    Failures are logged and recorded on the collection (status "error",
+    last_error), which also releases the claim.
+    """
+    db = SessionLocal()
+    try:
+        collection = db.query(SourceCollection).filter(SourceCollection.id == collection_id).first()
+        if not collection:
+            return
+        enqueued = expand_collection(db, collection, max_pages=max_pages, client_key=client)
+    except Exception as e:
+        logger.exception(f"Error expanding collection {collection_id}")
+        try:
+            # Normally done by expand_collection; covers failures before it started
+            release_collection(db, collection_id, str(e))
+        except Exception:
+            logger.exception(f"Could not record the failure of collection {collection_id}")
+        return
+    finally:
+        db.close()
+    
+    if run_worker and enqueued:
+        run_worker_process()
+
+
+def collection_status(collection: SourceCollection) -> Dict:
+    """Build the status payload for a collection."""
+    return {
+        "id": collection.id,
+        "url": collection.url,
+        "platform": collection.platform,
+        "kind": collection.kind,
+        "status": collection.status,
+        "next_index": collection.next_index,
+        "last_seen_video_id": collection.last_seen_video_id,
+        "total_enqueued": collection.total_enqueued,
+        "synced_at": collection.synced_at,
+        "last_error": collection.last_error
+    }
+
+
+@router.get("/collection/{collection_id}")
+async def get_collection(collection_id: int, db: Session = Depends(get_db)) -> Dict:
+    """
+    Get the expansion progress of an ingested playlist or channel.
+    """
+    collection = db.query(SourceCollection).filter(SourceCollection.id == collection_id).first()
+    if not collection:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    
+    return collection_status(collection)
+
+
+@router.post("/collection/{collection_id}/sync")
+async def sync_collection(
+    collection_id: int,
+    background_tasks: BackgroundTasks,
+    request: Request,
+    max_pages: Optional[int] = Query(None, ge=1, description="Limit the number of pages expanded in this run"),
+    run_worker: bool = True,
+    db: Session = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user_optional)
+) -> Dict:
+    """
+    Resume or re-sync the expansion of a playlist or channel.
+    
+    An interrupted expansion resumes from its stored cursor. A fully expanded
+    channel is re-synced incrementally, enqueueing only videos newer than the
+    last one seen.
+    """
+    collection = db.query(SourceCollection).filter(SourceCollection.id == collection_id).first()
+    if not collection:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    client = client_key(request, current_user)
+    check_queue_depth(db, "bulk", client)
+    if not claim_collection(db, collection.id):
+        raise HTTPException(status_code=409, detail="Collection is already being expanded")
+    
+    background_tasks.add_task(run_collection_expansion, collection.id, max_pages, run_worker, client)
+    
+    return collection_status(collection)
+
+
 @router.get("/link/{source_id}/place", response_model=Optional[PlaceDetailResponse])
 async def get_link_place(source_id: int, db: Session = Depends(get_db)):
     """
@@ -132,3 +337,50 @@ async def get_link_place(source_id: int, db: Session = Depends(get_db)):
         
     # Return the place with reviews
     return place
+
+
+def link_status(db: Session, source_id: int) -> Optional[Dict]:
+    """
+    Load a source's status and resolved place with one joined query.
+    
+    Returns:
+        The LinkStatusResponse fields, or None if the source does not exist.
+    """
+    row = db.query(Source.id, Source.status, Source.last_error, Place).outerjoin(
+        Review, Review.source_id == Source.id
+    ).outerjoin(
+        Place, Place.id == Review.place_id
+    ).filter(Source.id == source_id).first()
+    if row is None:
+        return None
+    
+    return {"id": row.id, "status": row.status, "last_error": row.last_error, "place": row.Place}
+
+
+@router.get("/link/{source_id}/wait", response_model=LinkStatusResponse)
+async def wait_for_link(
+    source_id: int,
+    timeout: float = Query(25, gt=0, le=LONG_POLL_MAX_SECONDS, description="Seconds to wait for the link to finish"),
+    db: Session = Depends(get_db)
+):
+    """
+    Wait for an ingested link to finish processing.
+    
+    Returns as soon as the worker has processed the link (or given up on it),
+    or when the timeout expires, with the link's status and resolved place.
+    Clients should call again while the status is still queued or processing.
+    """
+    await source_events.start()
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        # Subscribe before reading, so a link finishing in between still wakes us
+        with source_events.subscribe(source_id) as finished:
+            status = link_status(db, source_id)
+            if status is None:
+                raise HTTPException(status_code=404, detail="Source not found")
+            remaining = deadline - asyncio.get_running_loop().time()
+            if status["status"] not in PENDING_STATUSES or remaining <= 0:
+                return status
+            # End the read transaction so the re-check sees the worker's commit
+            db.rollback()
+            await source_events.wait(finished, remaining)
@@ -1,22 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Path, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Path, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func, text, desc, Float
-from typing import List, Optional, Dict, Any, Annotated, Union
+from sqlalchemy import func, text, desc, select, cast, tuple_, Float
+from sqlalchemy.dialects.postgresql import insert
+from typing import List, Optional, Dict, Any, Annotated, Iterator, Union
+from geoalchemy2 import Geography
 from geoalchemy2.functions import ST_AsGeoJSON, ST_MakeEnvelope, ST_Within, ST_GeomFromText
+import os
 import json
 import logging
 import asyncio
 import functools
+import orjson
 
 # Use absolute imports instead of relative imports
 from app.core.auth import get_current_user, get_current_user_optional
-from app.database import get_db
-from app.models import Place, Review, User
-from app.schemas.place import PlaceResponse, PlaceDetailResponse, PlaceListResponse, PlaceListMeta
+from app.core.timing import timed
+from app.database import get_db, SessionLocal
+from app.models import Place, PlaceCellStat, Review, User, UserFavorite
+from app.utils.geocell import GEOHASH_PRECISIONS, MAX_VIEWPORT_CELLS, estimate_cells, is_valid_cell, viewport_cells, viewport_precision
+from app.utils.pg_listener import listener
+from app.utils.place_events import PlaceEventBus
+from app.schemas.place import PlaceResponse, PlaceDetailResponse, PlaceListResponse, PlaceListMeta, NearbyListResponse, CellListResponse
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Serve /places straight from row tuples with orjson, skipping response_model revalidation
+PLACES_FAST_PATH = os.getenv("PLACES_FAST_PATH", "false").lower() == "true"
+
+# Geography type used for meter-based distance predicates and KNN ordering.
+# Untyped, so the cast renders as CAST(geom AS geography) and matches the
+# ix_places_geog expression; a typmod (geography(POINT,4326)) would not.
+GEOGRAPHY = Geography(geometry_type=None, srid=-1)
+
+# Most cells /cells returns; the whole world at precision 2 is 32 x 32 cells
+MAX_CELLS_PER_RESPONSE = int(os.getenv("MAX_CELLS_PER_RESPONSE", "1024"))
+
+# Rows fetched per server-side cursor round trip by the export endpoints
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+# Columns selected by the fast path, in the order place_row_to_item expects them
+PLACE_ROW_COLUMNS = (
+    Place.id,
+    Place.name,
+    Place.slug,
+    Place.address,
+    Place.city,
+    Place.state,
+    Place.country,
+    Place.postal_code,
+    Place.lat,
+    Place.lng,
+    Place.created_at,
+    Place.updated_at,
+)
+
+# Seconds between keepalive comments on idle place streams
+PLACE_STREAM_KEEPALIVE_SECONDS = int(os.getenv("PLACE_STREAM_KEEPALIVE_SECONDS", "15"))
+
+# Streams map sessions' new and changed places
+place_events = PlaceEventBus(listener)
+
+def place_row_to_item(row) -> Dict[str, Any]:
+    """Build a PlaceResponse-shaped dict from a PLACE_ROW_COLUMNS row tuple."""
+    place_id, name, slug, address, city, state, country, postal_code, lat, lng, created_at, updated_at = row
+    return {
+        "id": place_id,
+        "name": name,
+        "slug": slug or f"place-{place_id}",
+        "address": address,
+        "city": city,
+        "state": state,
+        "country": country,
+        "postal_code": postal_code,
+        "lat": lat,
+        "lng": lng,
+        "created_at": created_at,
+        "updated_at": updated_at
+    }
+
 def timeout_after(seconds: float):
     """Decorator to add timeout to async functions for performance safety."""
     def decorator(func):
@@ -32,6 +95,65 @@ def timeout_after(seconds: float):
 
 router = APIRouter()
 
+def parse_bbox(bbox: str):
+    """
+    Parse a minLng,minLat,maxLng,maxLat bbox parameter.
+    
+    Raises:
+        HTTPException: 400 if the bbox is malformed.
+    """
+    try:
+        # Parse the bbox parameter
+        min_lng, min_lat, max_lng, max_lat = map(float, bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=400, 
+            detail="Invalid bbox format. Use 'minLng,minLat,maxLng,maxLat'"
+        )
+    return min_lng, min_lat, max_lng, max_lat
+
+def bbox_envelope(bbox: str):
+    """
+    Parse a minLng,minLat,maxLng,maxLat bbox parameter into a PostGIS envelope.
+    
+    Raises:
+        HTTPException: 400 if the bbox is malformed.
+    """
+    # Create a PostGIS envelope to filter places within it
+    return ST_MakeEnvelope(*parse_bbox(bbox), 4326)
+
+def parse_cells(cells: str) -> List[str]:
+    """
+    Parse a comma-separated list of geohash cells.
+    
+    All cells must share one of the stored precisions (2, 3, 4, 6 or 8).
+    
+    Raises:
+        HTTPException: 400 if the cell list is malformed.
+    """
+    cell_list = [cell.strip().lower() for cell in cells.split(",") if cell.strip()]
+    if (
+        not cell_list
+        or not all(is_valid_cell(cell) for cell in cell_list)
+        or len({len(cell) for cell in cell_list}) != 1
+    ):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid cells. Use comma-separated geohashes of a single precision (2, 3, 4, 6 or 8)"
+        )
+    return cell_list
+
+def cells_filter(cells: str):
+    """
+    Parse a comma-separated list of geohash cells into a filter on the matching column.
+    
+    Raises:
+        HTTPException: 400 if the cell list is malformed.
+    """
+    cell_list = parse_cells(cells)
+    column = getattr(Place, f"geohash_{len(cell_list[0])}")
+    return column.in_(cell_list)
+
 def get_places(db: Session):
     """Get a list of all places."""
     return db.query(Place).all()
@@ -43,36 +165,62 @@ def get_place_by_slug(db: Session, slug: str):
 @router.get("/me/favorites", response_model=Dict[str, Any])
 async def get_my_favorites(
     current_user: Annotated[User, Depends(get_current_user)],
+    after_id: Optional[int] = Query(None, description="Keyset pagination: return favorites with id < after_id"),
+    per_page: int = Query(20, ge=1, le=50, description="Results per page (max 50)"),
     db: Session = Depends(get_db)
 ):
     """
-    Get the current user's favorite places.
+    Get the current user's favorite places, most recently favorited first.
     This endpoint is protected and requires authentication.
+    
+    Places and their GeoJSON geometry are read in a single query that walks
+    the (user_id, id) index, so latency does not depend on the number of
+    places in the map.
+    
+    - **after_id**: keyset pagination (pass the previous page's `metadata.next`)
+    - **per_page**: results per page (max 50, default 20)
     """
-    # In a real implementation, this would use a user_favorites table
-    # For now, we'll just return a sample of places
+    query = db.query(
+        UserFavorite.id,
+        Place.id,
+        Place.name,
+        Place.address,
+        Place.slug,
+        Place.city,
+        Place.state,
+        Place.country,
+        ST_AsGeoJSON(Place.geom),
+    ).join(Place, Place.id == UserFavorite.place_id).filter(
+        UserFavorite.user_id == current_user.id
+    ).order_by(desc(UserFavorite.id))
+    
+    # Apply keyset pagination if after_id is provided
+    if after_id:
+        query = query.filter(UserFavorite.id < after_id)
+    
+    # Get one more than per_page to determine if there are more results
+    rows = query.limit(per_page + 1).all()
     
-    places = db.query(Place).order_by(func.random()).limit(5).all()
+    next_id = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_id = rows[-1][0]
     
     # Convert places to GeoJSON features
     features = []
-    for place in places:
-        # Get GeoJSON representation of the point geometry
-        geojson = db.scalar(ST_AsGeoJSON(place.geom))
-        geometry = json.loads(geojson) if geojson else None
-        
+    for favorite_id, place_id, name, address, slug, city, state, country, geojson in rows:
         # Create GeoJSON feature
         feature = {
             "type": "Feature",
-            "geometry": geometry,
+            "geometry": json.loads(geojson) if geojson else None,
             "properties": {
-                "id": place.id,
-                "name": place.name,
-                "address": place.address,
-                "slug": place.slug,
-                "city": getattr(place, "city", None),
-                "state": getattr(place, "state", None),
-                "country": getattr(place, "country", None),
+                "id": place_id,
+                "name": name,
+                "address": address,
+                "slug": slug,
+                "city": city,
+                "state": state,
+                "country": country,
                 "favorited": True  # Since these are favorites
             }
         }
@@ -84,15 +232,59 @@ async def get_my_favorites(
         "features": features,
         "metadata": {
             "total": len(features),
-            "user_id": current_user.id
+            "user_id": current_user.id,
+            "next": next_id
         }
     }
 
+@router.post("/me/favorites/{place_id}", status_code=201)
+async def add_my_favorite(
+    place_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db)
+):
+    """
+    Add a place to the current user's favorites. Adding a place that is
+    already a favorite is a no-op.
+    """
+    if not db.query(Place.id).filter(Place.id == place_id).first():
+        raise HTTPException(status_code=404, detail="Place not found")
+    
+    db.execute(
+        insert(UserFavorite)
+        .values(user_id=current_user.id, place_id=place_id)
+        .on_conflict_do_nothing(constraint="uq_user_favorite_place")
+    )
+    db.commit()
+    
+    return {"place_id": place_id, "favorited": True}
+
+@router.delete("/me/favorites/{place_id}", status_code=204)
+async def remove_my_favorite(
+    place_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Session = Depends(get_db)
+):
+    """
+    Remove a place from the current user's favorites.
+    """
+    deleted = db.query(UserFavorite).filter(
+        UserFavorite.user_id == current_user.id,
+        UserFavorite.place_id == place_id
+    ).delete(synchronize_session=False)
+    db.commit()
+    
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Favorite not found")
+    
+    return Response(status_code=204)
+
 @router.get("", response_model=PlaceListResponse)
 @timeout_after(30.0)  # 30 second timeout for database queries
 async def get_places(
     response: Response,
     bbox: Optional[str] = Query(None, description="Bounding box in format: minLng,minLat,maxLng,maxLat"),
+    cells: Optional[str] = Query(None, description="Comma-separated geohash cells of one precision (2, 3, 4, 6 or 8)"),
     q: Optional[str] = Query(None, description="Text search query"),
     after_id: Optional[int] = Query(None, description="Keyset pagination: return results with id < after_id"),
     per_page: int = Query(20, ge=1, le=50, description="Results per page (max 50)"),
@@ -103,6 +295,7 @@ async def get_places(
     List places with optional bounding box, text search, and keyset pagination.
     
     - **bbox**: minLng,minLat,maxLng,maxLat (WGS84, SRID 4326)
+    - **cells**: geohash cells, e.g. dr5rtw,dr5rtx; uses the indexed cell columns
     - **q**: text search on name (trigram, case-insensitive)
     - **after_id**: keyset pagination (return places with id < after_id)
     - **per_page**: results per page (max 50, default 20)
@@ -118,8 +311,12 @@ async def get_places(
     # Set cache header for 30 seconds
     response.headers["Cache-Control"] = "public, max-age=30"
     
-    # Start with base query, order by newest first
-    query = db.query(Place).order_by(desc(Place.id))
+    # Start with base query, order by newest first. The fast path selects
+    # plain columns (lat/lng included) instead of hydrating Place objects.
+    if PLACES_FAST_PATH:
+        query = db.query(*PLACE_ROW_COLUMNS).order_by(desc(Place.id))
+    else:
+        query = db.query(Place).order_by(desc(Place.id))
     
     # Apply keyset pagination if after_id is provided
     if after_id:
@@ -127,18 +324,11 @@ async def get_places(
     
     # Apply bounding box filter if provided
     if bbox:
-        try:
-            # Parse the bbox parameter
-            min_lng, min_lat, max_lng, max_lat = map(float, bbox.split(","))
-            
-            # Create a PostGIS envelope and filter places within it
-            envelope = ST_MakeEnvelope(min_lng, min_lat, max_lng, max_lat, 4326)
-            query = query.filter(ST_Within(Place.geom, envelope))
-        except ValueError:
-            raise HTTPException(
-                status_code=400, 
-                detail="Invalid bbox format. Use 'minLng,minLat,maxLng,maxLat'"
-            )
+        query = query.filter(ST_Within(Place.geom, bbox_envelope(bbox)))
+    
+    # Apply geohash cell filter if provided
+    if cells:
+        query = query.filter(cells_filter(cells))
     
     # Apply text search filter if provided using ILIKE for case-insensitive partial matching
     if q:
@@ -159,23 +349,36 @@ async def get_places(
     else:
         next_id = None
     
+    if PLACES_FAST_PATH:
+        # Rows come from our own schema, so they are serialized as-is
+        # rather than revalidated against PlaceListResponse
+        with timed("serialize"):
+            return ORJSONResponse(
+                {
+                    "items": [place_row_to_item(row) for row in places],
+                    "meta": {"next": next_id}
+                },
+                headers={"Cache-Control": response.headers["Cache-Control"]}
+            )
+    
     # Convert to response model using the new lat/lng properties
     items = []
-    for place in places:
-        items.append({
-            "id": place.id,
-            "name": place.name,
-            "slug": getattr(place, "slug", f"place-{place.id}"),
-            "address": place.address,
-            "city": getattr(place, "city", None),
-            "state": getattr(place, "state", None),
-            "country": getattr(place, "country", None),
-            "postal_code": getattr(place, "postal_code", None),
-            "lat": place.lat,  # Use the property that extracts from geom
-            "lng": place.lng,  # Use the property that extracts from geom
-            "created_at": place.created_at,
-            "updated_at": place.updated_at
-        })
+    with timed("serialize"):
+        for place in places:
+            items.append({
+                "id": place.id,
+                "name": place.name,
+                "slug": getattr(place, "slug", f"place-{place.id}"),
+                "address": place.address,
+                "city": getattr(place, "city", None),
+                "state": getattr(place, "state", None),
+                "country": getattr(place, "country", None),
+                "postal_code": getattr(place, "postal_code", None),
+                "lat": place.lat,  # Generated column derived from geom
+                "lng": place.lng,
+                "created_at": place.created_at,
+                "updated_at": place.updated_at
+            })
     
     # Return paginated response
     return {
@@ -186,6 +389,287 @@ async def get_places(
     }
 
 
+@router.get("/cells", response_model=CellListResponse)
+@timeout_after(30.0)  # 30 second timeout for database queries
+async def get_place_cells(
+    response: Response,
+    bbox: str = Query(..., description="Bounding box in format: minLng,minLat,maxLng,maxLat"),
+    precision: Optional[int] = Query(None, description="Geohash precision (2, 3, 4, 6 or 8); picked from the bbox size if omitted"),
+    db: Session = Depends(get_db),
+):
+    """
+    List materialized per-cell aggregates inside a viewport for zoomed-out maps.
+    
+    Reads the place_cell_stats table maintained by the worker, so the cost
+    scales with the number of cells in view rather than the number of places.
+    Cells are matched on their centroid. At most MAX_CELLS_PER_RESPONSE cells
+    are returned, the busiest first, with meta.truncated set if any were cut.
+    
+    - **bbox**: minLng,minLat,maxLng,maxLat (WGS84, SRID 4326)
+    - **precision**: cell size; coarser for larger viewports by default. An
+      explicit precision too fine for the viewport is rejected.
+    """
+    min_lng, min_lat, max_lng, max_lat = parse_bbox(bbox)
+    if precision is None:
+        precision = viewport_precision(min_lng, min_lat, max_lng, max_lat)
+    elif precision not in GEOHASH_PRECISIONS:
+        raise HTTPException(status_code=400, detail="Invalid precision. Use 2, 3, 4, 6 or 8")
+    elif estimate_cells(min_lng, min_lat, max_lng, max_lat, precision) > MAX_CELLS_PER_RESPONSE:
+        raise HTTPException(
+            status_code=400,
+            detail="Precision too fine for this viewport; zoom in or omit precision"
+        )
+    
+    # Aggregates only change when the worker commits, so they cache longer than place lists
+    response.headers["Cache-Control"] = "public, max-age=60"
+    
+    cells = db.query(PlaceCellStat).filter(
+        PlaceCellStat.precision == precision,
+        PlaceCellStat.lat.between(min_lat, max_lat),
+        PlaceCellStat.lng.between(min_lng, max_lng),
+    ).order_by(PlaceCellStat.place_count.desc(), PlaceCellStat.cell).limit(MAX_CELLS_PER_RESPONSE + 1).all()
+    
+    truncated = len(cells) > MAX_CELLS_PER_RESPONSE
+    return {
+        "items": cells[:MAX_CELLS_PER_RESPONSE],
+        "meta": {"precision": precision, "truncated": truncated}
+    }
+
+
+def sse_event(event: str, data: Any) -> bytes:
+    """Format one Server-Sent Events message."""
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+@router.get("/stream")
+async def stream_places(
+    request: Request,
+    bbox: Optional[str] = Query(None, description="Bounding box in format 'minLng,minLat,maxLng,maxLat'"),
+    cells: Optional[str] = Query(None, description="Comma-separated geohash cells of one precision (2, 3, 4, 6 or 8)")
+):
+    """
+    Stream new and changed places in a viewport as Server-Sent Events.
+    
+    Subscribe with either a bbox or a set of cells. Each message is an
+    "insert" or "update" event whose data has the place's id, name, slug,
+    address and position; updates also carry the previous position
+    (old_lat, old_lng). A "resync" event means events were dropped (a slow
+    client or a lost database connection) and the viewport should be
+    refetched. Idle streams get a keepalive comment every
+    PLACE_STREAM_KEEPALIVE_SECONDS.
+    
+    A bbox is watched through at most MAX_VIEWPORT_CELLS cells; larger
+    viewports are matched on the bbox alone. A cells list longer than
+    MAX_VIEWPORT_CELLS is rejected.
+    """
+    if (bbox is None) == (cells is None):
+        raise HTTPException(status_code=400, detail="Pass exactly one of bbox or cells")
+    if bbox is not None:
+        bounds = parse_bbox(bbox)
+        cell_list = viewport_cells(*bounds) or []
+    else:
+        bounds = None
+        cell_list = parse_cells(cells)
+        if len(cell_list) > MAX_VIEWPORT_CELLS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many cells; subscribe to at most {MAX_VIEWPORT_CELLS} or use a bbox"
+            )
+    
+    await place_events.start()
+    
+    async def events():
+        with place_events.subscribe(cell_list, bounds) as subscription:
+            while not await request.is_disconnected():
+                if subscription.overflowed:
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    subscription.overflowed = False
+                    yield sse_event("resync", {})
+                    continue
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), PLACE_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                yield sse_event(event["op"], event)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def nearby_query(db: Session, lat: float, lng: float, radius: float, q: Optional[str] = None,
+                 after_distance: Optional[float] = None, after_id: Optional[int] = None):
+    """
+    Build the /nearby query: places within radius meters of a point, closest first.
+    
+    Returns:
+        A query of PLACE_ROW_COLUMNS plus distance_m, without a limit.
+    """
+    place_geography = cast(Place.geom, GEOGRAPHY)
+    point_geography = cast(func.ST_SetSRID(func.ST_MakePoint(lng, lat), 4326), GEOGRAPHY)
+    distance = place_geography.distance_centroid(point_geography)
+    
+    query = db.query(
+        *PLACE_ROW_COLUMNS,
+        distance.label("distance_m"),
+    ).filter(
+        func.ST_DWithin(place_geography, point_geography, radius, False),
+    ).order_by(distance, Place.id)
+    
+    # Keyset pagination on (distance in meters, id), the same key the results are ordered by
+    if after_distance is not None and after_id is not None:
+        query = query.filter(tuple_(distance, Place.id) > tuple_(after_distance, after_id))
+    
+    if q:
+        query = query.filter(Place.name.ilike(f'%{q}%'))
+    return query
+
+@router.get("/nearby", response_model=NearbyListResponse)
+@timeout_after(30.0)  # 30 second timeout for database queries
+async def get_nearby_places(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude of the search point"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude of the search point"),
+    radius: float = Query(1000, gt=0, le=50000, description="Search radius in meters (max 50 km)"),
+    limit: int = Query(20, ge=1, le=50, description="Results per page (max 50)"),
+    q: Optional[str] = Query(None, description="Text search query"),
+    after_distance: Optional[float] = Query(None, description="Keyset pagination: meta.next_distance of the previous page"),
+    after_id: Optional[int] = Query(None, description="Keyset pagination: meta.next_id of the previous page"),
+    db: Session = Depends(get_db),
+):
+    """
+    List places nearest to a point, closest first.
+    
+    Ordering uses the index-assisted KNN operator on geography
+    (`geom::geography <-> point`), answered by the GIST index over
+    places.geom::geography, so only the closest rows are visited and results
+    come back in true distance order at any latitude. That distance, in
+    meters, is both the reported distance_m and the pagination key, and the
+    radius is checked on the same sphere.
+    
+    - **lat**, **lng**: search point (WGS84)
+    - **radius**: maximum distance in meters
+    - **q**: text search on name (case-insensitive)
+    - **after_distance**, **after_id**: keyset pagination, taken from the
+      previous page's `meta`
+    """
+    # Get one more than limit to determine if there are more results
+    rows = nearby_query(db, lat, lng, radius, q, after_distance, after_id).limit(limit + 1).all()
+    
+    meta = {"next_id": None, "next_distance": None}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        meta = {"next_id": rows[-1].id, "next_distance": rows[-1].distance_m}
+    
+    items = []
+    for row in rows:
+        item = place_row_to_item(row[:len(PLACE_ROW_COLUMNS)])
+        item["distance_m"] = row.distance_m
+        items.append(item)
+    
+    return {
+        "items": items,
+        "meta": meta
+    }
+
+EXPORT_FORMATS = {
+    "geojson": "application/geo+json",
+    "ndjson": "application/x-ndjson",
+}
+
+def iter_export_features(bbox: Optional[str], q: Optional[str], chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[List[bytes]]:
+    """
+    Stream places as encoded GeoJSON features, one chunk of rows at a time.
+    
+    Geometry is rendered by ST_AsGeoJSON in SQL and rows are read through a
+    server-side cursor, so memory use depends on chunk_size only, not on the
+    size of the places table. The session is opened here rather than taken
+    from get_db because it has to outlive the endpoint function.
+    """
+    query = select(
+        Place.id,
+        Place.name,
+        Place.slug,
+        Place.address,
+        Place.created_at,
+        ST_AsGeoJSON(Place.geom).label("geometry"),
+    ).where(Place.geom.isnot(None)).order_by(Place.id)
+    
+    if bbox:
+        query = query.where(ST_Within(Place.geom, bbox_envelope(bbox)))
+    if q:
+        query = query.where(Place.name.ilike(f'%{q}%'))
+    
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(stream_results=True, yield_per=chunk_size))
+        for partition in result.partitions():
+            yield [
+                b'{"type":"Feature","geometry":' + geometry.encode() + b',"properties":' + orjson.dumps({
+                    "id": place_id,
+                    "name": name,
+                    "slug": slug,
+                    "address": address,
+                    "created_at": created_at,
+                }) + b'}'
+                for place_id, name, slug, address, created_at, geometry in partition
+            ]
+    finally:
+        db.close()
+
+def stream_geojson(features: Iterator[List[bytes]]) -> Iterator[bytes]:
+    """Wrap streamed features in a single GeoJSON FeatureCollection."""
+    yield b'{"type":"FeatureCollection","features":['
+    first = True
+    for chunk in features:
+        if not chunk:
+            continue
+        yield (b'' if first else b',') + b','.join(chunk)
+        first = False
+    yield b']}'
+
+def stream_ndjson(features: Iterator[List[bytes]]) -> Iterator[bytes]:
+    """Emit streamed features as newline-delimited GeoJSON."""
+    for chunk in features:
+        if chunk:
+            yield b'\n'.join(chunk) + b'\n'
+
+@router.get("/export.{export_format}")
+async def export_places(
+    export_format: str = Path(..., description="Export format: geojson or ndjson"),
+    bbox: Optional[str] = Query(None, description="Bounding box in format: minLng,minLat,maxLng,maxLat"),
+    q: Optional[str] = Query(None, description="Text search query"),
+):
+    """
+    Export all places as a streamed GeoJSON document.
+    
+    - **export.geojson**: a single FeatureCollection
+    - **export.ndjson**: one Feature per line
+    - **bbox**: minLng,minLat,maxLng,maxLat (WGS84, SRID 4326)
+    - **q**: text search on name (case-insensitive)
+    
+    Unlike the list endpoint this is not paginated; rows are streamed from
+    the database in chunks, so memory use stays constant regardless of the
+    number of places.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=404, detail="Unknown export format. Use 'geojson' or 'ndjson'")
+    
+    # Validate the bbox up front so a bad request fails before streaming starts
+    if bbox:
+        bbox_envelope(bbox)
+    
+    features = iter_export_features(bbox, q)
+    body = stream_geojson(features) if export_format == "geojson" else stream_ndjson(features)
+    
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="places.{export_format}"'}
+    )
+
+
 @router.get("/{place_id}", response_model=PlaceDetailResponse)
 @timeout_after(30.0)  # 30 second timeout for database queries
 async def get_place(
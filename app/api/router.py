@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from .endpoints import health, ingest, places, auth
+from .endpoints import health, ingest, places, auth, admin
 
 api_router = APIRouter()
 
@@ -9,3 +9,4 @@ api_router.include_router(health.router, prefix="/health", tags=["health"])
 api_router.include_router(ingest.router, prefix="/ingest", tags=["ingest"])
 api_router.include_router(places.router, prefix="/places", tags=["places"])
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
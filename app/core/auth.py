@@ -9,6 +9,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
 from app.database import get_db
+from app.core.timing import timed
 from app.models import User
 
 # JWT settings
@@ -68,15 +69,16 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    with timed("auth"):
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+        except jwt.JWTError:
             raise credentials_exception
-    except jwt.JWTError:
-        raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+        user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise credentials_exception
 
@@ -88,13 +90,21 @@ async def get_current_user_optional(token: str = Depends(oauth2_scheme_optional)
     if not token:
         return None
         
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    with timed("auth"):
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                return None
+        except jwt.JWTError:
             return None
-    except jwt.JWTError:
-        return None
 
-    user = db.query(User).filter(User.username == username).first()
+        user = db.query(User).filter(User.username == username).first()
     return user
+
+
+async def get_current_superuser(current_user: User = Depends(get_current_user)) -> User:
+    """Get the current user, requiring superuser rights for admin endpoints."""
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
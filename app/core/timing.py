@@ -0,0 +1,242 @@
+"""
+Per-request timing: stage durations and SQL statement counts.
+
+RequestTimingMiddleware samples a share of requests (REQUEST_TIMING_SAMPLE_RATE,
+or any request sending an X-Request-Timing: 1 header). For sampled requests
+it collects:
+
+- sql: count and total time of statements, from SQLAlchemy cursor events
+- named stages recorded by the app with timed("auth"), timed("serialize"), ...
+- total: time until the response headers are sent
+
+and reports them in a Server-Timing header and a structured log line.
+Unsampled requests only pay for a context variable lookup per statement.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils.metrics import REQUEST_SECONDS
+from app.utils.profiling import sample_request, save_profile, start_profiler
+
+logger = logging.getLogger(__name__)
+
+# Share of requests timed, from 0 (off) to 1 (all)
+REQUEST_TIMING_SAMPLE_RATE = float(os.getenv("REQUEST_TIMING_SAMPLE_RATE", "0.01"))
+
+# Request header that forces timing for one request
+TIMING_HEADER = b"x-request-timing"
+
+
+class RequestTimings:
+    """Timings collected while handling one request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.sql_count = 0
+        self.sql_ms = 0.0
+
+    def add_stage(self, name: str, ms: float):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def server_timing(self, total_ms: float) -> str:
+        """Format the timings as a Server-Timing header value."""
+        metrics = [f'sql;dur={self.sql_ms:.1f};desc="{self.sql_count} statements"']
+        metrics.extend(f"{name};dur={ms:.1f}" for name, ms in self.stages.items())
+        metrics.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(metrics)
+
+
+# Timings of the request being handled, if it was sampled
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar("current_timings", default=None)
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the duration of a block as a stage of the current request, if sampled."""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_stage(stage, (time.perf_counter() - start) * 1000)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_timings.get() is not None:
+        conn.info.setdefault("timing_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = current_timings.get()
+    starts = conn.info.get("timing_query_start")
+    if timings is None or not starts:
+        return
+    timings.sql_count += 1
+    timings.sql_ms += (time.perf_counter() - starts.pop()) * 1000
+
+
+def install_sql_timing(engine: Engine):
+    """Count and time the statements an engine runs for sampled requests."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class RequestTimingMiddleware:
+    """
+    ASGI middleware reporting the timings of sampled requests.
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware, so streaming
+    responses pass through untouched and unsampled requests cost one
+    random() call.
+    """
+
+    def __init__(self, app, sample_rate: Optional[float] = None):
+        self.app = app
+        self.sample_rate = REQUEST_TIMING_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    def sampled(self, scope) -> bool:
+        if dict(scope.get("headers") or ()).get(TIMING_HEADER) == b"1":
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.sampled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        status = None
+        total_ms = None
+
+        async def send_with_timing(message):
+            nonlocal status, total_ms
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                total_ms = timings.elapsed_ms()
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing(total_ms).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            logger.info(json.dumps({
+                "event": "request_timing",
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "total_ms": round(total_ms if total_ms is not None else timings.elapsed_ms(), 1),
+                "sql_count": timings.sql_count,
+                "sql_ms": round(timings.sql_ms, 1),
+                "stages": {name: round(ms, 1) for name, ms in timings.stages.items()},
+            }))
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording every request's latency in REQUEST_SECONDS.
+
+    Requests are labelled with their route template (/api/places/{place_id})
+    rather than the raw path, so the number of series stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # Endpoint -> route template, filled from the app's routes on first use
+        self.route_paths: Dict[object, str] = {}
+
+    def route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if endpoint not in self.route_paths:
+            for route in getattr(scope.get("app"), "routes", ()):
+                if getattr(route, "endpoint", None) is not None:
+                    self.route_paths.setdefault(route.endpoint, route.path)
+        return self.route_paths.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_metrics(message):
+            nonlocal status, start
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                REQUEST_SECONDS.labels(scope["method"], self.route_label(scope), str(status)).observe(
+                    time.perf_counter() - start
+                )
+                start = None
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            # Requests that failed before sending a response
+            if start is not None:
+                REQUEST_SECONDS.labels(scope["method"], self.route_label(scope), str(status)).observe(
+                    time.perf_counter() - start
+                )
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware running a sample of requests under the sampling profiler.
+
+    Active only with PROFILING=true; see utils.profiling. The profiler
+    follows the request's coroutine on the event loop, so sync endpoints
+    running in the threadpool show up as time spent awaiting them. Event
+    streams are never profiled, as they stay open indefinitely.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or b"text/event-stream" in dict(scope.get("headers") or ()).get(b"accept", b"")
+            or not sample_request()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = start_profiler(async_mode="enabled")
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            duration_ms = (time.perf_counter() - start) * 1000
+            try:
+                # Rendering a large profile takes a while; keep it off the event loop
+                await asyncio.get_running_loop().run_in_executor(
+                    None, save_profile, profiler, "request", f"{scope['method']} {scope['path']}", duration_ms
+                )
+            except Exception:
+                logger.exception("Could not save profile")
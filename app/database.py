@@ -25,6 +25,11 @@ else:
     DATABASE_URL = raw_db_url
 
 
+# Log statements slower than this many milliseconds, with their plans, to
+# the slow_queries table; 0 disables the slow-query log
+SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", "0"))
+
+
 # Create a single declarative base for all models
 Base = declarative_base() # Reverted to standard declarative_base
 
@@ -52,6 +57,10 @@ def get_engine(db_url: str = None):
             _engine = create_engine(current_url, connect_args={"check_same_thread": False})
         else:
             _engine = create_engine(current_url)
+        
+        if SLOW_QUERY_MS:
+            from app.utils.slow_queries import SlowQueryLog
+            SlowQueryLog(_engine, SLOW_QUERY_MS).install()
     return _engine
 
 # Default engine for non-test use
@@ -1,6 +1,9 @@
+import os
 import re
 import logging
-from typing import Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Optional
 from urllib.parse import urlparse, parse_qs
 
 import yt_dlp
@@ -9,12 +12,92 @@ from .base import Extractor
 
 logger = logging.getLogger(__name__)
 
+# Default number of concurrent fetches used by fetch_many
+YTDLP_MAX_WORKERS = int(os.getenv("YTDLP_MAX_WORKERS", "4"))
+
+# yt-dlp options shared by every fetch
+YDL_OPTS = {
+    'skip_download': True,  # Don't download the video
+    'quiet': True,  # Don't print to stdout
+    'no_warnings': True,  # Don't print warnings
+    'extract_flat': True,  # Only extract metadata
+}
+
+
+def trim_info(info: Dict[str, Any], video_id: str) -> Dict[str, Any]:
+    """
+    Reduce a yt-dlp info dict to the fields we actually persist.
+    
+    The full info dict carries formats, thumbnails and subtitle arrays that
+    are tens of KB per video; none of it is used downstream.
+    
+    Args:
+        info: The info dict returned by yt-dlp
+        video_id: The YouTube video ID
+        
+    Returns:
+        A small dictionary with the persisted video metadata.
+    """
+    thumbnail_url = info.get('thumbnail')
+    if not thumbnail_url and info.get('thumbnails'):
+        # yt-dlp orders thumbnails from worst to best quality
+        thumbnail_url = info['thumbnails'][-1].get('url')
+    
+    return {
+        'title': info.get('title'),
+        'description': info.get('description'),
+        'thumbnail_url': thumbnail_url,
+        'video_id': video_id,
+        'platform': 'youtube',
+        'channel_id': info.get('channel_id'),
+        'uploader': info.get('uploader'),
+        'upload_date': info.get('upload_date'),
+        'duration': info.get('duration'),
+        'webpage_url': info.get('webpage_url'),
+    }
+
 
 class YouTubeExtractor(Extractor):
     """
     Extractor for YouTube videos.
     """
     
+    def __init__(self, max_workers: int = YTDLP_MAX_WORKERS):
+        """
+        Args:
+            max_workers: Number of concurrent fetches used by fetch_many
+        """
+        self.max_workers = max_workers
+        # One YoutubeDL per thread, kept until close(); YoutubeDL keeps
+        # mutable per-instance state, so instances are never shared
+        self._local = threading.local()
+        self._sessions: List[yt_dlp.YoutubeDL] = []
+        self._sessions_lock = threading.Lock()
+        # Pool used by fetch_many, started on first use and reused by later
+        # calls so its threads' sessions carry over from batch to batch
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def _session(self) -> yt_dlp.YoutubeDL:
+        """Return the calling thread's YoutubeDL, opening it on first use."""
+        ydl = getattr(self._local, 'ydl', None)
+        if ydl is None:
+            ydl = yt_dlp.YoutubeDL(YDL_OPTS)
+            self._local.ydl = ydl
+            with self._sessions_lock:
+                self._sessions.append(ydl)
+        return ydl
+    
+    def close(self):
+        """Stop the fetch_many pool and close every open YoutubeDL session."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for ydl in sessions:
+            ydl.close()
+        self._local = threading.local()
+    
     def validate_url(self, url: str) -> bool:
         """
         Check if the URL is a valid YouTube URL.
@@ -62,10 +145,104 @@ class YouTubeExtractor(Extractor):
             
         return None
         
+    def collection_kind(self, url: str) -> Optional[str]:
+        """
+        Classify a YouTube playlist or channel URL.
+
+        Collection URLs include:
+        - https://www.youtube.com/playlist?list=PLAYLIST_ID
+        - https://www.youtube.com/@handle
+        - https://www.youtube.com/channel/CHANNEL_ID
+        - https://www.youtube.com/c/NAME and /user/NAME
+
+        Args:
+            url: The URL to classify
+
+        Returns:
+            "playlist" or "channel", or None if the URL is not a collection.
+        """
+        parsed_url = urlparse(url)
+        if parsed_url.netloc not in ('www.youtube.com', 'youtube.com', 'm.youtube.com'):
+            return None
+
+        path = parsed_url.path.rstrip('/')
+        if path == '/playlist':
+            return 'playlist' if parse_qs(parsed_url.query).get('list') else None
+        if re.match(r'^/(@[^/]+|channel/[^/]+|c/[^/]+|user/[^/]+)(/(videos|shorts|streams))?$', path):
+            return 'channel'
+        return None
+
+    def is_collection_url(self, url: str) -> bool:
+        """Check if the URL is a YouTube playlist or channel URL."""
+        return self.collection_kind(url) is not None
+
+    def iter_collection(self, url: str, start_index: int = 1, page_size: int = 50) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Stream the videos of a playlist or channel one page at a time.
+
+        Uses yt-dlp flat extraction, so only the listing is fetched, never the
+        individual videos. Channel URLs are expanded through their uploads
+        tab, which YouTube returns newest first.
+
+        Args:
+            url: The playlist or channel URL
+            start_index: 1-based position to start from, used to resume an
+                interrupted expansion
+            page_size: Number of entries requested per page
+
+        Yields:
+            Lists of entries with "index", "video_id", "url" and "title" keys.
+            The last page may be shorter than page_size.
+
+        Raises:
+            ValueError: If the URL is not a playlist or channel URL.
+            RuntimeError: If fetching a page fails.
+        """
+        kind = self.collection_kind(url)
+        if kind is None:
+            raise ValueError(f"Not a YouTube playlist or channel URL: {url}")
+
+        if kind == 'channel' and not re.search(r'/(videos|shorts|streams)/?$', urlparse(url).path):
+            url = url.rstrip('/') + '/videos'
+
+        ydl_opts = dict(YDL_OPTS, extract_flat='in_playlist')
+        index = start_index
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            while True:
+                ydl.params['playliststart'] = index
+                ydl.params['playlistend'] = index + page_size - 1
+
+                try:
+                    info = ydl.extract_info(url, download=False)
+                except Exception as e:
+                    logger.error(f"Error expanding YouTube {kind} {url} at {index}: {str(e)}")
+                    raise RuntimeError(f"Failed to expand YouTube {kind}: {str(e)}")
+
+                page = []
+                for offset, entry in enumerate(info.get('entries') or []):
+                    if not entry or not entry.get('id'):
+                        continue
+                    page.append({
+                        'index': index + offset,
+                        'video_id': entry['id'],
+                        'url': f"https://www.youtube.com/watch?v={entry['id']}",
+                        'title': entry.get('title'),
+                    })
+
+                if page:
+                    yield page
+                if len(info.get('entries') or []) < page_size:
+                    return
+                index += page_size
+
     def fetch(self, url: str) -> Dict[str, Any]:
         """
         Fetch metadata from a YouTube video URL.
         
+        Reuses the calling thread's YoutubeDL session, and the result is
+        trimmed with trim_info rather than carrying the full yt-dlp info dict.
+        
         Args:
             url: The YouTube video URL
             
@@ -86,30 +263,56 @@ class YouTubeExtractor(Extractor):
         logger.info(f"Fetching YouTube video with ID: {video_id}")
         
         try:
-            # Configure yt-dlp options
-            ydl_opts = {
-                'skip_download': True,  # Don't download the video
-                'quiet': True,  # Don't print to stdout
-                'no_warnings': True,  # Don't print warnings
-                'extract_flat': True,  # Only extract metadata
-            }
-            
-            # Fetch video metadata
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                
-            # Extract relevant fields
-            result = {
-                'title': info.get('title'),
-                'description': info.get('description'),
-                'thumbnails': info.get('thumbnails', []),
-                'video_id': video_id,
-                'platform': 'youtube',
-                'raw_data': info,
-            }
-            
-            return result
+            info = self._session().extract_info(url, download=False)
+            return trim_info(info, video_id)
             
         except Exception as e:
             logger.error(f"Error fetching YouTube video {video_id}: {str(e)}")
             raise RuntimeError(f"Failed to fetch YouTube video: {str(e)}")
+    
+    def fetch_many(self, urls: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch metadata for a batch of YouTube video URLs concurrently.
+        
+        URLs are fetched on a pool of max_workers threads that lives as long
+        as the extractor, and each pool thread reuses one YoutubeDL session
+        for every URL it handles, in this call and in later ones. The
+        extractor setup cost is therefore paid once per thread rather than
+        once per URL or per batch; call close() to release the sessions.
+        
+        Results are trimmed with trim_info, so they do not carry the full
+        yt-dlp info dict.
+        
+        Args:
+            urls: The YouTube video URLs to fetch
+            
+        Returns:
+            A dictionary mapping each URL to its trimmed metadata, or to None
+            if the URL was invalid or fetching it failed.
+        """
+        urls = list(dict.fromkeys(urls))  # Drop duplicates, keep order
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        if not urls:
+            return results
+        
+        def fetch_one(url: str) -> Optional[Dict[str, Any]]:
+            video_id = self.extract_id(url)
+            if not video_id:
+                logger.warning(f"Skipping invalid YouTube URL: {url}")
+                return None
+            try:
+                info = self._session().extract_info(url, download=False)
+                return trim_info(info, video_id)
+            except Exception as e:
+                logger.error(f"Error fetching YouTube video {video_id}: {str(e)}")
+                return None
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max(1, self.max_workers),
+                                                thread_name_prefix="ytdlp")
+        logger.info(f"Fetching {len(urls)} YouTube videos with {self.max_workers} workers")
+        
+        for url, result in zip(urls, self._executor.map(fetch_one, urls)):
+            results[url] = result
+        
+        return results
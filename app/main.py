@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from dotenv import load_dotenv
@@ -8,6 +8,11 @@ load_dotenv()
 
 # Use direct import since app directory is in the Python path
 from app.api.router import api_router
+from app.core.timing import ProfilingMiddleware, RequestMetricsMiddleware, RequestTimingMiddleware, install_sql_timing
+from app.database import engine
+from app.models import SOURCE_PRIORITIES
+from app.utils.metrics import REGISTRY, register_database_collector
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 app = FastAPI(
     title="Bite Map API",
@@ -24,6 +29,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing headers and timing logs for a sample of requests
+app.add_middleware(RequestTimingMiddleware)
+install_sql_timing(engine)
+
+# Prometheus latency histograms for every request, plus pool and queue gauges
+app.add_middleware(RequestMetricsMiddleware)
+register_database_collector(engine, lanes={priority: lane for lane, priority in SOURCE_PRIORITIES.items()})
+
+# Flame graphs of slow requests when PROFILING=true
+app.add_middleware(ProfilingMiddleware)
+
 # Include API router
 app.include_router(api_router, prefix="/api")
 
@@ -35,3 +51,8 @@ async def root():
 @app.get("/healthz")
 async def health_check():
     return {"status": "ok"}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this API process."""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
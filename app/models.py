@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, UniqueConstraint, func, event, Text as AlchemyText # Use Text as AlchemyText to avoid conflict if user defines TEXT
+from sqlalchemy import Column, Integer, Float, String, Boolean, ForeignKey, DateTime, UniqueConstraint, Index, LargeBinary, Computed, func, event, text, Text as AlchemyText # Use Text as AlchemyText to avoid conflict if user defines TEXT
 from sqlalchemy.orm import relationship, declarative_base, declared_attr, object_session
 from sqlalchemy.dialects.postgresql import TEXT # This is the one the user had
 import os
@@ -23,32 +23,124 @@ class User(Base):
 
     reviews = relationship("Review", back_populates="user")
     sources = relationship("Source", back_populates="user")
+    favorites = relationship("UserFavorite", back_populates="user")
+
+# Queue lanes a source can be ingested in; lower priorities are claimed first
+SOURCE_PRIORITIES = {
+    "interactive": 0,  # Links pasted by a user, who is waiting on the result
+    "bulk": 10,  # Playlist/channel expansion and other batch imports
+}
 
 class Source(Base):
     __tablename__ = "sources"
-    # __table_args__ = {'extend_existing': True} # Temporarily removed
+    __table_args__ = (
+        # Runnable jobs by lane, then in due order, without scanning finished rows
+        Index('ix_sources_runnable', 'priority', 'next_attempt_at', postgresql_where=text("status = 'queued'")),
+        # A client's own backlog per lane, for per-client ingest limits
+        Index('ix_sources_client_queued', 'client_key', 'priority', postgresql_where=text("status = 'queued'")),
+        # Claims whose lease ran out, for the worker's reaper
+        Index('ix_sources_processing_claimed', 'claimed_at', postgresql_where=text("status = 'processing'")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     url = Column(String, unique=True, index=True)
     description = Column(TEXT) # Using postgresql.TEXT
+    platform = Column(String)
+    status = Column(String, index=True)  # queued, processing, processed, dead
+    priority = Column(Integer, nullable=False, default=SOURCE_PRIORITIES["bulk"])  # See SOURCE_PRIORITIES
+    attempts = Column(Integer, nullable=False, default=0)  # Failed attempts so far
+    next_attempt_at = Column(DateTime(timezone=True), default=func.now())  # When a queued link becomes runnable, on the database clock
+    claimed_at = Column(DateTime(timezone=True))  # When a worker last claimed or renewed a processing link
+    last_error = Column(String)  # Why the last attempt failed (extraction_failed, geocode_failed, error)
+    raw_data_hash = Column(String(64), ForeignKey("raw_payloads.hash"), nullable=True)  # Pointer into raw_payloads
     user_id = Column(Integer, ForeignKey("users.id"))
+    client_key = Column(String, nullable=True)  # Username or IP that ingested the link, for per-client limits
+    collection_id = Column(Integer, ForeignKey("source_collections.id"), index=True, nullable=True)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
 
     user = relationship("User", back_populates="sources")
     places = relationship("Place", back_populates="source")
+    collection = relationship("SourceCollection", back_populates="sources")
+    raw_payload = relationship("RawPayload", lazy="select")  # Only loaded when reprocessing
+
+class SourceQueueDepth(Base):
+    """
+    Number of queued sources per lane.
+    
+    Maintained by statement-level triggers on sources (see migration
+    014_add_source_queue_depth), so ingest can check the backlog with a
+    primary key lookup instead of counting the queue.
+    """
+    __tablename__ = "source_queue_depth"
+
+    priority = Column(Integer, primary_key=True)  # Source.priority of the lane
+    depth = Column(Integer, nullable=False, default=0)
+
+class RawPayload(Base):
+    """Compressed, content-addressed raw extractor payload (e.g. yt-dlp metadata)."""
+    __tablename__ = "raw_payloads"
+
+    hash = Column(String(64), primary_key=True)  # sha256 of the canonical JSON
+    codec = Column(String, nullable=False, default="zstd")
+    size = Column(Integer, nullable=False)  # Uncompressed size in bytes
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+class SourceCollection(Base):
+    """A playlist or channel that is expanded into individual Source rows."""
+    __tablename__ = "source_collections"
+
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String, unique=True, index=True, nullable=False)
+    platform = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # playlist or channel
+    status = Column(String, default="queued")  # queued, expanding, expanded, error
+    expanding_since = Column(DateTime)  # When the running expansion claimed it, see collection_expander.claim_collection
+    last_error = Column(String)  # Why the last expansion failed
+    next_index = Column(Integer, default=1)  # 1-based resume cursor, NULL once a full pass is done
+    last_seen_video_id = Column(String)  # Newest video seen, used for incremental re-sync
+    total_enqueued = Column(Integer, default=0)
+    synced_at = Column(DateTime)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    sources = relationship("Source", back_populates="collection")
 
 class Place(Base):
     __tablename__ = "places"
+    __table_args__ = (
+        # GIST index for bbox, KNN and distance predicates on geom; meter-based
+        # KNN uses ix_places_geog on geom::geography (migration 018)
+        Index('ix_places_geom', 'geom', postgresql_using='gist'),
+        # Prefix lookups of numbered slugs (slug LIKE 'base-%'), see utils.slugs
+        Index('ix_places_slug_pattern', 'slug', postgresql_ops={'slug': 'text_pattern_ops'}),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     address = Column(String)
+    city = Column(String)
+    state = Column(String)
+    country = Column(String)
+    postal_code = Column(String)
     
-    # Use Geometry for all spatial operations (PostgreSQL with PostGIS)
+    # The canonical location. Geometry (SRID 4326) for all spatial operations;
+    # cast to Geography where distances must be in meters.
     geom = Column(Geometry(geometry_type='POINT', srid=4326, spatial_index=False), nullable=True)
     
+    # Stored generated coordinates, so reads are plain column fetches
+    lat = Column(Float, Computed("ST_Y(geom)", persisted=True))
+    lng = Column(Float, Computed("ST_X(geom)", persisted=True))
+    
+    # Geohash cells at several precisions (see utils.geocell), filled in by the worker
+    geohash_2 = Column(String(2), index=True)
+    geohash_3 = Column(String(3), index=True)
+    geohash_4 = Column(String(4), index=True)
+    geohash_6 = Column(String(6), index=True)
+    geohash_8 = Column(String(8), index=True)
+    
     slug = Column(String, unique=True, index=True)
     source_id = Column(Integer, ForeignKey("sources.id"))
     created_at = Column(DateTime, default=func.now())
@@ -57,26 +149,6 @@ class Place(Base):
     source = relationship("Source", back_populates="places")
     reviews = relationship("Review", back_populates="place")
     
-    @property
-    def lat(self) -> float:
-        """Extract latitude from geometry for API responses."""
-        if self.geom is not None:
-            session = object_session(self)
-            if session:
-                from geoalchemy2.functions import ST_Y
-                return session.scalar(ST_Y(self.geom))
-        return None
-    
-    @property 
-    def lng(self) -> float:
-        """Extract longitude from geometry for API responses."""
-        if self.geom is not None:
-            session = object_session(self)
-            if session:
-                from geoalchemy2.functions import ST_X
-                return session.scalar(ST_X(self.geom))
-        return None
-    
     @property
     def first_thumbnail(self) -> str:
         """Get the first available thumbnail URL from associated reviews."""
@@ -91,16 +163,71 @@ class Place(Base):
                 return review.thumbnail_url
         return None
 
+class PlaceCellStat(Base):
+    """Materialized per-geohash-cell aggregates for zoomed-out map views."""
+    __tablename__ = "place_cell_stats"
+    __table_args__ = (
+        # Serves "cells of one precision inside a viewport" lookups
+        Index('ix_place_cell_stats_precision_lat_lng', 'precision', 'lat', 'lng'),
+    )
+
+    cell = Column(String(8), primary_key=True)  # Geohash; its length is the precision
+    precision = Column(Integer, nullable=False)
+    place_count = Column(Integer, nullable=False, default=0)
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)  # Sum of review ratings, kept so batches can add to it
+    lat = Column(Float, nullable=False)  # Centroid of the cell's places, used as the marker position
+    lng = Column(Float, nullable=False)
+    top_place_id = Column(Integer, ForeignKey("places.id", ondelete="SET NULL"), nullable=True)
+    thumbnail_url = Column(String, nullable=True)  # Latest thumbnail of the top place
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    top_place = relationship("Place")
+
+    @property
+    def avg_rating(self):
+        """Mean review rating in the cell, or None without reviews."""
+        return self.rating_sum / self.review_count if self.review_count else None
+
+class SlowQuery(Base):
+    """A statement over SLOW_QUERY_MS, written by the slow-query log (utils.slow_queries)."""
+    __tablename__ = "slow_queries"
+    __table_args__ = (
+        Index('ix_slow_queries_fingerprint_created_at', 'fingerprint', 'created_at'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    fingerprint = Column(String(16), nullable=False)  # Hash of the normalized statement
+    statement = Column(AlchemyText, nullable=False)
+    parameters = Column(AlchemyText, nullable=True)  # JSON
+    duration_ms = Column(Float, nullable=False)
+    plan = Column(AlchemyText, nullable=True)  # EXPLAIN output as JSON, if one was captured
+    created_at = Column(DateTime, default=func.now(), index=True)
+
 # Add event listeners for Place to generate slug
 @event.listens_for(Place, 'before_insert')
+def allocate_slug_before_insert(mapper, connection, place):
+    """
+    Allocate a unique slug, suffixing the desired one (-2, -3, ...) if it is taken.
+
+    Costs one lookup per ORM insert; the worker's BatchWriter inserts places
+    with a Core INSERT after allocating the whole batch's slugs at once, so
+    this hook never runs on that path.
+    """
+    if not place.slug and not place.name:
+        return
+    from slugify import slugify
+    from app.utils.slugs import allocate_slugs
+    place.slug = allocate_slugs(connection, [place.slug or slugify(place.name)])[0]
+
 @event.listens_for(Place, 'before_update')
-def generate_slug_before_save(mapper, connection, place):
+def generate_slug_before_update(mapper, connection, place):
     """Generate slug if needed"""
     if not place.slug and place.name:
         from slugify import slugify
         place.slug = slugify(place.name)
         
-        # If an integer ID exists, append it to ensure uniqueness
+        # The id is known on update, so appending it keeps the slug unique
         if place.id:
             place.slug = f"{place.slug}-{place.id}"
 
@@ -111,6 +238,8 @@ class Review(Base):
     id = Column(Integer, primary_key=True, index=True)
     rating = Column(Integer, nullable=False)
     comment = Column(TEXT) # Using postgresql.TEXT
+    title = Column(String, nullable=True)
+    source_id = Column(Integer, ForeignKey("sources.id"), index=True, nullable=True)  # Source the review was derived from
     source_url = Column(String, nullable=True)  # URL to the original review
     thumbnail_url = Column(String, nullable=True)  # URL to review thumbnail/image
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -120,3 +249,19 @@ class Review(Base):
 
     user = relationship("User", back_populates="reviews")
     place = relationship("Place", back_populates="reviews")
+
+class UserFavorite(Base):
+    __tablename__ = "user_favorites"
+    __table_args__ = (
+        UniqueConstraint('user_id', 'place_id', name='uq_user_favorite_place'),
+        # Serves "newest favorites first" keyset pages for one user
+        Index('ix_user_favorites_user_id_id', 'user_id', 'id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    place_id = Column(Integer, ForeignKey("places.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+    user = relationship("User", back_populates="favorites")
+    place = relationship("Place")
@@ -69,6 +69,14 @@ class PlaceDetailResponse(PlaceResponse):
     }
 
 
+class LinkStatusResponse(BaseModel):
+    """Processing status of an ingested link, with its place once resolved"""
+    id: int
+    status: str
+    last_error: Optional[str] = None
+    place: Optional[PlaceResponse] = None
+
+
 class PlaceListMeta(BaseModel):
     """Pagination metadata for place list responses"""
     next: Optional[int] = None
@@ -78,3 +86,49 @@ class PlaceListResponse(BaseModel):
     """Wrapper for paginated place list responses"""
     items: List[PlaceResponse]
     meta: PlaceListMeta
+
+
+class NearbyPlaceResponse(PlaceResponse):
+    """Schema for a place returned by a nearest-neighbor search"""
+    distance_m: float = Field(..., description="Distance from the search point in meters")
+
+
+class NearbyListMeta(BaseModel):
+    """Keyset pagination metadata for nearest-neighbor responses"""
+    next_id: Optional[int] = None
+    next_distance: Optional[float] = None
+
+
+class NearbyListResponse(BaseModel):
+    """Wrapper for paginated nearest-neighbor responses"""
+    items: List[NearbyPlaceResponse]
+    meta: NearbyListMeta
+
+
+class CellStatResponse(BaseModel):
+    """Schema for one materialized geohash cell aggregate"""
+    cell: str
+    precision: int
+    place_count: int
+    review_count: int
+    avg_rating: Optional[float] = None
+    lat: float = Field(..., description="Centroid latitude of the cell's places")
+    lng: float = Field(..., description="Centroid longitude of the cell's places")
+    top_place_id: Optional[int] = None
+    thumbnail_url: Optional[str] = None
+    
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class CellListMeta(BaseModel):
+    """Metadata for cell aggregate responses"""
+    precision: int
+    truncated: bool = Field(False, description="More cells matched than were returned; the busiest are kept")
+
+
+class CellListResponse(BaseModel):
+    """Wrapper for cell aggregate responses"""
+    items: List[CellStatResponse]
+    meta: CellListMeta
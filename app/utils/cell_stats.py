@@ -0,0 +1,264 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models import Place
+from utils.geocell import GEOHASH_PRECISIONS
+
+logger = logging.getLogger(__name__)
+
+# Each place rolled up with its review count, rating sum and newest thumbnail
+PLACE_ROLLUP_SQL = """
+    SELECT
+        p.id,
+        p.geohash_{precision} AS cell,
+        p.lat,
+        p.lng,
+        count(r.id) AS reviews,
+        coalesce(sum(r.rating), 0) AS ratings,
+        (array_agg(r.thumbnail_url ORDER BY r.id DESC)
+            FILTER (WHERE r.thumbnail_url IS NOT NULL))[1] AS thumbnail_url
+    FROM places p
+    LEFT JOIN reviews r ON r.place_id = p.id
+    WHERE p.geohash_{precision} IS NOT NULL AND p.lat IS NOT NULL {place_filter}
+    GROUP BY p.id
+"""
+
+# Recomputes place_cell_stats rows for one precision. Places are rolled up
+# per cell; the most reviewed place becomes the cell's top place.
+REFRESH_SQL = """
+INSERT INTO place_cell_stats
+    (cell, precision, place_count, review_count, rating_sum, lat, lng, top_place_id, thumbnail_url, updated_at)
+SELECT DISTINCT ON (pr.cell)
+    pr.cell,
+    :precision,
+    count(*) OVER cell_window,
+    sum(pr.reviews) OVER cell_window,
+    sum(pr.ratings) OVER cell_window,
+    avg(pr.lat) OVER cell_window,
+    avg(pr.lng) OVER cell_window,
+    pr.id,
+    pr.thumbnail_url,
+    now()
+FROM ({rollup}) pr
+WINDOW cell_window AS (PARTITION BY pr.cell)
+ORDER BY pr.cell, pr.reviews DESC, pr.id
+ON CONFLICT (cell) DO UPDATE SET
+    place_count = EXCLUDED.place_count,
+    review_count = EXCLUDED.review_count,
+    rating_sum = EXCLUDED.rating_sum,
+    lat = EXCLUDED.lat,
+    lng = EXCLUDED.lng,
+    top_place_id = EXCLUDED.top_place_id,
+    thumbnail_url = EXCLUDED.thumbnail_url,
+    updated_at = EXCLUDED.updated_at
+"""
+
+# Adds a batch's new places and new reviews to the rows of one precision.
+# Cells that only gained reviews are updated in place; cells that gained
+# places are upserted, moving the centroid by the new places' weight.
+DELTA_SQL = """
+WITH new_places AS (
+    SELECT geohash_{precision} AS cell, count(*) AS places, sum(lat) AS lat_sum, sum(lng) AS lng_sum
+    FROM places
+    WHERE id = ANY(:new_place_ids) AND geohash_{precision} IS NOT NULL AND lat IS NOT NULL
+    GROUP BY 1
+), new_reviews AS (
+    SELECT p.geohash_{precision} AS cell, count(*) AS reviews, coalesce(sum(r.rating), 0) AS ratings
+    FROM reviews r
+    JOIN places p ON p.id = r.place_id
+    WHERE r.id = ANY(:review_ids) AND p.geohash_{precision} IS NOT NULL AND p.lat IS NOT NULL
+    GROUP BY 1
+), delta AS (
+    SELECT
+        cell,
+        coalesce(np.places, 0) AS places,
+        np.lat_sum,
+        np.lng_sum,
+        coalesce(nr.reviews, 0) AS reviews,
+        coalesce(nr.ratings, 0) AS ratings
+    FROM new_places np
+    FULL JOIN new_reviews nr USING (cell)
+), reviews_only AS (
+    UPDATE place_cell_stats s SET
+        review_count = s.review_count + d.reviews,
+        rating_sum = s.rating_sum + d.ratings,
+        updated_at = now()
+    FROM delta d
+    WHERE s.cell = d.cell AND d.places = 0
+)
+INSERT INTO place_cell_stats AS s
+    (cell, precision, place_count, review_count, rating_sum, lat, lng, updated_at)
+SELECT cell, :precision, places, reviews, ratings, lat_sum / places, lng_sum / places, now()
+FROM delta
+WHERE places > 0
+ORDER BY cell
+ON CONFLICT (cell) DO UPDATE SET
+    lat = (s.lat * s.place_count + EXCLUDED.lat * EXCLUDED.place_count) / (s.place_count + EXCLUDED.place_count),
+    lng = (s.lng * s.place_count + EXCLUDED.lng * EXCLUDED.place_count) / (s.place_count + EXCLUDED.place_count),
+    place_count = s.place_count + EXCLUDED.place_count,
+    review_count = s.review_count + EXCLUDED.review_count,
+    rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+    updated_at = EXCLUDED.updated_at
+"""
+
+# Re-elects the top place of the cells a batch touched. Review counts only
+# grow on this path, so the winner is either a touched place or the cell's
+# current top place; nothing else in the cell has to be read.
+TOP_PLACE_SQL = """
+UPDATE place_cell_stats s SET
+    top_place_id = c.id,
+    thumbnail_url = c.thumbnail_url
+FROM (
+    SELECT DISTINCT ON (pr.cell) pr.cell, pr.id, pr.thumbnail_url
+    FROM ({rollup}) pr
+    ORDER BY pr.cell, pr.reviews DESC, pr.id
+) c
+WHERE s.cell = c.cell
+"""
+
+TOP_PLACE_CANDIDATES = """AND (
+        p.id = ANY(:place_ids)
+        OR p.id IN (
+            SELECT top_place_id FROM place_cell_stats
+            WHERE cell IN (SELECT geohash_{precision} FROM places WHERE id = ANY(:place_ids))
+        )
+    )"""
+
+
+def check_precision(precision: int):
+    if precision not in GEOHASH_PRECISIONS:
+        raise ValueError(f"Unsupported geohash precision: {precision}")
+
+
+def refresh_sql(precision: int, all_cells: bool = False) -> str:
+    """Build the refresh statement for one stored precision."""
+    check_precision(precision)
+    place_filter = "" if all_cells else f"AND p.geohash_{precision} = ANY(:cells)"
+    rollup = PLACE_ROLLUP_SQL.format(precision=precision, place_filter=place_filter)
+    return REFRESH_SQL.format(rollup=rollup)
+
+
+def delta_sql(precision: int) -> str:
+    """Build the delta upsert statement for one stored precision."""
+    check_precision(precision)
+    return DELTA_SQL.format(precision=precision)
+
+
+def top_place_sql(precision: int) -> str:
+    """Build the top place re-election statement for one stored precision."""
+    check_precision(precision)
+    place_filter = TOP_PLACE_CANDIDATES.format(precision=precision)
+    return TOP_PLACE_SQL.format(rollup=PLACE_ROLLUP_SQL.format(precision=precision, place_filter=place_filter))
+
+
+def cells_for_places(db: Session, place_ids: Iterable[int]) -> Dict[int, List[str]]:
+    """
+    Look up the cells touched by a set of places.
+
+    Returns:
+        A dict of precision to the distinct cells at that precision.
+    """
+    place_ids = list(set(place_ids))
+    if not place_ids:
+        return {}
+
+    columns = [getattr(Place, f"geohash_{precision}") for precision in GEOHASH_PRECISIONS]
+    rows = db.query(*columns).filter(Place.id.in_(place_ids)).all()
+
+    cells = {}
+    for position, precision in enumerate(GEOHASH_PRECISIONS):
+        values = sorted({row[position] for row in rows if row[position]})
+        if values:
+            cells[precision] = values
+    return cells
+
+
+def refresh_cells(db: Session, cells: Dict[int, List[str]]) -> int:
+    """
+    Recompute the aggregates for the given cells.
+
+    Existing rows for the cells are deleted first, so cells that no longer
+    contain any place disappear. Runs in the caller's transaction.
+
+    Args:
+        db: Database session
+        cells: A dict of precision to cells, as returned by cells_for_places
+
+    Returns:
+        The number of cells refreshed.
+    """
+    refreshed = 0
+    for precision, cell_list in cells.items():
+        if not cell_list:
+            continue
+        db.execute(text("DELETE FROM place_cell_stats WHERE cell = ANY(:cells)"), {"cells": cell_list})
+        db.execute(text(refresh_sql(precision)), {"precision": precision, "cells": cell_list})
+        refreshed += len(cell_list)
+    return refreshed
+
+
+def refresh_place_cells(db: Session, place_ids: Iterable[int]) -> int:
+    """Recompute the aggregates of every cell containing one of the places."""
+    return refresh_cells(db, cells_for_places(db, place_ids))
+
+
+def apply_cell_deltas(db: Session, place_ids: Iterable[int], new_place_ids: Iterable[int],
+                      review_ids: Iterable[int]) -> int:
+    """
+    Add a batch's new places and reviews to the aggregates of their cells.
+
+    Unlike refresh_place_cells, no cell is recomputed from all of its places:
+    counts, rating sums and centroids are moved by the batch's own rows, and
+    only the touched places and the current top places are read to re-elect
+    each cell's top place. Only valid for batches that add places and reviews;
+    anything that removes or moves reviews must use refresh_place_cells.
+    Runs in the caller's transaction.
+
+    Args:
+        db: Database session
+        place_ids: Every place that gained a review in the batch
+        new_place_ids: The places the batch created
+        review_ids: The reviews the batch created
+
+    Returns:
+        The number of cell rows that gained places.
+    """
+    params = {
+        "place_ids": sorted(set(place_ids)),
+        "new_place_ids": sorted(set(new_place_ids)),
+        "review_ids": sorted(set(review_ids)),
+    }
+    if not params["place_ids"] and not params["new_place_ids"]:
+        return 0
+
+    written = 0
+    for precision in GEOHASH_PRECISIONS:
+        result = db.execute(text(delta_sql(precision)), {**params, "precision": precision})
+        written += result.rowcount or 0
+        db.execute(text(top_place_sql(precision)), params)
+    return written
+
+
+def rebuild_cell_stats(db: Session, precisions: Optional[Iterable[int]] = None) -> int:
+    """
+    Rebuild the aggregates from scratch and commit.
+
+    Args:
+        db: Database session
+        precisions: Precisions to rebuild (default: all stored precisions)
+
+    Returns:
+        The number of cells written.
+    """
+    written = 0
+    for precision in precisions or GEOHASH_PRECISIONS:
+        sql = refresh_sql(precision, all_cells=True)
+        db.execute(text("DELETE FROM place_cell_stats WHERE precision = :precision"), {"precision": precision})
+        result = db.execute(text(sql), {"precision": precision})
+        db.commit()
+        logger.info(f"Rebuilt {result.rowcount} cells at precision {precision}")
+        written += result.rowcount
+    return written
@@ -0,0 +1,226 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy import update, or_, func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models import Source, SourceCollection, SOURCE_PRIORITIES
+from app.extractors.youtube import YouTubeExtractor
+
+logger = logging.getLogger(__name__)
+
+# Number of videos requested from the platform per page
+COLLECTION_PAGE_SIZE = int(os.getenv("COLLECTION_PAGE_SIZE", "50"))
+
+# An expansion still running after this long is presumed dead and may be claimed again
+COLLECTION_EXPANSION_LEASE_SECONDS = int(os.getenv("COLLECTION_EXPANSION_LEASE_SECONDS", "3600"))
+
+
+def get_or_create_collection(db: Session, url: str, platform: str, kind: str) -> SourceCollection:
+    """
+    Get the collection for a playlist or channel URL, creating it if needed.
+
+    Args:
+        db: Database session
+        url: Playlist or channel URL
+        platform: Platform type (youtube, tiktok, etc.)
+        kind: Collection kind ("playlist" or "channel")
+
+    Returns:
+        The SourceCollection object
+    """
+    collection = db.query(SourceCollection).filter(SourceCollection.url == url).first()
+    if collection:
+        return collection
+
+    collection = SourceCollection(
+        url=url,
+        platform=platform,
+        kind=kind,
+        status="queued",
+        next_index=1,
+        total_enqueued=0,
+    )
+    db.add(collection)
+    db.commit()
+    db.refresh(collection)
+    return collection
+
+
+def claim_collection(db: Session, collection_id: int) -> bool:
+    """
+    Atomically mark a collection as expanding, unless another expansion holds it.
+
+    A claim older than COLLECTION_EXPANSION_LEASE_SECONDS is taken over, so a
+    collection whose expansion died without releasing it can be expanded again.
+
+    Returns:
+        True if this caller now holds the collection and should expand it.
+    """
+    stale = func.now() - timedelta(seconds=COLLECTION_EXPANSION_LEASE_SECONDS)
+    stmt = (
+        update(SourceCollection)
+        .where(
+            SourceCollection.id == collection_id,
+            or_(
+                SourceCollection.status != "expanding",
+                SourceCollection.expanding_since.is_(None),
+                SourceCollection.expanding_since < stale,
+            ),
+        )
+        .values(status="expanding", expanding_since=func.now())
+        .returning(SourceCollection.id)
+    )
+    claimed = db.execute(stmt).first() is not None
+    db.commit()
+    return claimed
+
+
+def release_collection(db: Session, collection_id: int, error: Optional[str] = None):
+    """Mark a collection that is still expanding as failed, releasing its claim."""
+    db.rollback()
+    db.execute(
+        update(SourceCollection)
+        .where(SourceCollection.id == collection_id, SourceCollection.status == "expanding")
+        .values(status="error", expanding_since=None, last_error=error or "Expansion stopped unexpectedly")
+    )
+    db.commit()
+
+
+def enqueue_entries(db: Session, collection: SourceCollection, entries: List[Dict[str, Any]],
+                    client_key: Optional[str] = None) -> int:
+    """
+    Insert one page of expanded videos as queued sources.
+
+    Videos that already exist as sources (submitted by hand or by another
+    collection) are skipped by the unique index on url.
+
+    Returns:
+        The number of new sources created.
+    """
+    if not entries:
+        return 0
+
+    rows = [
+        {
+            "name": entry.get("title") or entry["video_id"],
+            "url": entry["url"],
+            "platform": collection.platform,
+            "status": "queued",
+            "priority": SOURCE_PRIORITIES["bulk"],
+            "collection_id": collection.id,
+            "client_key": client_key,
+        }
+        for entry in entries
+    ]
+    stmt = insert(Source).values(rows).on_conflict_do_nothing(index_elements=["url"]).returning(Source.id)
+    return len(db.execute(stmt).fetchall())
+
+
+def expand_collection(
+    db: Session,
+    collection: SourceCollection,
+    extractor: Optional[YouTubeExtractor] = None,
+    page_size: int = COLLECTION_PAGE_SIZE,
+    max_pages: Optional[int] = None,
+    client_key: Optional[str] = None,
+) -> int:
+    """
+    Expand a playlist or channel into individual queued sources.
+
+    The caller must have claimed the collection with claim_collection; the
+    claim is released when this returns or raises. The listing is streamed one page at a time and each page is committed
+    together with the collection's resume cursor, so an interrupted
+    expansion picks up where it stopped on the next call.
+
+    Once a full pass has finished (next_index is NULL), later calls do an
+    incremental re-sync instead: channels are listed newest first, so the
+    walk stops at the last video seen on the previous pass. Playlists have no
+    such ordering and are walked in full, with existing videos skipped.
+
+    Args:
+        db: Database session
+        collection: The collection to expand
+        extractor: Extractor used to list the collection
+        page_size: Number of videos per page
+        max_pages: Optional limit on pages processed in this call
+        client_key: Client the sources are queued for, counted against its ingest limit
+
+    Returns:
+        The number of new sources created by this call.
+    """
+    extractor = extractor or YouTubeExtractor()
+    incremental = collection.next_index is None
+    stop_at = collection.last_seen_video_id if incremental and collection.kind == "channel" else None
+    start_index = 1 if incremental else collection.next_index
+    newest_video_id = None
+    enqueued = 0
+    pages = 0
+
+    logger.info(
+        f"Expanding {collection.kind} {collection.url} "
+        f"({'incremental' if incremental else 'from index ' + str(start_index)})"
+    )
+
+    finished = False
+    error = None
+    try:
+        completed = True
+        for page in extractor.iter_collection(collection.url, start_index=start_index, page_size=page_size):
+            if page[0]["index"] == 1:
+                newest_video_id = page[0]["video_id"]
+
+            reached_last_seen = False
+            if stop_at:
+                for position, entry in enumerate(page):
+                    if entry["video_id"] == stop_at:
+                        page = page[:position]
+                        reached_last_seen = True
+                        break
+
+            added = enqueue_entries(db, collection, page, client_key)
+            enqueued += added
+            pages += 1
+            collection.total_enqueued = (collection.total_enqueued or 0) + added
+
+            if not incremental:
+                # A full pass may be resumed later, so persist the cursor with each page
+                collection.next_index = page[-1]["index"] + 1
+                if newest_video_id:
+                    collection.last_seen_video_id = newest_video_id
+            db.commit()
+
+            if reached_last_seen:
+                break
+            if max_pages and pages >= max_pages:
+                completed = False
+                break
+
+        if completed:
+            collection.next_index = None
+            # An incremental pass only moves the high-water mark once it has finished
+            if newest_video_id:
+                collection.last_seen_video_id = newest_video_id
+
+        collection.status = "expanded" if collection.next_index is None else "queued"
+        collection.expanding_since = None
+        collection.last_error = None
+        collection.synced_at = datetime.now()
+        db.commit()
+        finished = True
+
+    except Exception as e:
+        logger.error(f"Error expanding collection {collection.id}: {str(e)}")
+        error = str(e)
+        raise
+
+    finally:
+        # Whatever stopped the expansion, never leave the collection claimed
+        if not finished:
+            release_collection(db, collection.id, error)
+
+    logger.info(f"Enqueued {enqueued} new sources from collection {collection.id}")
+    return enqueued
@@ -0,0 +1,141 @@
+"""
+Geohash cell IDs for spatial bucketing.
+
+Places carry their geohash at a few fixed precisions so viewport queries,
+aggregates and cache keys can work on discrete cells instead of arbitrary
+bounding boxes. Geohashes are hierarchical: a cell's parent is its prefix.
+
+This module has no database or model imports so both the API and the
+worker can use it.
+"""
+from typing import Dict, List, Optional, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precisions stored on places, coarse to fine (~1250 km, ~156 km, ~39 km,
+# ~1.2 km, ~38 m cells); 2 and 3 serve country- and continent-level maps
+GEOHASH_PRECISIONS = (2, 3, 4, 6, 8)
+
+# Upper bound on the number of cells a single viewport may expand into
+MAX_VIEWPORT_CELLS = 256
+
+
+def encode(lat: float, lng: float, precision: int) -> str:
+    """
+    Encode a point as a geohash.
+
+    Args:
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        precision: Number of base32 characters
+
+    Returns:
+        The geohash string.
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # Geohash interleaves bits starting with longitude
+    while len(chars) < precision:
+        rng, coord = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Return the (width, height) of a cell at the given precision, in degrees."""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 360.0 / (1 << lng_bits), 180.0 / (1 << lat_bits)
+
+
+def place_cells(lat: float, lng: float) -> Dict[str, str]:
+    """
+    Compute the geohash columns stored on a place.
+
+    Returns:
+        A dict of Place column name (geohash_4, ...) to geohash.
+    """
+    finest = encode(lat, lng, max(GEOHASH_PRECISIONS))
+    return {f"geohash_{precision}": finest[:precision] for precision in GEOHASH_PRECISIONS}
+
+
+def is_valid_cell(cell: str) -> bool:
+    """Check that a string is a geohash at one of the stored precisions."""
+    return len(cell) in GEOHASH_PRECISIONS and all(char in BASE32 for char in cell)
+
+
+def bbox_cells(min_lng: float, min_lat: float, max_lng: float, max_lat: float, precision: int) -> List[str]:
+    """
+    List the cells at a precision that cover a bounding box.
+
+    Args:
+        min_lng, min_lat, max_lng, max_lat: The bounding box in degrees
+        precision: Geohash precision of the returned cells
+
+    Returns:
+        Sorted, de-duplicated geohashes whose cells intersect the box.
+    """
+    width, height = cell_size(precision)
+    # Snap to the cell grid so each step lands inside a new cell
+    start_lng = max(-180.0, (min_lng + 180.0) // width * width - 180.0)
+    start_lat = max(-90.0, (min_lat + 90.0) // height * height - 90.0)
+
+    cells = set()
+    lat = start_lat
+    while lat <= max_lat and lat < 90.0:
+        lng = start_lng
+        while lng <= max_lng and lng < 180.0:
+            cells.add(encode(lat + height / 2, lng + width / 2, precision))
+            lng += width
+        lat += height
+    return sorted(cells)
+
+
+def estimate_cells(min_lng: float, min_lat: float, max_lng: float, max_lat: float, precision: int) -> int:
+    """Upper bound on the number of cells bbox_cells returns, without listing them."""
+    width, height = cell_size(precision)
+    return (int((max_lng - min_lng) / width) + 2) * (int((max_lat - min_lat) / height) + 2)
+
+
+def viewport_precision(min_lng: float, min_lat: float, max_lng: float, max_lat: float,
+                       max_cells: int = MAX_VIEWPORT_CELLS) -> int:
+    """
+    Pick the finest stored precision that covers a viewport in at most max_cells cells.
+
+    Falls back to the coarsest precision for very large viewports.
+    """
+    for precision in sorted(GEOHASH_PRECISIONS, reverse=True):
+        if estimate_cells(min_lng, min_lat, max_lng, max_lat, precision) <= max_cells:
+            return precision
+    return min(GEOHASH_PRECISIONS)
+
+
+def viewport_cells(min_lng: float, min_lat: float, max_lng: float, max_lat: float,
+                   max_cells: int = MAX_VIEWPORT_CELLS) -> Optional[List[str]]:
+    """
+    List the cells covering a viewport at the finest precision that needs at most max_cells.
+
+    Returns:
+        The cells, or None if even the coarsest precision needs more than
+        max_cells (the caller should fall back to the bbox itself).
+    """
+    precision = viewport_precision(min_lng, min_lat, max_lng, max_lat, max_cells)
+    if estimate_cells(min_lng, min_lat, max_lng, max_lat, precision) > max_cells:
+        return None
+    return bbox_cells(min_lng, min_lat, max_lng, max_lat, precision)
@@ -0,0 +1,136 @@
+"""
+Prometheus metrics for the API and the worker.
+
+The API serves them at /metrics; worker processes export them over HTTP
+when WORKER_METRICS_PORT is set. Collectors live in a registry of their
+own, so importing this module under both package paths (utils.metrics in
+the worker, app.utils.metrics in the API) never registers a metric twice.
+
+Hot-path recording is a perf_counter() pair and one observe() on a child
+metric bound at import time, so it costs a few microseconds and never
+looks up labels. Queue depth and connection pool usage are gauges read at
+scrape time instead of being kept up to date on every change.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, ProcessCollector, start_http_server
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+REGISTRY = CollectorRegistry(auto_describe=True)
+ProcessCollector(registry=REGISTRY)
+
+REQUEST_SECONDS = Histogram(
+    "bitemap_http_request_duration_seconds",
+    "API request latency until the response headers are sent, by route template",
+    ["method", "route", "status"],
+    registry=REGISTRY,
+)
+
+# Worker stages, in processing order
+WORKER_STAGES = ("fetch", "nlp", "geocode", "dedupe", "persist")
+
+WORKER_STAGE_SECONDS = Histogram(
+    "bitemap_worker_stage_duration_seconds",
+    "Time spent per worker stage: per link for nlp and geocode; per batch for fetch, dedupe "
+    "and persist, which covers the whole batch write including dedupe",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+    registry=REGISTRY,
+)
+_STAGE_CHILDREN = {stage: WORKER_STAGE_SECONDS.labels(stage) for stage in WORKER_STAGES}
+
+WORKER_LINKS = Counter(
+    "bitemap_worker_links_total",
+    "Links finished by the worker, by outcome (processed, retry, dead)",
+    ["outcome"],
+    registry=REGISTRY,
+)
+
+GEOCODE_REQUESTS = Counter(
+    "bitemap_geocode_requests_total",
+    "Place geocoding by result: ok, no_result, or reused (reprocessing kept the stored place)",
+    ["result"],
+    registry=REGISTRY,
+)
+
+
+@contextmanager
+def observe_stage(stage: str):
+    """Record the duration of a block as one run of a worker stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _STAGE_CHILDREN[stage].observe(time.perf_counter() - start)
+
+
+class DatabaseCollector:
+    """
+    Scrape-time gauges for the connection pool and, optionally, the queue.
+
+    Queue depth per lane comes from the trigger-maintained
+    source_queue_depth counters; in-flight and dead-lettered links are
+    counted through the index on sources.status.
+    """
+
+    def __init__(self, engine: Engine, lanes: Optional[Dict[int, str]] = None):
+        self.engine = engine
+        # Priority -> lane name; queue metrics are only collected when set
+        self.lanes = lanes
+
+    def describe(self):
+        # Nothing to describe up front; collecting would query the database
+        return []
+
+    def collect(self):
+        pool = self.engine.pool
+        if hasattr(pool, "checkedout"):
+            in_use = GaugeMetricFamily("bitemap_db_pool_connections", "Database pool connections by state",
+                                       labels=["state"])
+            in_use.add_metric(["checked_out"], pool.checkedout())
+            in_use.add_metric(["idle"], pool.checkedin())
+            in_use.add_metric(["overflow"], max(pool.overflow(), 0))
+            yield in_use
+            yield GaugeMetricFamily("bitemap_db_pool_size", "Configured database pool size", value=pool.size())
+
+        if self.lanes is None:
+            return
+        try:
+            with self.engine.connect() as conn:
+                depths = conn.execute(text("SELECT priority, depth FROM source_queue_depth")).all()
+                statuses = conn.execute(text(
+                    "SELECT status, count(*) FROM sources WHERE status IN ('processing', 'dead') GROUP BY status"
+                )).all()
+        except Exception as e:
+            logger.warning(f"Could not collect queue metrics: {e}")
+            return
+
+        queue_depth = GaugeMetricFamily("bitemap_queue_depth", "Queued links per lane", labels=["lane"])
+        for priority, depth in depths:
+            queue_depth.add_metric([self.lanes.get(priority, str(priority))], depth)
+        yield queue_depth
+
+        sources = GaugeMetricFamily("bitemap_sources", "Links in progress or dead-lettered, by status",
+                                    labels=["status"])
+        counts = dict(statuses)
+        for status in ("processing", "dead"):
+            sources.add_metric([status], counts.get(status, 0))
+        yield sources
+
+
+def register_database_collector(engine: Engine, lanes: Optional[Dict[int, str]] = None):
+    """Export pool (and, with lanes, queue) gauges for an engine."""
+    REGISTRY.register(DatabaseCollector(engine, lanes))
+
+
+def start_metrics_server(port: int):
+    """Serve this process's metrics over HTTP, from a background thread."""
+    start_http_server(port, registry=REGISTRY)
+    logger.info(f"Serving metrics on port {port}")
@@ -0,0 +1,110 @@
+import logging
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from spacy.language import Language
+from spacy.matcher import PhraseMatcher
+from spacy.tokens import Doc
+from spacy.util import filter_spans
+from sqlalchemy import column, select, table
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Only the columns the gazetteer reads; avoids importing the models here
+PLACES = table("places", column("id"), column("name"), column("city"))
+
+# Places read per query while refreshing
+REFRESH_BATCH_SIZE = 5000
+
+PLACE_LABEL = "PLACE"
+CITY_LABEL = "CITY"
+
+
+class Gazetteer:
+    """
+    Dictionary matcher for known place names and cities.
+
+    Names are compiled into a spaCy PhraseMatcher (a token trie matched on
+    lowercase text), so matching runs in linear time over a document no
+    matter how many names are known. The gazetteer is filled from the
+    places table and refreshed incrementally: each refresh only reads
+    places with a higher id than the last one seen.
+    """
+
+    def __init__(self, nlp: Language):
+        self.nlp = nlp
+        self.matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+        # Lowercased name -> name as stored, for each label
+        self.names: Dict[str, Dict[str, str]] = {PLACE_LABEL: {}, CITY_LABEL: {}}
+        self.last_place_id = 0
+
+    def __len__(self) -> int:
+        return sum(len(names) for names in self.names.values())
+
+    def add(self, label: str, names: Iterable[str]) -> int:
+        """
+        Add names under a label, skipping blanks and names already known.
+
+        Returns:
+            The number of new names added.
+        """
+        known = self.names[label]
+        new_names = []
+        for name in names:
+            name = (name or "").strip()
+            if name and name.lower() not in known:
+                known[name.lower()] = name
+                new_names.append(name)
+        if new_names:
+            # Patterns only need the tokenizer, not the full pipeline
+            self.matcher.add(label, list(self.nlp.tokenizer.pipe(new_names)))
+        return len(new_names)
+
+    def refresh(self, db: Union[Session, Connection]) -> int:
+        """
+        Add the places (and their cities) created since the last refresh.
+
+        Returns:
+            The number of places read.
+        """
+        read = 0
+        while True:
+            rows = db.execute(
+                select(PLACES.c.id, PLACES.c.name, PLACES.c.city)
+                .where(PLACES.c.id > self.last_place_id)
+                .order_by(PLACES.c.id)
+                .limit(REFRESH_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            self.add(PLACE_LABEL, (name for _, name, _ in rows))
+            self.add(CITY_LABEL, (city for _, _, city in rows))
+            self.last_place_id = rows[-1][0]
+            read += len(rows)
+            if len(rows) < REFRESH_BATCH_SIZE:
+                break
+        if read:
+            logger.info(f"Gazetteer refreshed with {read} places ({len(self)} names known)")
+        return read
+
+    def match(self, doc: Doc) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Find the best known place name and city in a document.
+
+        Overlapping matches are resolved in favour of the longest span, and
+        the first remaining match of each label wins.
+
+        Returns:
+            A tuple of (place name, city) as stored, either may be None.
+        """
+        if not len(self):
+            return None, None
+
+        spans = filter_spans(self.matcher(doc, as_spans=True))
+        found = {}
+        for span in spans:
+            label = span.label_
+            if label not in found:
+                found[label] = self.names[label].get(span.text.lower(), span.text)
+        return found.get(PLACE_LABEL), found.get(CITY_LABEL)
@@ -1,17 +1,87 @@
+import os
 import re
+import gc
 import logging
-from typing import Dict, Optional, List, Tuple
-import spacy
-from spacy.tokens import Doc, Span
+import threading
+from typing import Dict, Optional, List, Tuple, TYPE_CHECKING
+
+# spaCy itself is imported lazily: importing it (and loading the model)
+# costs seconds and hundreds of MB, which processes that never extract
+# places shouldn't pay
+if TYPE_CHECKING:
+    from spacy.language import Language
+    from spacy.tokens import Doc
+    from .gazetteer import Gazetteer
 
 logger = logging.getLogger(__name__)
 
-# Load spaCy model - use a small model for efficiency
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    logger.warning("Spacy model 'en_core_web_sm' not found. Using blank model instead.")
-    nlp = spacy.blank("en")
+# spaCy model used for named entity recognition
+NLP_MODEL = os.getenv("NLP_MODEL", "en_core_web_sm")
+
+# Set to false to skip the model entirely; extraction then only uses the
+# gazetteer and patterns over a tokenizer-only pipeline
+NLP_ENABLED = os.getenv("NLP_ENABLED", "true").lower() == "true"
+
+# Patterns for "at [Restaurant Name]" / "[Restaurant Name]'s", compiled once
+RESTAURANT_PATTERNS = [
+    re.compile(r"(?:at|from|in|visit(?:ing|ed)?|try(?:ing)?|ate at|eating at|food (?:at|from)) ([A-Z][A-Za-z'\s&]+)(?:[\.,!]|$|\sin)"),
+    re.compile(r"([A-Z][A-Za-z'\s&]+)(?:'s| restaurant| cafe| bistro| bar| grill)"),
+]
+
+_nlp = None
+_gazetteer = None
+_load_lock = threading.Lock()
+
+def disable_nlp():
+    """Skip loading the spaCy model in this process (the worker's --no-nlp)."""
+    global NLP_ENABLED
+    NLP_ENABLED = False
+
+def get_nlp() -> "Language":
+    """Load the spaCy pipeline on first use and return the shared instance."""
+    global _nlp
+    if _nlp is None:
+        with _load_lock:
+            if _nlp is None:
+                import spacy
+                if not NLP_ENABLED:
+                    _nlp = spacy.blank("en")
+                else:
+                    # Load spaCy model - use a small model for efficiency
+                    try:
+                        _nlp = spacy.load(NLP_MODEL)
+                    except OSError:
+                        logger.warning(f"Spacy model '{NLP_MODEL}' not found. Using blank model instead.")
+                        _nlp = spacy.blank("en")
+    return _nlp
+
+def get_gazetteer() -> "Gazetteer":
+    """Return the shared gazetteer of known place names and cities."""
+    global _gazetteer
+    if _gazetteer is None:
+        from .gazetteer import Gazetteer
+        nlp = get_nlp()
+        with _load_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer(nlp)
+    return _gazetteer
+
+def preload(db=None):
+    """
+    Load the pipeline (and optionally the gazetteer) before forking workers.
+    
+    The loaded objects are moved out of the garbage collector's tracked
+    generations with gc.freeze(), so collections in the children don't
+    write to their pages and the model memory stays shared copy-on-write.
+    """
+    get_nlp()
+    if db is not None:
+        refresh_gazetteer(db)
+    gc.freeze()
+
+def refresh_gazetteer(db) -> int:
+    """Add places created since the last refresh to the gazetteer."""
+    return get_gazetteer().refresh(db)
 
 def extract_place(text: str) -> Dict[str, str]:
     """
@@ -34,11 +104,14 @@ def extract_place(text: str) -> Dict[str, str]:
         return {"name": "", "hint_loc": ""}
     
     # Process the text with spaCy
-    doc = nlp(text)
+    doc = get_nlp()(text)
+    
+    # Known venues and cities from the gazetteer are the most precise signal
+    known_name, known_city = get_gazetteer().match(doc)
     
     # Try to identify restaurant names and locations
-    restaurant_name = extract_restaurant_name(doc)
-    location = extract_location(doc)
+    restaurant_name = known_name or extract_restaurant_name(doc)
+    location = extract_location(doc) or known_city
     
     # If we couldn't find a restaurant name using NER, try pattern matching
     if not restaurant_name:
@@ -49,7 +122,7 @@ def extract_place(text: str) -> Dict[str, str]:
         "hint_loc": location or ""
     }
 
-def extract_restaurant_name(doc: Doc) -> Optional[str]:
+def extract_restaurant_name(doc: "Doc") -> Optional[str]:
     """Extract potential restaurant names from spaCy doc."""
     # Look for organization entities which might be restaurant names
     orgs = [ent.text for ent in doc.ents if ent.label_ == "ORG"]
@@ -72,20 +145,14 @@ def extract_restaurant_name(doc: Doc) -> Optional[str]:
 
 def extract_restaurant_pattern(text: str) -> Optional[str]:
     """Extract restaurant names using pattern matching."""
-    # Pattern for "at [Restaurant Name]" or "from [Restaurant Name]"
-    patterns = [
-        r"(?:at|from|in|visit(?:ing|ed)?|try(?:ing)?|ate at|eating at|food (?:at|from)) ([A-Z][A-Za-z'\s&]+)(?:[\.,!]|$|\sin)",
-        r"([A-Z][A-Za-z'\s&]+)(?:'s| restaurant| cafe| bistro| bar| grill)"
-    ]
-    
-    for pattern in patterns:
-        matches = re.findall(pattern, text)
-        if matches:
-            return matches[0].strip()
+    for pattern in RESTAURANT_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match.group(1).strip()
     
     return None
 
-def extract_location(doc: Doc) -> Optional[str]:
+def extract_location(doc: "Doc") -> Optional[str]:
     """Extract location information from spaCy doc."""
     # Look for geopolitical entities (cities, countries, etc.)
     gpes = [ent.text for ent in doc.ents if ent.label_ == "GPE"]
@@ -0,0 +1,154 @@
+"""
+Shared PostgreSQL LISTEN connection for the API process.
+
+Event buses register a handler per NOTIFY channel; one dedicated
+connection, registered as a reader on the event loop, listens on all of
+them. Thousands of waiting requests or open streams therefore cost a
+single database connection per process.
+
+If the connection drops, the listener reconnects in the background with
+exponential backoff and re-issues LISTEN. Buses are told to resync both
+when the connection is lost and once it is back, since events sent in
+between are gone.
+
+Without PostgreSQL (e.g. the SQLite dev database) there is nothing to
+listen to; listening stays False and buses fall back to polling.
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.engine import Engine
+
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Backoff between reconnect attempts after the LISTEN connection drops
+LISTEN_RECONNECT_MIN_SECONDS = float(os.getenv("LISTEN_RECONNECT_MIN_SECONDS", "0.5"))
+LISTEN_RECONNECT_MAX_SECONDS = float(os.getenv("LISTEN_RECONNECT_MAX_SECONDS", "30"))
+
+
+class PgListener:
+    """Dispatch NOTIFY payloads (JSON objects) to per-channel handlers."""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+        # Called when the connection is lost and again once it is restored,
+        # so waiters and streams can re-check the database
+        self.disconnect_handlers: List[Callable[[], None]] = []
+        self.connection = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    @property
+    def listening(self) -> bool:
+        return self.connection is not None
+
+    def add_handler(self, channel: str, handler: Callable[[Dict[str, Any]], None],
+                    on_disconnect: Optional[Callable[[], None]] = None):
+        """Register the handler of a channel; takes effect on the next start()."""
+        self.handlers[channel] = handler
+        if on_disconnect:
+            self.disconnect_handlers.append(on_disconnect)
+
+    @property
+    def reconnecting(self) -> bool:
+        return self._reconnect_task is not None and not self._reconnect_task.done()
+
+    async def start(self):
+        """Open the LISTEN connection on the running loop, if not already open."""
+        if self.listening or self.reconnecting or self.engine.dialect.name != "postgresql":
+            return
+        await self._open()
+
+    async def _open(self) -> bool:
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.listening:
+                return True
+            loop = asyncio.get_running_loop()
+            try:
+                connection = await loop.run_in_executor(None, self._connect)
+            except Exception as e:
+                logger.warning(f"Could not listen for database events: {e}")
+                return False
+            loop.add_reader(connection.fileno(), self._on_readable)
+            self.connection = connection
+            return True
+
+    async def _reconnect(self):
+        delay = LISTEN_RECONNECT_MIN_SECONDS
+        while True:
+            await asyncio.sleep(delay)
+            if await self._open():
+                logger.info("Database event listener reconnected")
+                # Whatever was sent while disconnected is lost
+                self._notify_disconnect()
+                return
+            delay = min(delay * 2, LISTEN_RECONNECT_MAX_SECONDS)
+
+    def _connect(self):
+        # A dedicated driver connection, detached from the pool for good
+        pooled = self.engine.raw_connection()
+        pooled.detach()
+        connection = pooled.driver_connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            for channel in self.handlers:
+                cursor.execute(f"LISTEN {channel}")
+        return connection
+
+    def _on_readable(self):
+        try:
+            self.connection.poll()
+        except Exception as e:
+            logger.warning(f"Database event listener lost its connection: {e}")
+            self._close()
+            self._notify_disconnect()
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+            return
+        while self.connection.notifies:
+            notify = self.connection.notifies.pop(0)
+            handler = self.handlers.get(notify.channel)
+            if handler is None:
+                continue
+            try:
+                handler(json.loads(notify.payload))
+            except Exception:
+                logger.exception(f"Error handling {notify.channel} event")
+
+    def stop(self):
+        """Close the connection and stop reconnecting; the next start() reconnects."""
+        if self.reconnecting:
+            self._reconnect_task.cancel()
+        self._reconnect_task = None
+        self._close()
+        self._notify_disconnect()
+
+    def _close(self):
+        if self.connection is not None:
+            try:
+                asyncio.get_running_loop().remove_reader(self.connection.fileno())
+            except (RuntimeError, ValueError):
+                pass
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def _notify_disconnect(self):
+        for handler in self.disconnect_handlers:
+            try:
+                handler()
+            except Exception:
+                logger.exception("Error in database event listener disconnect handler")
+
+
+# One LISTEN connection per API process, shared by every event bus
+listener = PgListener(engine)
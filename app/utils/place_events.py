@@ -0,0 +1,132 @@
+"""
+In-process bus for place insert and update events.
+
+The database notifies the place_changes channel for every new place and
+every visible change to one (see migration 016_add_place_change_notify).
+The shared listener (see pg_listener) hands each event to this bus, which
+fans it out to the map streams subscribed to the place's cells, so open
+map sessions cost no queries and no extra database connections.
+
+Subscriptions are indexed by geohash cell, so an event is matched by a
+few dict lookups (one per stored precision) however many streams are open.
+Viewports too large to cover in MAX_VIEWPORT_CELLS coarse cells subscribe
+by bbox alone and are matched against each event directly instead.
+"""
+import asyncio
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from app.utils.geocell import GEOHASH_PRECISIONS
+from app.utils.pg_listener import PgListener
+
+PLACE_CHANGES_CHANNEL = "place_changes"
+
+# Events buffered per stream before it is told to resync instead
+PLACE_STREAM_MAX_QUEUED = int(os.getenv("PLACE_STREAM_MAX_QUEUED", "100"))
+
+Bbox = Tuple[float, float, float, float]
+
+
+class PlaceSubscription:
+    """One stream's interest in a set of cells, optionally narrowed to a bbox."""
+
+    def __init__(self, cells: Iterable[str], bbox: Optional[Bbox] = None,
+                 max_queued: int = PLACE_STREAM_MAX_QUEUED):
+        self.cells = set(cells)
+        self.bbox = bbox
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        # Set when events were dropped; the client should refetch its viewport
+        self.overflowed = False
+
+    def contains(self, lat: Optional[float], lng: Optional[float]) -> bool:
+        if self.bbox is None:
+            return True
+        if lat is None or lng is None:
+            return False
+        min_lng, min_lat, max_lng, max_lat = self.bbox
+        return min_lng <= lng <= max_lng and min_lat <= lat <= max_lat
+
+    def push(self, event: Dict[str, Any]):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class PlaceEventBus:
+    """Fan out place change notifications to the streams watching their cells."""
+
+    def __init__(self, listener: PgListener, channel: str = PLACE_CHANGES_CHANNEL):
+        self.listener = listener
+        self.by_cell: Dict[str, Set[PlaceSubscription]] = defaultdict(set)
+        # Subscriptions without cells, checked against every event's position
+        self.by_bbox: Set[PlaceSubscription] = set()
+        listener.add_handler(channel, self.publish, on_disconnect=self._resync_all)
+
+    @property
+    def listening(self) -> bool:
+        return self.listener.listening
+
+    async def start(self):
+        """Make sure the shared listener is running."""
+        await self.listener.start()
+
+    def _resync_all(self):
+        # Events may have been missed while disconnected
+        for subscriptions in (*self.by_cell.values(), self.by_bbox):
+            for subscription in subscriptions:
+                subscription.overflowed = True
+
+    def publish(self, event: Dict[str, Any]):
+        """
+        Deliver an event to the subscriptions watching the place's cells.
+
+        Updates are matched on both the new and the previous position, so
+        a stream also hears about places moving out of its viewport.
+        Bbox-only subscriptions are matched on position alone.
+        """
+        positions = [(event.get("geohash_8"), event.get("lat"), event.get("lng"))]
+        if event.get("old_geohash_8"):
+            positions.append((event["old_geohash_8"], event.get("old_lat"), event.get("old_lng")))
+
+        delivered = set()
+        for geohash, lat, lng in positions:
+            if not geohash:
+                continue
+            for precision in GEOHASH_PRECISIONS:
+                for subscription in self.by_cell.get(geohash[:precision], ()):
+                    if subscription not in delivered and subscription.contains(lat, lng):
+                        delivered.add(subscription)
+                        subscription.push(event)
+            for subscription in self.by_bbox:
+                if subscription not in delivered and subscription.contains(lat, lng):
+                    delivered.add(subscription)
+                    subscription.push(event)
+
+    @contextmanager
+    def subscribe(self, cells: Iterable[str], bbox: Optional[Bbox] = None):
+        """
+        Register a stream for the given cells; yields its PlaceSubscription.
+
+        With no cells the stream is matched by bbox alone, so a bbox is
+        required then.
+        """
+        subscription = PlaceSubscription(cells, bbox)
+        if not subscription.cells:
+            if bbox is None:
+                raise ValueError("A subscription without cells needs a bbox")
+            self.by_bbox.add(subscription)
+        for cell in subscription.cells:
+            self.by_cell[cell].add(subscription)
+        try:
+            yield subscription
+        finally:
+            self.by_bbox.discard(subscription)
+            for cell in subscription.cells:
+                subscriptions = self.by_cell.get(cell)
+                if subscriptions is not None:
+                    subscriptions.discard(subscription)
+                    if not subscriptions:
+                        del self.by_cell[cell]
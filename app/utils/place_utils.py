@@ -1,11 +1,24 @@
+import re
+import math
+from collections import defaultdict
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import text
-from sqlalchemy import func
-from geoalchemy2.functions import ST_DWithin, ST_Distance, ST_MakePoint
-from typing import Optional, List, Dict, Any
+from sqlalchemy import func, cast, or_
+from geoalchemy2 import Geography
+from geoalchemy2.functions import ST_DWithin, ST_Distance, ST_MakePoint, ST_MakeEnvelope
+from typing import Optional, List, Dict, Any, Iterable, Set, Tuple
 
 from models import Place
 
+# Same threshold find_nearby_duplicate uses with pg_trgm similarity()
+NAME_SIMILARITY_THRESHOLD = 0.4
+
+# Meters per degree of latitude (and of longitude at the equator)
+METERS_PER_DEGREE = 111320.0
+
+# Geography type used for meter-based distance predicates
+GEOGRAPHY = Geography(geometry_type='POINT', srid=4326)
+
 
 def find_nearby_duplicate(db: Session, lat: float, lng: float, name: str = None, distance_meters: int = 100) -> Optional[Place]:
     """
@@ -25,11 +38,19 @@ def find_nearby_duplicate(db: Session, lat: float, lng: float, name: str = None,
     # Create a PostGIS point from lat/lng
     point = func.ST_SetSRID(func.ST_MakePoint(lng, lat), 4326)
     
+    # Geography casts give meter distances; the bbox prefilter lets the GIST
+    # index on geom narrow the candidates before the exact check
+    place_geography = cast(Place.geom, GEOGRAPHY)
+    point_geography = cast(point, GEOGRAPHY)
+    lat_pad = distance_meters / METERS_PER_DEGREE
+    lng_pad = lat_pad / max(math.cos(math.radians(lat)), 0.01)
+    
     # Query for nearby places
     query = db.query(Place).filter(
+        Place.geom.intersects(ST_MakeEnvelope(lng - lng_pad, lat - lat_pad, lng + lng_pad, lat + lat_pad, 4326)),
         ST_DWithin(
-            Place.location,
-            point,
+            place_geography,
+            point_geography,
             distance_meters  # Distance in meters
         )
     )
@@ -54,7 +75,7 @@ def find_nearby_duplicate(db: Session, lat: float, lng: float, name: str = None,
     
     # If no name matches or no name provided, return the closest place
     closest_place = query.order_by(
-        ST_Distance(Place.location, point)
+        ST_Distance(place_geography, point_geography)
     ).first()
     
     return closest_place
@@ -87,3 +108,147 @@ def format_place_slug(name: str, city: str = None) -> str:
         slug = slug[:60]
         
     return slug
+
+
+def trigrams(value: str) -> Set[str]:
+    """
+    Build the trigram set of a string the way pg_trgm does: lowercase, split
+    into alphanumeric words, pad each word with two leading and one trailing
+    space.
+    """
+    grams = set()
+    for word in re.findall(r"[^\W_]+", value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Python equivalent of pg_trgm's similarity(a, b)."""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def haversine_meters(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two WGS84 points in meters."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371008.8 * math.asin(math.sqrt(a))
+
+
+class BatchDuplicateResolver:
+    """
+    Resolve nearby duplicates for a whole batch of geocoded places at once.
+    
+    Instead of up to three queries per place (see find_nearby_duplicate),
+    the existing places near any of the batch's points are loaded with a
+    single query into an in-memory grid whose cells are distance_meters
+    wide. Each lookup then only scores the places in the 3x3 block of cells
+    around the point, with the same rules as find_nearby_duplicate: exact
+    name match first, then the most similar name, then the closest place.
+    
+    Places created while the batch is persisted should be registered with
+    add(), so later links in the same batch resolve to them.
+    
+    All longitude cells share one width, wide enough for distance_meters at
+    the highest latitude indexed so far. Scaling each point by its own
+    latitude would put two nearby points on different grids, and the 3x3
+    search could miss them.
+    """
+    
+    def __init__(self, distance_meters: int = 100):
+        self.distance_meters = distance_meters
+        self.cell_degrees = distance_meters / METERS_PER_DEGREE
+        self.max_abs_lat = 0.0
+        self.lng_degrees = self.cell_degrees
+        self.cells: Dict[Tuple[int, int], List[Tuple[int, str, float, float]]] = defaultdict(list)
+    
+    def cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        """Grid cell of a point."""
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.lng_degrees))
+    
+    def cover(self, abs_lat: float):
+        """Widen the longitude cells to cover a latitude, re-bucketing the index if they change."""
+        if abs_lat <= self.max_abs_lat:
+            return
+        self.max_abs_lat = abs_lat
+        # Points matched against this one may lie up to distance_meters closer to the pole
+        self.lng_degrees = self.cell_degrees / max(math.cos(math.radians(min(abs_lat + self.cell_degrees, 89.0))), 0.01)
+        entries = [entry for bucket in self.cells.values() for entry in bucket]
+        self.cells = defaultdict(list)
+        for entry in entries:
+            self.cells[self.cell(entry[2], entry[3])].append(entry)
+    
+    def add(self, place_id: int, lat: float, lng: float, name: str):
+        """Register a place in the index."""
+        self.cover(abs(lat))
+        self.cells[self.cell(lat, lng)].append((place_id, name or "", lat, lng))
+    
+    def load(self, db: Session, points: Iterable[Tuple[float, float]]) -> int:
+        """
+        Load every existing place near the given (lat, lng) points with one query.
+        
+        Each point gets its own envelope, padded by the match distance, and
+        the envelopes are OR'ed, so the GIST index on geom only visits places
+        near the batch's points however far apart they are. Only the columns
+        the in-memory index needs are read.
+        
+        Returns:
+            The number of places loaded into the index.
+        """
+        points = set(points)
+        if not points:
+            return 0
+        # Size the grid for the whole batch up front, so add() never has to re-bucket
+        self.cover(max(abs(lat) for lat, _ in points))
+        
+        envelopes = []
+        for lat, lng in points:
+            lat_pad = self.cell_degrees
+            lng_pad = lat_pad / max(math.cos(math.radians(min(abs(lat) + lat_pad, 89.0))), 0.01)
+            envelopes.append(Place.geom.intersects(
+                ST_MakeEnvelope(lng - lng_pad, lat - lat_pad, lng + lng_pad, lat + lat_pad, 4326)
+            ))
+        
+        rows = db.query(Place.id, Place.name, Place.lat, Place.lng).filter(or_(*envelopes)).all()
+        for place_id, name, lat, lng in rows:
+            self.add(place_id, lat, lng, name)
+        return len(rows)
+    
+    def find(self, lat: float, lng: float, name: str = None) -> Optional[int]:
+        """
+        Find the id of a place that might be a duplicate of the given point.
+        
+        Returns:
+            The id of the best matching place within distance_meters, or None.
+        """
+        row, col = self.cell(lat, lng)
+        nearby = []
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                for place_id, place_name, place_lat, place_lng in self.cells.get((row + d_row, col + d_col), ()):
+                    distance = haversine_meters(lat, lng, place_lat, place_lng)
+                    if distance <= self.distance_meters:
+                        nearby.append((distance, place_id, place_name))
+        
+        if not nearby:
+            return None
+        
+        if name:
+            lowered = name.lower()
+            # First check exact name match
+            for distance, place_id, place_name in nearby:
+                if place_name.lower() == lowered:
+                    return place_id
+            
+            # Then check for similarity in the name
+            best_score, best_id = max(
+                (trigram_similarity(place_name, name), place_id) for _, place_id, place_name in nearby
+            )
+            if best_score > NAME_SIMILARITY_THRESHOLD:
+                return best_id
+        
+        # If no name matches or no name provided, return the closest place
+        return min(nearby)[1]
@@ -0,0 +1,153 @@
+"""
+Sampling profiler for slow requests and worker batches.
+
+With PROFILING=true, a share of requests (PROFILE_SAMPLE_RATE) and every
+worker batch run under pyinstrument, a statistical profiler that samples
+the stack every PROFILE_INTERVAL_MS instead of tracing every call. Only
+runs slower than PROFILE_THRESHOLD_MS are kept: they are written to
+PROFILE_DIR as speedscope flame graphs (open them at speedscope.app), and
+only the newest PROFILE_KEEP files are retained.
+
+pyinstrument is imported lazily, so it is only needed when profiling is on.
+This module has no database or model imports so both the API and the
+worker can use it.
+"""
+import logging
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Profile requests and worker batches
+PROFILING = os.getenv("PROFILING", "false").lower() == "true"
+
+# Share of requests profiled while profiling is on; worker batches are always profiled
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.1"))
+
+# Profiles of runs faster than this are discarded
+PROFILE_THRESHOLD_MS = int(os.getenv("PROFILE_THRESHOLD_MS", "500"))
+
+# Sampling interval of the profiler
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+
+# Where kept profiles are written, and how many of the newest are retained
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/bitemap-profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "100"))
+
+PROFILE_SUFFIX = ".speedscope.json"
+
+# kind-name-duration; names are reduced to these characters
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.]+")
+_PROFILE_NAME = re.compile(r"^(\d{8}T\d{6}\d{6})-(\w+)-([A-Za-z0-9_.]+)-(\d+)ms" + re.escape(PROFILE_SUFFIX) + "$")
+
+
+def start_profiler(async_mode: str = "disabled"):
+    """Start a pyinstrument profiler on the current thread."""
+    from pyinstrument import Profiler
+
+    profiler = Profiler(interval=PROFILE_INTERVAL_MS / 1000, async_mode=async_mode)
+    profiler.start()
+    return profiler
+
+
+def save_profile(profiler, kind: str, name: str, duration_ms: float) -> Optional[str]:
+    """
+    Keep a stopped profiler's session if the run was slow enough.
+
+    Args:
+        profiler: A stopped pyinstrument Profiler
+        kind: "request" or "worker"
+        name: What ran, e.g. "GET /api/places" or "process_queued_links"
+        duration_ms: Wall time of the run
+
+    Returns:
+        The file name of the kept profile, or None if it was discarded.
+    """
+    if duration_ms < PROFILE_THRESHOLD_MS:
+        return None
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    safe_name = _UNSAFE.sub("_", name).strip("_")[:80] or "run"
+    file_name = f"{stamp}-{kind}-{safe_name}-{int(duration_ms)}ms{PROFILE_SUFFIX}"
+    with open(os.path.join(PROFILE_DIR, file_name), "w") as f:
+        f.write(profiler.output(renderer=SpeedscopeRenderer()))
+    logger.info(f"Kept profile {file_name}")
+
+    prune_profiles()
+    return file_name
+
+
+def prune_profiles(keep: int = PROFILE_KEEP):
+    """Delete all but the newest keep profiles."""
+    for profile in list_profiles()[keep:]:
+        try:
+            os.remove(os.path.join(PROFILE_DIR, profile["name"]))
+        except FileNotFoundError:
+            pass
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """List kept profiles, newest first."""
+    try:
+        file_names = os.listdir(PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+
+    profiles = []
+    for file_name in file_names:
+        match = _PROFILE_NAME.match(file_name)
+        if not match:
+            continue
+        stamp, kind, name, duration_ms = match.groups()
+        profiles.append({
+            "name": file_name,
+            "kind": kind,
+            "target": name,
+            "duration_ms": int(duration_ms),
+            "created_at": datetime.strptime(stamp, "%Y%m%dT%H%M%S%f").replace(tzinfo=timezone.utc),
+            "size": os.path.getsize(os.path.join(PROFILE_DIR, file_name)),
+        })
+    profiles.sort(key=lambda profile: profile["name"], reverse=True)
+    return profiles
+
+
+def profile_path(file_name: str) -> Optional[str]:
+    """Resolve a kept profile's path by file name, refusing anything else."""
+    if not _PROFILE_NAME.match(file_name):
+        return None
+    path = os.path.join(PROFILE_DIR, file_name)
+    return path if os.path.isfile(path) else None
+
+
+@contextmanager
+def profiled(kind: str, name: str):
+    """
+    Profile a synchronous block when profiling is on, keeping slow runs.
+
+    Usable as a decorator as well as a with statement.
+    """
+    if not PROFILING:
+        yield
+        return
+    profiler = start_profiler()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        try:
+            save_profile(profiler, kind, name, (time.perf_counter() - start) * 1000)
+        except Exception:
+            logger.exception("Could not save profile")
+
+
+def sample_request() -> bool:
+    """Whether to profile the next request."""
+    return PROFILING and random.random() < PROFILE_SAMPLE_RATE
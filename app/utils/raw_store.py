@@ -0,0 +1,86 @@
+import json
+import hashlib
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import zstandard
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+
+from models import RawPayload, Source
+
+logger = logging.getLogger(__name__)
+
+# zstd level 3 is the library default and a good speed/ratio trade-off for JSON
+ZSTD_LEVEL = 3
+
+_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+_decompressor = zstandard.ZstdDecompressor()
+
+
+def encode_payload(payload: Dict[str, Any]) -> Tuple[str, bytes, int]:
+    """
+    Serialize and compress a raw payload.
+
+    The payload is serialized as canonical JSON (sorted keys, no whitespace)
+    so that equal payloads always hash to the same address.
+
+    Args:
+        payload: The raw extractor payload
+
+    Returns:
+        A tuple of (sha256 hex digest, compressed bytes, uncompressed size).
+    """
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest(), _compressor.compress(raw), len(raw)
+
+
+def decode_payload(data: bytes) -> Dict[str, Any]:
+    """Decompress and deserialize a payload produced by encode_payload."""
+    return json.loads(_decompressor.decompress(data))
+
+
+def put_payload(db: Session, payload: Dict[str, Any]) -> str:
+    """
+    Store a raw payload, deduplicated by content hash.
+
+    The insert joins the caller's transaction and is a no-op if the same
+    payload is already stored.
+
+    Args:
+        db: Database session
+        payload: The raw extractor payload
+
+    Returns:
+        The content hash to store on the source row.
+    """
+    payload_hash, data, size = encode_payload(payload)
+    stmt = insert(RawPayload).values(
+        hash=payload_hash,
+        codec="zstd",
+        size=size,
+        data=data,
+    ).on_conflict_do_nothing(index_elements=["hash"])
+    db.execute(stmt)
+    return payload_hash
+
+
+def get_payload(db: Session, payload_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a raw payload by its content hash.
+
+    Returns:
+        The decoded payload, or None if no payload is stored under the hash.
+    """
+    data = db.query(RawPayload.data).filter(RawPayload.hash == payload_hash).scalar()
+    if data is None:
+        logger.warning(f"Raw payload {payload_hash} not found")
+        return None
+    return decode_payload(data)
+
+
+def load_source_payload(db: Session, source: Source) -> Optional[Dict[str, Any]]:
+    """Lazily load the raw payload referenced by a source, if it has one."""
+    if not source.raw_data_hash:
+        return None
+    return get_payload(db, source.raw_data_hash)
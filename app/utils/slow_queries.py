@@ -0,0 +1,223 @@
+"""
+Opt-in slow-query log with plans attached.
+
+Statements slower than a threshold are handed to a background thread,
+which runs EXPLAIN on a separate connection and writes the statement, its
+parameters, duration and plan to the slow_queries table. The hot path only
+times statements and, for slow ones, enqueues them without blocking.
+
+Plain SELECTs are explained with ANALYZE and BUFFERS, which runs them
+again, so each query shape is explained at most once per
+SLOW_QUERY_EXPLAIN_INTERVAL seconds; later occurrences are recorded
+without a plan. Writes and locking SELECTs (FOR UPDATE, FOR SHARE, ...)
+are explained without ANALYZE, since running them again would repeat
+their side effects or take row locks. EXPLAIN always runs in a
+transaction that is rolled back.
+
+The table is capped at SLOW_QUERY_MAX_ROWS: every SLOW_QUERY_PRUNE_EVERY
+records the writer thread deletes all but the newest rows, so a hot slow
+path can't grow it without bound.
+
+Only the slow_queries table is referenced (not a model), so this module
+can be installed from app/database.py by both the API and the worker.
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import column, delete, event, func, select, table
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERIES = table(
+    "slow_queries",
+    column("id"),
+    column("fingerprint"),
+    column("statement"),
+    column("parameters"),
+    column("duration_ms"),
+    column("plan"),
+)
+
+# Minimum seconds between two EXPLAINs of the same query shape
+SLOW_QUERY_EXPLAIN_INTERVAL = int(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+
+# Slow statements waiting for the writer thread; more are dropped
+SLOW_QUERY_MAX_PENDING = 100
+
+# Rows kept in slow_queries, and how many records the writer thread makes between prunes
+SLOW_QUERY_MAX_ROWS = int(os.getenv("SLOW_QUERY_MAX_ROWS", "10000"))
+SLOW_QUERY_PRUNE_EVERY = int(os.getenv("SLOW_QUERY_PRUNE_EVERY", "100"))
+
+# Marks the log's own connections so their statements are not logged
+INTERNAL_CONNECTION = "slow_query_log"
+
+# Named :params, but not the type in a ::type cast
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|\?|(?<!:):\w+")
+_LOCKING_CLAUSE = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b", re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> Tuple[str, str]:
+    """
+    Normalize a statement to its shape and hash it.
+
+    Placeholders and literals become ?, lists of them (IN lists, VALUES rows)
+    collapse to (...), and whitespace is squeezed, so the same query with
+    different parameters or list lengths shares a fingerprint.
+
+    Returns:
+        A tuple of (16-character fingerprint, normalized statement).
+    """
+    normalized = _PLACEHOLDER.sub("?", statement)
+    normalized = _LITERAL.sub("?", normalized)
+    normalized = _VALUE_LIST.sub("(...)", normalized)
+    normalized = _WHITESPACE.sub(" ", normalized).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16], normalized
+
+
+def can_analyze(statement: str) -> bool:
+    """Whether running a statement again for EXPLAIN ANALYZE is harmless: a SELECT without a locking clause."""
+    return statement.lstrip()[:6].upper() == "SELECT" and not _LOCKING_CLAUSE.search(statement)
+
+
+class SlowQueryLog:
+    """Detect slow statements on an engine and log them with their plans."""
+
+    def __init__(self, engine: Engine, threshold_ms: float,
+                 explain_interval: float = SLOW_QUERY_EXPLAIN_INTERVAL,
+                 max_pending: int = SLOW_QUERY_MAX_PENDING,
+                 max_rows: int = SLOW_QUERY_MAX_ROWS,
+                 prune_every: int = SLOW_QUERY_PRUNE_EVERY):
+        self.engine = engine
+        self.threshold_ms = threshold_ms
+        self.explain_interval = explain_interval
+        self.pending: queue.Queue = queue.Queue(maxsize=max_pending)
+        self.dropped = 0
+        self.max_rows = max_rows
+        self.prune_every = max(prune_every, 1)
+        # Records written by this process; only used by the writer thread
+        self.recorded = 0
+        # Fingerprint -> time of its last EXPLAIN; only used by the writer thread
+        self.last_explained: Dict[str, float] = {}
+        self.thread: Optional[threading.Thread] = None
+        self.thread_pid: Optional[int] = None
+
+    def install(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(self.engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not conn.info.get(INTERNAL_CONNECTION):
+            conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if conn.info.get(INTERNAL_CONNECTION) or not starts:
+            return
+        duration_ms = (time.perf_counter() - starts.pop()) * 1000
+        if duration_ms >= self.threshold_ms:
+            # executemany batches have no single parameter set to explain with
+            self.submit(statement, None if executemany else parameters, duration_ms)
+
+    def submit(self, statement: str, parameters: Any, duration_ms: float):
+        """Queue a slow statement for the writer thread without blocking."""
+        self._ensure_thread()
+        try:
+            self.pending.put_nowait((statement, parameters, duration_ms))
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self):
+        # Threads do not survive a fork, so forked worker processes start their own
+        if self.thread is None or self.thread_pid != os.getpid() or not self.thread.is_alive():
+            self.thread_pid = os.getpid()
+            self.thread = threading.Thread(target=self._run, name="slow-query-log", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            statement, parameters, duration_ms = self.pending.get()
+            try:
+                self.record(statement, parameters, duration_ms)
+            except Exception:
+                logger.exception("Could not record slow query")
+            finally:
+                self.pending.task_done()
+
+    def drain(self):
+        """Wait until every queued slow statement has been recorded."""
+        self.pending.join()
+
+    def record(self, statement: str, parameters: Any, duration_ms: float):
+        """Explain a slow statement if due and write it to the slow_queries table."""
+        query_fingerprint, _ = fingerprint(statement)
+        with self.engine.connect() as conn:
+            conn.info[INTERNAL_CONNECTION] = True
+            try:
+                plan = None
+                now = time.monotonic()
+                last = self.last_explained.get(query_fingerprint)
+                if parameters is not None and (last is None or now - last >= self.explain_interval):
+                    self.last_explained[query_fingerprint] = now
+                    plan = self.explain(conn, statement, parameters)
+
+                conn.execute(SLOW_QUERIES.insert().values(
+                    fingerprint=query_fingerprint,
+                    statement=statement,
+                    parameters=json.dumps(parameters, default=str),
+                    duration_ms=duration_ms,
+                    plan=plan,
+                ))
+                self.recorded += 1
+                # Prune on the first record too, so a restarted process trims what it inherits
+                if (self.recorded - 1) % self.prune_every == 0:
+                    self.prune(conn)
+                conn.commit()
+            finally:
+                conn.info.pop(INTERNAL_CONNECTION, None)
+        logger.warning(f"Slow query {query_fingerprint} took {duration_ms:.0f} ms")
+
+    def prune(self, conn) -> int:
+        """
+        Delete all but the newest max_rows slow queries, in the caller's transaction.
+
+        Ids only grow, so the cutoff is a primary key range and needs no sort.
+
+        Returns:
+            The number of rows deleted.
+        """
+        newest = select(func.max(SLOW_QUERIES.c.id)).scalar_subquery()
+        result = conn.execute(delete(SLOW_QUERIES).where(SLOW_QUERIES.c.id <= newest - self.max_rows))
+        if result.rowcount:
+            logger.info(f"Pruned {result.rowcount} old slow queries")
+        return result.rowcount
+
+    def explain(self, conn, statement: str, parameters: Any) -> Optional[str]:
+        """
+        EXPLAIN a statement with its original parameters.
+
+        Returns:
+            The plan as JSON text, or None if the database cannot explain it.
+        """
+        if self.engine.dialect.name != "postgresql":
+            return None
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if can_analyze(statement) else "FORMAT JSON"
+        transaction = conn.begin()
+        try:
+            plan = conn.exec_driver_sql(f"EXPLAIN ({options}) {statement}", parameters).scalar()
+        except Exception as e:
+            logger.info(f"Could not explain slow query: {e}")
+            plan = None
+        finally:
+            transaction.rollback()
+        return json.dumps(plan) if plan is not None else None
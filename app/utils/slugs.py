@@ -0,0 +1,78 @@
+"""
+Unique slug allocation for places.
+
+Slugs are allocated set-wise: one query fetches every existing slug that a
+batch of base slugs could collide with, and numeric suffixes (-2, -3, ...)
+are then assigned in memory, so bulk imports never hit the unique index on
+places.slug and never retry row by row.
+
+Only the places table is referenced (not the Place model), so this module
+can be used from model events, the API and the worker alike.
+"""
+import re
+from typing import Dict, Iterable, List, Set, Union
+
+from sqlalchemy import column, or_, select, table
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+PLACES = table("places", column("slug"))
+
+
+def taken_slugs(db: Union[Session, Connection], bases: Iterable[str]) -> Set[str]:
+    """
+    Fetch the existing slugs that collide with any of the base slugs.
+
+    A slug collides with a base if it is the base itself or the base
+    followed by a numeric suffix. The LIKE prefix is answered by the
+    text_pattern_ops index on places.slug, and the regex then drops longer
+    slugs that merely share the prefix ("pizza-hut-3" for "pizza").
+    """
+    bases = sorted(set(bases))
+    if not bases:
+        return set()
+    stmt = select(PLACES.c.slug).where(
+        or_(
+            PLACES.c.slug.in_(bases),
+            *[
+                PLACES.c.slug.like(f"{base}-%") & PLACES.c.slug.regexp_match(f"^{re.escape(base)}-[0-9]+$")
+                for base in bases
+            ],
+        )
+    )
+    return set(db.execute(stmt).scalars())
+
+
+def allocate_slugs(db: Union[Session, Connection], bases: List[str]) -> List[str]:
+    """
+    Allocate a unique slug for each base slug with a single query.
+
+    The first free candidate of base, base-2, base-3, ... is used, counting
+    both existing places and slugs allocated earlier in the same call, so a
+    batch containing the same base twice gets two different slugs.
+
+    Args:
+        db: Session or connection used to read existing slugs
+        bases: Desired slugs, one per new place
+
+    Returns:
+        The allocated slugs, in the order of bases.
+    """
+    taken = taken_slugs(db, bases)
+
+    # Next suffix to try per base, starting past the highest suffix in use
+    next_suffix: Dict[str, int] = {}
+    for base in set(bases):
+        suffix_pattern = re.compile(rf"^{re.escape(base)}-(\d+)$")
+        suffixes = [int(match.group(1)) for match in map(suffix_pattern.match, taken) if match]
+        next_suffix[base] = max(suffixes, default=1) + 1
+
+    slugs = []
+    for base in bases:
+        slug = base
+        while slug in taken:
+            slug = f"{base}-{next_suffix[base]}"
+            next_suffix[base] += 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
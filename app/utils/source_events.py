@@ -0,0 +1,89 @@
+"""
+In-process bus for source completion events.
+
+The database notifies the source_status channel whenever a source
+finishes (see migration 015_add_source_status_notify). The shared
+listener (see pg_listener) wakes the requests waiting on that source, so
+long-polling clients cost no queries while they wait.
+
+Without a listener, waits fall back to sleeping for a short interval.
+"""
+import asyncio
+import os
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Set
+
+from app.utils.pg_listener import PgListener
+
+SOURCE_STATUS_CHANNEL = "source_status"
+
+# Seconds between re-checks when no listener is available
+FALLBACK_POLL_SECONDS = float(os.getenv("SOURCE_EVENTS_FALLBACK_POLL_SECONDS", "1"))
+
+
+class SourceEventBus:
+    """
+    Fan out source status notifications to waiting requests.
+
+    Waiters subscribe before reading the source's status, so a source that
+    finishes between the read and the wait still wakes them.
+    """
+
+    def __init__(self, listener: PgListener, channel: str = SOURCE_STATUS_CHANNEL):
+        self.listener = listener
+        self.waiters: Dict[int, Set[asyncio.Future]] = defaultdict(set)
+        listener.add_handler(channel, self._on_event, on_disconnect=self._wake_all)
+
+    @property
+    def listening(self) -> bool:
+        return self.listener.listening
+
+    async def start(self):
+        """Make sure the shared listener is running."""
+        await self.listener.start()
+
+    def _on_event(self, event: Dict[str, Any]):
+        self.publish(event["id"], event.get("status"))
+
+    def _wake_all(self):
+        # Events may have been missed; every waiter re-checks the database
+        for source_id in list(self.waiters):
+            self.publish(source_id, None)
+
+    def publish(self, source_id: int, status: Optional[str]):
+        """Wake the waiters of a source."""
+        for future in self.waiters.pop(source_id, ()):
+            if not future.done():
+                future.set_result(status)
+
+    @contextmanager
+    def subscribe(self, source_id: int):
+        """Register interest in a source; yields a future resolved with its new status."""
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[source_id].add(future)
+        try:
+            yield future
+        finally:
+            waiters = self.waiters.get(source_id)
+            if waiters is not None:
+                waiters.discard(future)
+                if not waiters:
+                    del self.waiters[source_id]
+
+    async def wait(self, future: asyncio.Future, timeout: float) -> bool:
+        """
+        Wait for a subscribed future, up to timeout seconds.
+
+        Returns:
+            True if an event arrived, False on timeout. Without a listener
+            this returns False after at most FALLBACK_POLL_SECONDS, so
+            callers should re-check and wait again while time remains.
+        """
+        if not self.listening:
+            timeout = min(timeout, FALLBACK_POLL_SECONDS)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
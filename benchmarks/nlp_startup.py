@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Benchmark startup time and memory of the place extractor's spaCy pipeline.
+
+Reports, each in a fresh interpreter:
+
+- import: importing utils.nlp.place_extractor (spaCy is loaded lazily, so
+  this should cost almost nothing)
+- first extract: the first extract_place call, which loads the model
+- no-nlp: the first extract_place call with the model disabled (--no-nlp)
+
+It then forks N worker-like children, either loading the model in each
+child or preloading it once in the parent (the worker's --preload), and
+sums their proportional set size (PSS). Pages shared copy-on-write are
+split between the processes that map them, so preloading shows up as a
+lower total. PSS needs Linux (/proc/<pid>/smaps_rollup).
+
+Usage:
+    python benchmarks/nlp_startup.py [--children 4]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+TEXT = "Lining up at 6am for the brisket at Franklin Barbecue in Austin, Texas!"
+
+
+def memory_kb(pid="self"):
+    """Return (rss, pss) in kB for a process, from /proc."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0])
+    return values.get("Rss", 0), values.get("Pss", 0)
+
+
+def measure_startup(no_nlp):
+    """Run in a child interpreter: time the import and the first extraction."""
+    sys.path.insert(0, APP_DIR)
+    start = time.perf_counter()
+    from utils.nlp import place_extractor
+    imported = time.perf_counter()
+    import_rss, _ = memory_kb()
+    if no_nlp:
+        place_extractor.disable_nlp()
+    place_extractor.extract_place(TEXT)
+    extracted = time.perf_counter()
+    extract_rss, _ = memory_kb()
+    print(json.dumps({
+        "import_s": imported - start,
+        "import_rss_mb": import_rss / 1024,
+        "extract_s": extracted - imported,
+        "extract_rss_mb": extract_rss / 1024,
+    }))
+
+
+def measure_fork(children, preload):
+    """Run in a child interpreter: fork workers and sum their memory."""
+    sys.path.insert(0, APP_DIR)
+    from utils.nlp import place_extractor
+    if preload:
+        place_extractor.preload()
+
+    pids = []
+    ready_r, ready_w = os.pipe()
+    for _ in range(children):
+        pid = os.fork()
+        if pid == 0:
+            place_extractor.extract_place(TEXT)
+            os.write(ready_w, b".")
+            time.sleep(60)
+            os._exit(0)
+        pids.append(pid)
+
+    # Wait until every child has loaded what it needs
+    received = 0
+    while received < children:
+        received += len(os.read(ready_r, children))
+
+    totals = [memory_kb(pid) for pid in pids]
+    for pid in pids:
+        os.kill(pid, 9)
+        os.waitpid(pid, 0)
+    print(json.dumps({
+        "rss_mb": sum(rss for rss, _ in totals) / 1024,
+        "pss_mb": sum(pss for _, pss in totals) / 1024,
+    }))
+
+
+def run(*args):
+    """Run this script in a fresh interpreter and parse its JSON output."""
+    output = subprocess.check_output([sys.executable, __file__, *args])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark NLP startup time and memory")
+    parser.add_argument("--children", type=int, default=4)
+    parser.add_argument("--measure", choices=["startup", "startup-no-nlp", "fork", "fork-preload"],
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure == "startup":
+        measure_startup(no_nlp=False)
+    elif args.measure == "startup-no-nlp":
+        measure_startup(no_nlp=True)
+    elif args.measure in ("fork", "fork-preload"):
+        measure_fork(args.children, preload=args.measure == "fork-preload")
+    else:
+        model = os.getenv("NLP_MODEL", "en_core_web_sm")
+        print(f"Model: {model}")
+        for label, measure in (("with model", "startup"), ("--no-nlp", "startup-no-nlp")):
+            result = run("--measure", measure)
+            print(f"{label:>10}: import {result['import_s'] * 1000:7.1f} ms ({result['import_rss_mb']:6.1f} MB RSS), "
+                  f"first extract {result['extract_s'] * 1000:7.1f} ms ({result['extract_rss_mb']:6.1f} MB RSS)")
+        for label, measure in (("per-child load", "fork"), ("preload", "fork-preload")):
+            result = run("--children", str(args.children), "--measure", measure)
+            print(f"{label:>15}: {args.children} children, {result['rss_mb']:7.1f} MB RSS, "
+                  f"{result['pss_mb']:7.1f} MB PSS total")
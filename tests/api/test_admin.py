@@ -0,0 +1,60 @@
+import os
+import sys
+from unittest import mock
+
+from fastapi import status
+from fastapi.testclient import TestClient
+
+# Add app to sys path if needed
+project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+app_dir = os.path.join(project_dir, 'app')
+sys.path.insert(0, project_dir)
+sys.path.insert(0, app_dir)
+
+from app.main import app
+from app.database import get_db
+from app.core.auth import get_current_user
+
+
+def get_test_client():
+    """Get a fresh test client for each test"""
+    return TestClient(app)
+
+
+def test_slow_queries_require_a_superuser():
+    """Test that the admin endpoints refuse regular users."""
+    app.dependency_overrides[get_db] = lambda: mock.MagicMock()
+    app.dependency_overrides[get_current_user] = lambda: mock.MagicMock(is_superuser=False)
+    try:
+        response = get_test_client().get("/api/admin/slow-queries")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_slow_queries_empty_log():
+    """Test that an empty slow-query log lists no query shapes."""
+    mock_db = mock.MagicMock()
+    mock_db.query.return_value.filter.return_value.group_by.return_value.order_by.return_value.limit.return_value.all.return_value = []
+    app.dependency_overrides[get_db] = lambda: mock_db
+    app.dependency_overrides[get_current_user] = lambda: mock.MagicMock(is_superuser=True)
+    try:
+        response = get_test_client().get("/api/admin/slow-queries?limit=5")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"items": []}
+
+
+def test_download_unknown_profile():
+    """Test that only kept profiles can be downloaded."""
+    app.dependency_overrides[get_db] = lambda: mock.MagicMock()
+    app.dependency_overrides[get_current_user] = lambda: mock.MagicMock(is_superuser=True)
+    try:
+        response = get_test_client().get("/api/admin/profiles/passwd")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,84 @@
+import pytest
+from fastapi import status
+
+from app.core.auth import create_access_token
+from app.models import UserFavorite
+from tests.factories import PlaceFactory, UserFactory
+
+
+@pytest.fixture(autouse=True)
+def factory_session(test_db):
+    """Bind the factories to the test session."""
+    UserFactory._meta.sqlalchemy_session = test_db
+    PlaceFactory._meta.sqlalchemy_session = test_db
+
+
+def auth_headers(user):
+    """Build an Authorization header for the given user."""
+    token = create_access_token(data={"sub": user.username})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.timeout(120)
+def test_add_and_list_favorites(client, test_db):
+    """Test that favorites are listed newest first as GeoJSON features."""
+    user = UserFactory()
+    first = PlaceFactory(name="Joe's Pizza")
+    second = PlaceFactory(name="Shake Shack")
+    headers = auth_headers(user)
+
+    assert client.post(f"/api/places/me/favorites/{first.id}", headers=headers).status_code == status.HTTP_201_CREATED
+    assert client.post(f"/api/places/me/favorites/{second.id}", headers=headers).status_code == status.HTTP_201_CREATED
+    # Adding the same favorite twice is a no-op
+    assert client.post(f"/api/places/me/favorites/{first.id}", headers=headers).status_code == status.HTTP_201_CREATED
+
+    response = client.get("/api/places/me/favorites", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["type"] == "FeatureCollection"
+    assert [f["properties"]["name"] for f in data["features"]] == ["Shake Shack", "Joe's Pizza"]
+    assert data["features"][0]["geometry"]["type"] == "Point"
+    assert data["metadata"]["next"] is None
+
+
+@pytest.mark.timeout(120)
+def test_favorites_keyset_pagination(client, test_db):
+    """Test that favorites pages chain through metadata.next."""
+    user = UserFactory()
+    headers = auth_headers(user)
+    for _ in range(5):
+        place = PlaceFactory()
+        client.post(f"/api/places/me/favorites/{place.id}", headers=headers)
+
+    page1 = client.get("/api/places/me/favorites?per_page=3", headers=headers).json()
+    assert len(page1["features"]) == 3
+    assert page1["metadata"]["next"] is not None
+
+    page2 = client.get(f"/api/places/me/favorites?per_page=3&after_id={page1['metadata']['next']}", headers=headers).json()
+    assert len(page2["features"]) == 2
+    assert page2["metadata"]["next"] is None
+
+    ids = [f["properties"]["id"] for f in page1["features"] + page2["features"]]
+    assert len(set(ids)) == 5
+
+
+@pytest.mark.timeout(120)
+def test_remove_favorite(client, test_db):
+    """Test removing a favorite, and that removing it again is a 404."""
+    user = UserFactory()
+    place = PlaceFactory()
+    headers = auth_headers(user)
+    client.post(f"/api/places/me/favorites/{place.id}", headers=headers)
+
+    assert client.delete(f"/api/places/me/favorites/{place.id}", headers=headers).status_code == status.HTTP_204_NO_CONTENT
+    assert test_db.query(UserFavorite).filter(UserFavorite.user_id == user.id).count() == 0
+    assert client.delete(f"/api/places/me/favorites/{place.id}", headers=headers).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.timeout(120)
+def test_add_favorite_unknown_place(client, test_db):
+    """Test that favoriting a missing place is a 404."""
+    user = UserFactory()
+
+    response = client.post("/api/places/me/favorites/999999", headers=auth_headers(user))
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,168 @@
+import os
+import sys
+from unittest import mock
+
+from fastapi import status
+from fastapi.testclient import TestClient
+
+# Add app to sys path if needed
+project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+app_dir = os.path.join(project_dir, 'app')
+sys.path.insert(0, project_dir)
+sys.path.insert(0, app_dir)
+
+from app.main import app
+from app.database import get_db
+
+
+def get_test_client():
+    """Get a fresh test client for each test"""
+    return TestClient(app)
+
+
+def mock_queue_depth(depth, client_depth=0):
+    """Build a mocked session whose lane depth lookup returns depth and client backlog count client_depth."""
+    mock_db = mock.MagicMock()
+    mock_db.query.return_value.filter.return_value.scalar.return_value = depth
+    mock_db.query.return_value.filter.return_value.limit.return_value.count.return_value = client_depth
+    return mock_db
+
+
+def test_ingest_link_refused_when_lane_is_full():
+    """Test that a full lane sheds new links with a 429 and Retry-After."""
+    mock_db = mock_queue_depth(1000)
+    app.dependency_overrides[get_db] = lambda: mock_db
+    try:
+        with mock.patch.dict("app.api.endpoints.ingest.INGEST_MAX_QUEUE_DEPTH", {"interactive": 1000}):
+            response = get_test_client().post(
+                "/api/ingest/link?run_worker=false", json={"url": "https://www.tiktok.com/@joe/video/1"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["Retry-After"] == "60"
+    mock_db.add.assert_not_called()
+
+
+def test_ingest_link_client_limit_overrides_lane_limit():
+    """Test that a client with its own limit is held to its own backlog, not the lane total."""
+    mock_db = mock_queue_depth(1500, client_depth=10)
+    app.dependency_overrides[get_db] = lambda: mock_db
+    try:
+        with mock.patch.dict("app.api.endpoints.ingest.INGEST_MAX_QUEUE_DEPTH", {"bulk": 1000}), \
+             mock.patch.dict("app.api.endpoints.ingest.INGEST_CLIENT_MAX_QUEUE_DEPTH", {"testclient": 5000}):
+            response = get_test_client().post(
+                "/api/ingest/link?run_worker=false",
+                json={"url": "https://www.tiktok.com/@joe/video/1", "lane": "bulk"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_200_OK
+    source = mock_db.add.call_args.args[0]
+    assert source.priority == 10
+    assert source.client_key == "testclient"
+
+
+def test_ingest_link_sheds_client_over_its_own_limit():
+    """Test that a noisy client is refused while the lane itself still has room."""
+    mock_db = mock_queue_depth(10, client_depth=100)
+    app.dependency_overrides[get_db] = lambda: mock_db
+    try:
+        with mock.patch.dict("app.api.endpoints.ingest.INGEST_MAX_QUEUE_DEPTH", {"interactive": 1000}), \
+             mock.patch.dict("app.api.endpoints.ingest.INGEST_CLIENT_MAX_QUEUE_DEPTH", {"testclient": 100}):
+            response = get_test_client().post(
+                "/api/ingest/link?run_worker=false", json={"url": "https://www.tiktok.com/@joe/video/1"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.json()["detail"].startswith("Your interactive ingest queue is full")
+    mock_db.query.return_value.filter.return_value.limit.assert_called_with(100)
+    mock_db.add.assert_not_called()
+
+
+def test_ingest_collection_already_expanding_is_not_rescheduled():
+    """Test that re-ingesting a collection mid-expansion doesn't start a second expansion."""
+    mock_db = mock_queue_depth(0)
+    collection = mock.MagicMock(id=7, url="https://www.youtube.com/@joe", platform="youtube",
+                                kind="channel", status="expanding")
+    app.dependency_overrides[get_db] = lambda: mock_db
+    try:
+        with mock.patch("app.api.endpoints.ingest.get_or_create_collection", return_value=collection), \
+             mock.patch("app.api.endpoints.ingest.claim_collection", return_value=False) as mock_claim, \
+             mock.patch("app.api.endpoints.ingest.run_collection_expansion") as mock_expand:
+            response = get_test_client().post(
+                "/api/ingest/link?run_worker=false", json={"url": "https://www.youtube.com/@joe"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["collection_id"] == 7
+    assert response.json()["message"] == "Channel is already being expanded"
+    mock_claim.assert_called_once_with(mock_db, 7)
+    mock_expand.assert_not_called()
+
+
+def test_sync_collection_conflicts_when_claim_is_held():
+    """Test that sync refuses a collection another expansion has claimed."""
+    mock_db = mock_queue_depth(0)
+    app.dependency_overrides[get_db] = lambda: mock_db
+    try:
+        with mock.patch("app.api.endpoints.ingest.claim_collection", return_value=False), \
+             mock.patch("app.api.endpoints.ingest.run_collection_expansion") as mock_expand:
+            response = get_test_client().post("/api/ingest/collection/7/sync?run_worker=false")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_409_CONFLICT
+    mock_expand.assert_not_called()
+
+
+def test_run_collection_expansion_records_failures():
+    """Test that a failed background expansion is logged and recorded on the collection."""
+    from app.api.endpoints.ingest import run_collection_expansion
+
+    mock_db = mock.MagicMock()
+    with mock.patch("app.api.endpoints.ingest.SessionLocal", return_value=mock_db), \
+         mock.patch("app.api.endpoints.ingest.expand_collection", side_effect=RuntimeError("boom")), \
+         mock.patch("app.api.endpoints.ingest.release_collection") as mock_release, \
+         mock.patch("app.api.endpoints.ingest.run_worker_process") as mock_worker:
+        run_collection_expansion(7)
+
+    mock_release.assert_called_once_with(mock_db, 7, "boom")
+    mock_worker.assert_not_called()
+    mock_db.close.assert_called_once()
+
+
+def test_wait_for_link_returns_once_processed():
+    """Test that the long-poll re-checks the link until it has finished."""
+    mock_db = mock.MagicMock()
+    pending = {"id": 1, "status": "processing", "last_error": None, "place": None}
+    processed = {"id": 1, "status": "processed", "last_error": None, "place": None}
+    app.dependency_overrides[get_db] = lambda: mock_db
+    try:
+        with mock.patch("app.api.endpoints.ingest.link_status", side_effect=[pending, processed]) as mock_status, \
+             mock.patch("app.utils.source_events.FALLBACK_POLL_SECONDS", 0.01):
+            response = get_test_client().get("/api/ingest/link/1/wait?timeout=5")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "processed"
+    assert mock_status.call_count == 2
+
+
+def test_wait_for_link_unknown_source():
+    """Test that waiting on a missing link is a 404."""
+    app.dependency_overrides[get_db] = lambda: mock.MagicMock()
+    try:
+        with mock.patch("app.api.endpoints.ingest.link_status", return_value=None):
+            response = get_test_client().get("/api/ingest/link/99/wait?timeout=1")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -175,3 +175,218 @@ def test_pagination_meta(test_db, client):
     assert len(data2["items"]) <= 10
     # No more pages
     assert data2["meta"]["next"] is None
+
+
+def test_get_places_fast_path_serializes_row_tuples():
+    """Test that the opt-in fast path builds items from row tuples and returns orjson."""
+    from collections import namedtuple
+    from datetime import datetime
+
+    Row = namedtuple("Row", "id name slug address city state country postal_code lat lng created_at updated_at")
+    rows = [
+        Row(3, "Joe's Pizza", "joes-pizza", "7 Carmine St", "New York", "NY", "USA", "10014",
+            40.7306, -73.9352, datetime(2025, 5, 20, 12), None),
+        Row(2, "Shake Shack", None, None, None, None, None, None, 40.7127, -74.0060, datetime(2025, 5, 19, 12), None),
+    ]
+
+    mock_db = mock.MagicMock()
+    mock_query = mock_db.query.return_value
+    mock_query.order_by.return_value = mock_query
+    mock_query.filter.return_value = mock_query
+    mock_query.limit.return_value = mock_query
+    mock_query.all.return_value = rows
+
+    app.dependency_overrides[get_db] = lambda: mock_db
+    try:
+        with mock.patch("app.api.endpoints.places.PLACES_FAST_PATH", True):
+            response = get_test_client().get("/api/places?per_page=1")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["Cache-Control"] == "public, max-age=30"
+    data = response.json()
+    assert data["meta"]["next"] == 3
+    assert data["items"] == [{
+        "id": 3,
+        "name": "Joe's Pizza",
+        "slug": "joes-pizza",
+        "address": "7 Carmine St",
+        "city": "New York",
+        "state": "NY",
+        "country": "USA",
+        "postal_code": "10014",
+        "lat": 40.7306,
+        "lng": -73.9352,
+        "created_at": "2025-05-20T12:00:00",
+        "updated_at": None,
+    }]
+
+
+def test_export_geojson_streams_feature_collection():
+    """Test that the GeoJSON export wraps streamed chunks in one FeatureCollection."""
+    chunks = [
+        [b'{"type":"Feature","geometry":{"type":"Point","coordinates":[-73.9,40.7]},"properties":{"id":1}}',
+         b'{"type":"Feature","geometry":{"type":"Point","coordinates":[-74.0,40.7]},"properties":{"id":2}}'],
+        [],
+        [b'{"type":"Feature","geometry":{"type":"Point","coordinates":[-122.4,37.7]},"properties":{"id":3}}'],
+    ]
+
+    with mock.patch("app.api.endpoints.places.iter_export_features", return_value=iter(chunks)) as mock_iter:
+        response = get_test_client().get("/api/places/export.geojson?bbox=-180,-90,180,90&q=pizza")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/geo+json")
+    data = response.json()
+    assert data["type"] == "FeatureCollection"
+    assert [feature["properties"]["id"] for feature in data["features"]] == [1, 2, 3]
+    assert mock_iter.call_args[0] == ("-180,-90,180,90", "pizza")
+
+
+def test_export_ndjson_streams_one_feature_per_line():
+    """Test that the NDJSON export emits one feature per line."""
+    chunks = [[b'{"type":"Feature","properties":{"id":1}}'], [b'{"type":"Feature","properties":{"id":2}}']]
+
+    with mock.patch("app.api.endpoints.places.iter_export_features", return_value=iter(chunks)):
+        response = get_test_client().get("/api/places/export.ndjson")
+
+    assert response.status_code == status.HTTP_200_OK
+    lines = response.text.strip().split("\n")
+    assert [json.loads(line)["properties"]["id"] for line in lines] == [1, 2]
+
+
+def test_export_rejects_bad_bbox_and_format():
+    """Test that export validation fails before any streaming starts."""
+    client = get_test_client()
+
+    assert client.get("/api/places/export.geojson?bbox=not-a-bbox").status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/api/places/export.csv").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_get_nearby_places_keyset_meta():
+    """Test that nearby results carry distances and a (distance, id) cursor."""
+    from collections import namedtuple
+    from datetime import datetime
+    from sqlalchemy.dialects import postgresql
+
+    Row = namedtuple(
+        "Row", "id name slug address city state country postal_code lat lng created_at updated_at distance_m"
+    )
+    rows = [
+        Row(5, "Joe's Pizza", "joes-pizza", None, "New York", "NY", "USA", None,
+            40.7306, -73.9352, datetime(2025, 5, 20), None, 12.5),
+        Row(9, "Lombardi's", "lombardis", None, None, None, None, None, 40.7216, -73.9956, datetime(2025, 5, 20), None, 820.0),
+        Row(2, "Katz's", "katzs", None, None, None, None, None, 40.7223, -73.9874, datetime(2025, 5, 20), None, 900.0),
+    ]
+
+    mock_db = mock.MagicMock()
+    mock_query = mock_db.query.return_value
+    mock_query.filter.return_value = mock_query
+    mock_query.order_by.return_value = mock_query
+    mock_query.limit.return_value = mock_query
+    mock_query.all.return_value = rows
+
+    app.dependency_overrides[get_db] = lambda: mock_db
+    try:
+        response = get_test_client().get("/api/places/nearby?lat=40.73&lng=-73.93&radius=1000&limit=2")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [item["id"] for item in data["items"]] == [5, 9]
+    assert data["items"][0]["distance_m"] == 12.5
+    assert data["items"][0]["city"] == "New York"
+    # The cursor is the meter distance the results are ordered by
+    assert data["meta"] == {"next_id": 9, "next_distance": 820.0}
+    mock_query.limit.assert_called_with(3)
+    order_by = str(mock_query.order_by.call_args.args[0].compile(dialect=postgresql.dialect()))
+    # Untyped casts, so the expression matches the ix_places_geog index
+    assert "CAST(places.geom AS geography) <-> CAST(" in order_by
+    assert "geography(" not in order_by
+
+
+def test_get_nearby_places_validates_point():
+    """Test that out-of-range coordinates are rejected."""
+    response = get_test_client().get("/api/places/nearby?lat=95&lng=0")
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_get_places_rejects_bad_cells():
+    """Test that malformed or mixed-precision cell lists are rejected."""
+    client = get_test_client()
+
+    assert client.get("/api/places?cells=dr5r,dr5rtw").status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/api/places?cells=dr5ra").status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/api/places?cells=,").status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_stream_places_requires_one_filter():
+    """Test that the place stream needs exactly one of bbox or cells."""
+    client = get_test_client()
+
+    assert client.get("/api/places/stream").status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/api/places/stream?bbox=-74,40,-73,41&cells=dr5r").status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/api/places/stream?cells=dr5ra").status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_stream_places_rejects_too_many_cells():
+    """Test that an explicit cell list is capped like a bbox's cells."""
+    cells = ",".join(f"dr{a}{b}" for a in "0123456789bcdefg" for b in "0123456789bcdefghjkmnpqrstuvwxyz")
+    response = get_test_client().get(f"/api/places/stream?cells={cells}")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "Too many cells" in response.json()["detail"]
+
+
+def make_cell_stat(cell, precision, place_count):
+    return mock.MagicMock(
+        cell=cell, precision=precision, place_count=place_count, review_count=340, avg_rating=4.5,
+        lat=40.73, lng=-73.95, top_place_id=5, thumbnail_url="https://example.com/thumb.jpg",
+    )
+
+
+def test_get_place_cells_picks_precision_from_bbox():
+    """Test that cell aggregates are read for a precision matching the viewport."""
+    mock_db = mock.MagicMock()
+    mock_db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.return_value = [
+        make_cell_stat("dr", 2, 120)
+    ]
+
+    app.dependency_overrides[get_db] = lambda: mock_db
+    try:
+        client = get_test_client()
+        response = client.get("/api/places/cells?bbox=-125,25,-66,49")
+        bad_precision = client.get("/api/places/cells?bbox=-125,25,-66,49&precision=5")
+        too_fine = client.get("/api/places/cells?bbox=-125,25,-66,49&precision=8")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    # A country-sized viewport is served from the precision 2 aggregates
+    assert data["meta"] == {"precision": 2, "truncated": False}
+    assert data["items"][0]["cell"] == "dr"
+    assert data["items"][0]["place_count"] == 120
+    assert data["items"][0]["avg_rating"] == 4.5
+    assert bad_precision.status_code == status.HTTP_400_BAD_REQUEST
+    assert too_fine.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_get_place_cells_caps_rows():
+    """Test that at most MAX_CELLS_PER_RESPONSE cells are returned, busiest first."""
+    mock_db = mock.MagicMock()
+    limited = mock_db.query.return_value.filter.return_value.order_by.return_value.limit
+    limited.return_value.all.return_value = [make_cell_stat(f"dr5{c}", 4, 100 - i) for i, c in enumerate("rxqwz")]
+
+    app.dependency_overrides[get_db] = lambda: mock_db
+    try:
+        with mock.patch("app.api.endpoints.places.MAX_CELLS_PER_RESPONSE", 4):
+            response = get_test_client().get("/api/places/cells?bbox=-74.1,40.7,-73.9,40.8&precision=4")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [item["cell"] for item in data["items"]] == ["dr5r", "dr5x", "dr5q", "dr5w"]
+    assert data["meta"]["truncated"] is True
+    limited.assert_called_with(5)
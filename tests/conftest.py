@@ -16,6 +16,12 @@ sys.path.insert(0, app_dir)
 from app.database import Base, get_db
 from app.main import app
 from app import models  # Import models to ensure they're registered
+from app import database
+
+# Worker-side modules import `models` and `database` straight from the app
+# directory; alias them so both import styles share one set of mapped classes
+sys.modules.setdefault("models", models)
+sys.modules.setdefault("database", database)
 
 
 @pytest.fixture(scope="session")
@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from app.main import app
+from app.utils.metrics import REGISTRY, DatabaseCollector, observe_stage
+
+
+def test_observe_stage_records_a_duration():
+    """Test that a worker stage block is observed once in its histogram."""
+    def count():
+        return REGISTRY.get_sample_value("bitemap_worker_stage_duration_seconds_count", {"stage": "geocode"}) or 0
+
+    before = count()
+    with observe_stage("geocode"):
+        pass
+
+    assert count() == before + 1
+
+
+def test_database_collector_reports_pool_usage(tmp_path):
+    """Test that pool gauges are read from the engine at collection time."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    collector = DatabaseCollector(engine)
+
+    with engine.connect():
+        metrics = {metric.name: metric for metric in collector.collect()}
+
+    samples = {sample.labels["state"]: sample.value for sample in metrics["bitemap_db_pool_connections"].samples}
+    assert samples["checked_out"] == 1
+    assert metrics["bitemap_db_pool_size"].samples[0].value == engine.pool.size()
+
+
+def test_metrics_endpoint_labels_requests_by_route():
+    """Test that /metrics exposes request latency keyed by route template."""
+    client = TestClient(app)
+    client.get("/healthz")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'bitemap_http_request_duration_seconds_count{method="GET",route="/healthz",status="200"}' in response.text
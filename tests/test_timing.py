@@ -0,0 +1,41 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from app.core.timing import RequestTimingMiddleware, install_sql_timing, timed
+
+
+def make_client(sample_rate):
+    """A minimal app running two statements and one named stage per request."""
+    engine = create_engine("sqlite://")
+    install_sql_timing(engine)
+    app = FastAPI()
+    app.add_middleware(RequestTimingMiddleware, sample_rate=sample_rate)
+
+    @app.get("/work")
+    def work():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+        with timed("serialize"):
+            return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_sampled_requests_get_server_timing():
+    """Test that sampled requests report SQL counts, stages and the total."""
+    response = make_client(sample_rate=1).get("/work")
+
+    header = response.headers["Server-Timing"]
+    assert 'desc="2 statements"' in header
+    assert "serialize;dur=" in header
+    assert "total;dur=" in header
+
+
+def test_unsampled_requests_are_untouched():
+    """Test that requests outside the sample get no header unless they ask for it."""
+    client = make_client(sample_rate=0)
+
+    assert "Server-Timing" not in client.get("/work").headers
+    assert "Server-Timing" in client.get("/work", headers={"X-Request-Timing": "1"}).headers
@@ -49,11 +49,62 @@ def test_parse_address():
 
 
 
+def statement_slugs(stmt):
+    """Slugs of the rows in a multi-row places INSERT, in row order."""
+    from sqlalchemy.dialects import postgresql
+
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    return [params[f"slug_m{index}"] for index in range(len(params)) if f"slug_m{index}" in params]
+
+
+def make_insert_execute(existing_slugs=(), concurrent_slugs=(), fail_reviews=False):
+    """
+    Build a session.execute that answers slug lookups and INSERT ... RETURNING
+    like PostgreSQL would.
+
+    concurrent_slugs are taken by another writer: lookups only see them after
+    an insert has conflicted on them.
+    """
+    from sqlalchemy.dialects import postgresql
+
+    next_id = iter(range(101, 1000))
+    next_review_id = iter(range(1, 1000))
+    visible = set(existing_slugs)
+    hidden = set(concurrent_slugs)
+
+    def execute(stmt, *args, **kwargs):
+        result = mock.MagicMock()
+        table = getattr(stmt, "table", None)
+        if table is not None and table.name == "places":
+            rows = []
+            for slug in statement_slugs(stmt):
+                if slug in visible or slug in hidden:
+                    visible.add(slug)
+                    hidden.discard(slug)
+                else:
+                    visible.add(slug)
+                    rows.append((next(next_id), slug))
+            result.all.return_value = rows
+        elif table is not None and table.name == "reviews":
+            if fail_reviews:
+                raise Exception("deadlock detected")
+            params = stmt.compile(dialect=postgresql.dialect()).params
+            rows = [key for key in params if key.startswith("source_id_m")] or ["source_id"]
+            result.all.return_value = [(next(next_review_id),) for _ in rows]
+        else:
+            # Slug allocation lookup
+            result.scalars.return_value = sorted(visible)
+        return result
+
+    return execute
+
+
 def test_process_queued_links():
     """Test the worker's process_queued_links function with mocked dependencies."""
     with mock.patch("worker.SessionLocal") as mock_session_local:
         # Mock the database session
         mock_db = mock.MagicMock()
+        mock_db.execute.side_effect = make_insert_execute()
         mock_session_local.return_value = mock_db
         
         # Create mock sources
@@ -66,6 +117,9 @@ def test_process_queued_links():
         # Set up the session query to return our mock source
         mock_query = mock_db.query.return_value
         mock_query.filter.return_value = mock_query
+        mock_query.order_by.return_value = mock_query
+        mock_query.limit.return_value = mock_query
+        mock_query.with_for_update.return_value = mock_query
         mock_query.all.return_value = [mock_source]
         
         # Mock the extract_place function
@@ -86,16 +140,375 @@ def test_process_queued_links():
                     "types": ["restaurant", "food"]
                 }
                 
-                # Mock the find_nearby_duplicate function
-                with mock.patch("worker.find_nearby_duplicate") as mock_find_duplicate:
-                    mock_find_duplicate.return_value = None  # No duplicates
+                # Mock the batch duplicate resolver
+                with mock.patch("worker.BatchDuplicateResolver") as mock_resolver_cls:
+                    mock_resolver_cls.return_value.find.return_value = None  # No duplicates
                     
                     # Call the function
                     process_queued_links()
                     
                     # Verify the source status was updated
                     assert mock_source.status == "processed"
+                    mock_query.with_for_update.assert_called_with(skip_locked=True)
                     
-                    # Verify a place was added to the database
-                    mock_db.add.assert_called()
+                    # Verify a place and a review were inserted
+                    tables = [
+                        call[0][0].table.name for call in mock_db.execute.call_args_list
+                        if getattr(call[0][0], "table", None) is not None
+                    ]
+                    assert "places" in tables
+                    assert "reviews" in tables
                     mock_db.commit.assert_called()
+
+
+def test_fetch_videos_fetches_youtube_links_in_one_batch():
+    """Test that live fetching goes through fetch_many once per batch, not once per link."""
+    import worker
+
+    youtube_links = [mock.MagicMock(id=i, url=f"https://youtu.be/vid{i}", platform="youtube") for i in (1, 2)]
+    other_link = mock.MagicMock(id=3, url="https://www.tiktok.com/@user/video/3", platform="tiktok")
+
+    with mock.patch.object(worker, "LIVE_FETCH", True), \
+            mock.patch.object(worker.youtube_extractor, "fetch_many") as mock_fetch_many:
+        mock_fetch_many.return_value = {"https://youtu.be/vid1": {"title": "Video 1"}, "https://youtu.be/vid2": None}
+        videos = worker.fetch_videos(youtube_links + [other_link])
+
+    mock_fetch_many.assert_called_once_with(["https://youtu.be/vid1", "https://youtu.be/vid2"])
+    assert videos[1] == {"title": "Video 1"}
+    assert videos[2] is None
+    assert videos[3]["title"] == "Food Review"
+
+
+def make_link(link_id, attempts=0):
+    link = mock.MagicMock()
+    link.id = link_id
+    link.status = "processing"
+    link.attempts = attempts
+    return link
+
+
+def make_geo_result(name, lat=40.730610, lng=-73.935242):
+    return {
+        "name": name,
+        "address": f"{name}, Carmine St, New York, NY 10014, USA",
+        "lat": lat,
+        "lng": lng,
+    }
+
+
+def test_batch_writer_commits_every_n_links():
+    """Test that links are committed in batches of batch_size, not all at once."""
+    from worker import BatchWriter
+
+    mock_db = mock.MagicMock()
+    mock_db.execute.side_effect = make_insert_execute()
+
+    with mock.patch("worker.BatchDuplicateResolver.load"), \
+            mock.patch("worker.apply_cell_deltas") as mock_deltas:
+        writer = BatchWriter(mock_db, batch_size=2, max_delay_ms=60000)
+        links = [make_link(i) for i in range(1, 6)]
+        for i, link in enumerate(links):
+            writer.add(link, {"title": f"Video {i}"}, make_geo_result(f"Place {i}", lat=40.0 + i))
+            writer.flush_if_due()
+        writer.flush()
+
+    # Each batch commits, then adds its own places and reviews to the cells in a second commit
+    assert mock_db.commit.call_count == 6
+    assert writer.batches == 3
+    assert all(link.status == "processed" for link in links)
+    assert len(writer.touched_place_ids) == 5
+    assert [len(call.args[1]) for call in mock_deltas.call_args_list] == [2, 2, 1]
+    assert [len(call.args[2]) for call in mock_deltas.call_args_list] == [2, 2, 1]
+    assert [len(call.args[3]) for call in mock_deltas.call_args_list] == [2, 2, 1]
+
+
+def test_batch_writer_resolves_duplicates_within_a_batch():
+    """Test that a place created earlier in the same batch is reused, not inserted twice."""
+    from worker import BatchWriter
+
+    mock_db = mock.MagicMock()
+    mock_db.execute.side_effect = make_insert_execute()
+
+    with mock.patch("worker.BatchDuplicateResolver.load"):
+        writer = BatchWriter(mock_db, batch_size=10)
+        place_ids, new_place_ids = writer.write_places([make_geo_result("Joe's Pizza"), make_geo_result("Joe's Pizza")])
+
+    assert place_ids == [101, 101]
+    assert new_place_ids == [101]
+
+
+def test_batch_writer_allocates_slugs_for_the_whole_batch():
+    """Test that colliding slugs are suffixed up front, in one insert statement."""
+    from worker import BatchWriter
+
+    mock_db = mock.MagicMock()
+    mock_db.execute.side_effect = make_insert_execute(existing_slugs={"joes-pizza", "joes-pizza-2"})
+
+    ids = BatchWriter(mock_db).insert_places([
+        {"name": "Joe's Pizza", "slug": "joes-pizza"},
+        {"name": "Joe's Pizza", "slug": "joes-pizza"},
+    ])
+
+    assert ids == [101, 102]
+    assert statement_slugs(mock_db.execute.call_args[0][0]) == ["joes-pizza-3", "joes-pizza-4"]
+    assert mock_db.execute.call_count == 2  # One slug lookup, one insert
+
+
+def test_batch_writer_retries_slugs_taken_concurrently():
+    """Test that a slug taken by another writer is re-allocated instead of failing the batch."""
+    from worker import BatchWriter
+
+    mock_db = mock.MagicMock()
+    mock_db.execute.side_effect = make_insert_execute(concurrent_slugs={"joes-pizza"})
+
+    ids = BatchWriter(mock_db).insert_places([{"name": "Joe's Pizza", "slug": "joes-pizza"}])
+
+    assert ids == [101]
+    assert statement_slugs(mock_db.execute.call_args[0][0]) == ["joes-pizza-2"]
+
+
+def test_batch_writer_failure_only_affects_its_batch():
+    """Test that a failing batch is rolled back and its links scheduled for a retry."""
+    from worker import BatchWriter
+
+    mock_db = mock.MagicMock()
+    mock_db.execute.side_effect = make_insert_execute(fail_reviews=True)
+    failed_link = make_link(1)
+    skipped_link = make_link(2)
+
+    with mock.patch("worker.BatchDuplicateResolver.load"):
+        writer = BatchWriter(mock_db)
+        writer.add(failed_link, {"title": "Video"}, make_geo_result("Joe's Pizza"))
+        writer.finish(skipped_link, "geocode_failed")
+        writer.flush()
+
+    mock_db.rollback.assert_called_once()
+    assert failed_link.status == "queued"
+    assert failed_link.last_error == "error"
+    assert skipped_link.status == "queued"
+    assert skipped_link.last_error == "geocode_failed"
+    assert not writer.touched_place_ids
+
+
+def test_retry_delay_backs_off_with_jitter():
+    """Test that delays double per attempt, stay within half to full, and are capped."""
+    from worker import retry_delay, RETRY_BASE_SECONDS, RETRY_MAX_SECONDS
+
+    for attempts in (1, 2, 3):
+        full = RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+        delays = [retry_delay(attempts).total_seconds() for _ in range(50)]
+        assert all(full / 2 <= delay <= full for delay in delays)
+        assert len(set(delays)) > 1
+
+    assert retry_delay(50).total_seconds() <= RETRY_MAX_SECONDS
+
+
+def test_schedule_retry_requeues_then_dead_letters():
+    """Test that failed links are requeued until MAX_ATTEMPTS, then dead-lettered."""
+    from sqlalchemy.dialects import postgresql
+    from worker import schedule_retry, MAX_ATTEMPTS
+
+    link = make_link(1)
+    schedule_retry(link, "geocode_failed")
+
+    assert link.status == "queued"
+    assert link.attempts == 1
+    # Computed by the database, so app and database clocks or time zones can't disagree
+    next_attempt = link.next_attempt_at.compile(dialect=postgresql.dialect())
+    assert str(next_attempt) == "now() + %(now_1)s"
+    assert next_attempt.params["now_1"].total_seconds() > 0
+
+    link = make_link(2, attempts=MAX_ATTEMPTS - 1)
+    schedule_retry(link, "error")
+
+    assert link.status == "dead"
+    assert link.attempts == MAX_ATTEMPTS
+    assert link.next_attempt_at is None
+    assert link.last_error == "error"
+
+
+def test_claim_links_reserves_a_share_for_bulk_lanes():
+    """Test that interactive links are claimed first without starving the bulk lane."""
+    from worker import claim_links
+
+    interactive = [make_link(1), make_link(2)]
+    bulk = [make_link(3)]
+
+    mock_db = mock.MagicMock()
+    mock_query = mock_db.query.return_value
+    mock_query.filter.return_value = mock_query
+    mock_query.order_by.return_value = mock_query
+    mock_query.limit.return_value = mock_query
+    mock_query.with_for_update.return_value = mock_query
+    # The reserved bulk claim runs first, then the fill by priority
+    mock_query.all.side_effect = [bulk, interactive]
+
+    with mock.patch.dict("worker.LANE_MIN_SHARES", {"bulk": 0.1}, clear=True):
+        links = claim_links(mock_db, limit=20)
+
+    assert [link.id for link in links] == [1, 2, 3]
+    assert [call.args[0] for call in mock_query.limit.call_args_list] == [2, 19]
+    mock_query.with_for_update.assert_called_with(skip_locked=True)
+
+
+def test_reap_expired_claims_requeues_links_of_crashed_workers():
+    """Test that links whose claim lease ran out are requeued as a failed attempt, or dead-lettered."""
+    from sqlalchemy.dialects import postgresql
+    from worker import reap_expired_claims
+
+    mock_db = mock.MagicMock()
+    mock_db.execute.return_value.rowcount = 3
+
+    assert reap_expired_claims(mock_db) == 3
+
+    sql = str(mock_db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE sources SET")
+    assert "sources.status = %(status_1)s AND sources.claimed_at < now() - " in sql
+    assert "CASE WHEN (sources.attempts + %(attempts_1)s >= " in sql
+
+
+def test_process_queued_links_renews_claims_batch_by_batch():
+    """Test that a long run keeps extending the lease of the links it has not written yet."""
+    import worker
+
+    links = [make_link(i) for i in range(1, 6)]
+    mock_db = mock.MagicMock()
+    with mock.patch("worker.SessionLocal", return_value=mock_db), \
+            mock.patch("worker.claim_links", return_value=links), \
+            mock.patch("worker.refresh_gazetteer"), \
+            mock.patch("worker.fetch_videos", return_value={}), \
+            mock.patch("worker.renew_claims") as mock_renew, \
+            mock.patch("worker.BatchWriter", side_effect=lambda db, BatchWriter=worker.BatchWriter: BatchWriter(db, batch_size=2)):
+        worker.process_queued_links()
+
+    assert [[link.id for link in call.args[1]] for call in mock_renew.call_args_list] == [[3, 4, 5], [5]]
+
+
+def make_reprocess_db(sources, payloads, reviews, places):
+    """Build a mock session whose queries return the given rows by model."""
+    from models import Source, Review, Place
+
+    mock_db = mock.MagicMock()
+    source_query = mock.MagicMock()
+    source_query.filter.return_value = source_query
+    source_query.order_by.return_value = source_query
+    source_query.limit.return_value = source_query
+    # First batch returns the sources, the next one ends the stream
+    source_query.all.side_effect = [sources, []]
+
+    def query(*entities):
+        if entities[0] is Source:
+            return source_query
+        mock_query = mock.MagicMock()
+        mock_query.filter.return_value = mock_query
+        if entities[0] is Review:
+            mock_query.__iter__.return_value = iter(reviews)
+        elif entities[0] is Place:
+            mock_query.__iter__.return_value = iter(places)
+        else:
+            mock_query.all.return_value = payloads
+        return mock_query
+
+    mock_db.query.side_effect = query
+    return mock_db
+
+
+def test_reprocess_sources_dry_run_reports_diff():
+    """Test that a dry run re-derives places from stored payloads without writing."""
+    from worker import reprocess_sources
+    from utils.raw_store import encode_payload
+
+    payload_hash, data, _ = encode_payload({"title": "Lombardi's", "description": "Best pizza in NYC"})
+    source = mock.MagicMock(id=1, raw_data_hash=payload_hash)
+    review = mock.MagicMock(source_id=1, place_id=10)
+    place = mock.MagicMock(id=10, address="Carmine St, New York")
+    place.name = "Joe's Pizza"
+
+    mock_db = make_reprocess_db([source], [(payload_hash, data)], [review], [place])
+
+    with mock.patch("worker.SessionLocal", return_value=mock_db), \
+         mock.patch("worker.extract_place", return_value={"name": "Lombardi's", "hint_loc": "NYC"}), \
+         mock.patch("worker.geocode") as mock_geocode, \
+         mock.patch("worker.save_place") as mock_save_place:
+        mock_geocode.return_value = {
+            "name": "Lombardi's",
+            "address": "32 Spring St, New York, NY 10012, USA",
+            "lat": 40.7216,
+            "lng": -73.9956,
+        }
+
+        counts = reprocess_sources(dry_run=True)
+
+    assert counts["seen"] == 1
+    assert counts["changed"] == 1
+    mock_save_place.assert_not_called()
+    assert review.place_id == 10
+    mock_db.rollback.assert_called()
+    mock_db.commit.assert_not_called()
+
+
+def test_reprocess_sources_refreshes_cells_of_moved_reviews():
+    """Test that a committed batch refreshes the cells of both the old and the new place."""
+    from worker import reprocess_sources
+    from utils.raw_store import encode_payload
+
+    payload_hash, data, _ = encode_payload({"title": "Lombardi's", "description": "Best pizza in NYC"})
+    source = mock.MagicMock(id=1, raw_data_hash=payload_hash)
+    review = mock.MagicMock(source_id=1, place_id=10)
+    place = mock.MagicMock(id=10, address="Carmine St, New York")
+    place.name = "Joe's Pizza"
+
+    mock_db = make_reprocess_db([source], [(payload_hash, data)], [review], [place])
+
+    with mock.patch("worker.SessionLocal", return_value=mock_db), \
+         mock.patch("worker.extract_place", return_value={"name": "Lombardi's", "hint_loc": "NYC"}), \
+         mock.patch("worker.geocode") as mock_geocode, \
+         mock.patch("worker.save_place", return_value=11), \
+         mock.patch("worker.refresh_place_cells") as mock_refresh:
+        mock_geocode.return_value = {
+            "name": "Lombardi's",
+            "address": "32 Spring St, New York, NY 10012, USA",
+            "lat": 40.7216,
+            "lng": -73.9956,
+        }
+
+        counts = reprocess_sources()
+
+    assert counts["changed"] == 1
+    assert review.place_id == 11
+    mock_refresh.assert_called_once_with(mock_db, {10, 11})
+
+
+def test_reprocess_sources_skips_geocoding_when_name_unchanged():
+    """Test that geocoding is skipped when extraction still finds the linked place."""
+    from worker import reprocess_sources
+    from utils.raw_store import encode_payload
+
+    payload_hash, data, _ = encode_payload({"title": "Joe's Pizza", "description": "NYC slice"})
+    source = mock.MagicMock(id=1, raw_data_hash=payload_hash)
+    review = mock.MagicMock(source_id=1, place_id=10)
+    place = mock.MagicMock(id=10, address="Carmine St, New York")
+    place.name = "Joe's Pizza"
+
+    mock_db = make_reprocess_db([source], [(payload_hash, data)], [review], [place])
+
+    with mock.patch("worker.SessionLocal", return_value=mock_db), \
+         mock.patch("worker.extract_place", return_value={"name": "Joe's Pizza", "hint_loc": "NYC"}), \
+         mock.patch("worker.geocode") as mock_geocode:
+        counts = reprocess_sources()
+
+    assert counts["unchanged"] == 1
+    mock_geocode.assert_not_called()
+    mock_db.commit.assert_called()
+
+
+def test_parse_args_process_options():
+    """Test the multi-process and NLP flags of the worker command line."""
+    from worker import parse_args
+
+    args = parse_args(["--processes", "4", "--preload", "--no-nlp"])
+
+    assert args.processes == 4
+    assert args.preload
+    assert args.no_nlp
+    assert parse_args([]).processes == 1
@@ -0,0 +1,118 @@
+import pytest
+from unittest import mock
+
+from app.extractors.youtube import YouTubeExtractor, trim_info
+
+
+def make_info(video_id):
+    """Build a yt-dlp style info dict with the bulky fields we don't persist."""
+    return {
+        "id": video_id,
+        "title": f"Video {video_id}",
+        "description": "We visited Joe's Pizza in NYC",
+        "thumbnails": [{"url": "https://example.com/small.jpg"}, {"url": "https://example.com/large.jpg"}],
+        "formats": [{"format_id": str(i)} for i in range(50)],
+        "channel_id": "UC123",
+        "upload_date": "20250101",
+    }
+
+
+def test_trim_info_keeps_persisted_fields_only():
+    """Test that trimming drops formats/thumbnails and picks the best thumbnail."""
+    result = trim_info(make_info("abc"), "abc")
+
+    assert result["title"] == "Video abc"
+    assert result["thumbnail_url"] == "https://example.com/large.jpg"
+    assert result["video_id"] == "abc"
+    assert result["platform"] == "youtube"
+    assert "formats" not in result
+    assert "thumbnails" not in result
+    assert "raw_data" not in result
+
+
+def test_fetch_many_reuses_session_per_thread():
+    """Test that fetch_many opens one YoutubeDL per thread, not one per URL or per batch."""
+    urls = [f"https://www.youtube.com/watch?v=vid{i}" for i in range(6)]
+
+    with mock.patch("app.extractors.youtube.yt_dlp.YoutubeDL") as mock_ydl_cls:
+        mock_ydl = mock_ydl_cls.return_value
+        mock_ydl.extract_info.side_effect = lambda url, download: make_info(url.rsplit("=", 1)[1])
+
+        extractor = YouTubeExtractor(max_workers=1)
+        results = extractor.fetch_many(urls[:3])
+        results.update(extractor.fetch_many(urls[3:]))
+
+        assert mock_ydl_cls.call_count == 1
+        mock_ydl.close.assert_not_called()
+        extractor.close()
+
+    assert mock_ydl.extract_info.call_count == 6
+    mock_ydl.close.assert_called_once()
+    assert list(results) == urls
+    assert results[urls[0]]["video_id"] == "vid0"
+
+
+def test_fetch_returns_trimmed_info():
+    """Test that fetch returns the trimmed metadata, not the full yt-dlp info dict."""
+    with mock.patch("app.extractors.youtube.yt_dlp.YoutubeDL") as mock_ydl_cls:
+        mock_ydl_cls.return_value.extract_info.return_value = make_info("abc")
+
+        result = YouTubeExtractor().fetch("https://youtu.be/abc")
+
+    assert result == trim_info(make_info("abc"), "abc")
+
+
+def test_fetch_many_isolates_failures():
+    """Test that one failing or invalid URL doesn't fail the whole batch."""
+    good = "https://youtu.be/good"
+    bad = "https://youtu.be/bad"
+    invalid = "https://example.com/not-youtube"
+
+    def extract_info(url, download):
+        if url == bad:
+            raise Exception("Video unavailable")
+        return make_info("good")
+
+    with mock.patch("app.extractors.youtube.yt_dlp.YoutubeDL") as mock_ydl_cls:
+        mock_ydl_cls.return_value.extract_info.side_effect = extract_info
+
+        results = YouTubeExtractor(max_workers=3).fetch_many([good, bad, invalid])
+
+    assert results[good]["title"] == "Video good"
+    assert results[bad] is None
+    assert results[invalid] is None
+
+
+def test_collection_kind():
+    """Test detection of playlist and channel URLs."""
+    extractor = YouTubeExtractor()
+
+    assert extractor.collection_kind("https://www.youtube.com/playlist?list=PL123") == "playlist"
+    assert extractor.collection_kind("https://www.youtube.com/@foodcreator") == "channel"
+    assert extractor.collection_kind("https://www.youtube.com/@foodcreator/videos") == "channel"
+    assert extractor.collection_kind("https://www.youtube.com/channel/UC123") == "channel"
+    assert extractor.collection_kind("https://www.youtube.com/watch?v=abc&list=PL123") is None
+    assert extractor.collection_kind("https://youtu.be/abc") is None
+    assert extractor.collection_kind("https://www.youtube.com/playlist") is None
+
+
+def test_iter_collection_paginates_from_start_index():
+    """Test that collections are streamed page by page from the resume cursor."""
+    listing = [{"id": f"vid{i}", "title": f"Video {i}"} for i in range(1, 8)]
+
+    def extract_info(url, download):
+        params = mock_ydl.params
+        return {"entries": listing[params["playliststart"] - 1:params["playlistend"]]}
+
+    with mock.patch("app.extractors.youtube.yt_dlp.YoutubeDL") as mock_ydl_cls:
+        mock_ydl = mock_ydl_cls.return_value.__enter__.return_value
+        mock_ydl.params = {}
+        mock_ydl.extract_info.side_effect = extract_info
+
+        pages = list(YouTubeExtractor().iter_collection(
+            "https://www.youtube.com/@foodcreator", start_index=3, page_size=2
+        ))
+
+    assert mock_ydl.extract_info.call_args[0][0] == "https://www.youtube.com/@foodcreator/videos"
+    assert [[entry["index"] for entry in page] for page in pages] == [[3, 4], [5, 6], [7]]
+    assert pages[0][0]["url"] == "https://www.youtube.com/watch?v=vid3"
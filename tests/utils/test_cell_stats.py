@@ -0,0 +1,101 @@
+import pytest
+import os
+import sys
+from unittest import mock
+
+# Add the app module to path if needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'app'))
+
+from utils.cell_stats import refresh_sql, delta_sql, top_place_sql, cells_for_places, refresh_cells, rebuild_cell_stats, apply_cell_deltas
+
+
+def test_refresh_sql_targets_one_precision():
+    """Test that the refresh statement reads the matching geohash column."""
+    sql = refresh_sql(6)
+
+    assert "p.geohash_6 AS cell" in sql
+    assert "p.geohash_6 = ANY(:cells)" in sql
+    assert "ON CONFLICT (cell) DO UPDATE" in sql
+    assert "ANY(:cells)" not in refresh_sql(6, all_cells=True)
+
+    with pytest.raises(ValueError):
+        refresh_sql(5)
+
+
+def test_cells_for_places_groups_by_precision():
+    """Test that touched places are turned into distinct cells per precision."""
+    mock_db = mock.MagicMock()
+    mock_db.query.return_value.filter.return_value.all.return_value = [
+        ("dr", "dr5", "dr5r", "dr5rtw", "dr5rtwf0"),
+        ("dr", "dr5", "dr5r", "dr5rtx", "dr5rtx00"),
+        (None, None, None, None, None),
+    ]
+
+    cells = cells_for_places(mock_db, [1, 2, 3])
+
+    assert cells == {
+        2: ["dr"],
+        3: ["dr5"],
+        4: ["dr5r"],
+        6: ["dr5rtw", "dr5rtx"],
+        8: ["dr5rtwf0", "dr5rtx00"],
+    }
+    assert cells_for_places(mock_db, []) == {}
+
+
+def test_refresh_cells_replaces_rows_for_each_precision():
+    """Test that each precision's cells are deleted and recomputed in the caller's transaction."""
+    mock_db = mock.MagicMock()
+
+    refreshed = refresh_cells(mock_db, {4: ["dr5r"], 6: ["dr5rtw", "dr5rtx"], 8: []})
+
+    assert refreshed == 3
+    assert mock_db.execute.call_count == 4
+    statements = [str(call[0][0]) for call in mock_db.execute.call_args_list]
+    assert statements[0].startswith("DELETE FROM place_cell_stats")
+    assert "geohash_4 AS cell" in statements[1]
+    assert "geohash_6 AS cell" in statements[3]
+    mock_db.commit.assert_not_called()
+
+
+def test_rebuild_cell_stats_commits_per_precision():
+    """Test that a full rebuild recomputes every precision and commits each one."""
+    mock_db = mock.MagicMock()
+    mock_db.execute.return_value.rowcount = 2
+
+    written = rebuild_cell_stats(mock_db)
+
+    assert written == 10
+    assert mock_db.commit.call_count == 5
+
+
+def test_delta_sql_adds_to_existing_rows():
+    """Test that batch deltas add to the stored counts instead of recomputing the cell."""
+    sql = delta_sql(3)
+
+    assert "geohash_3 AS cell" in sql
+    assert "id = ANY(:new_place_ids)" in sql
+    assert "r.id = ANY(:review_ids)" in sql
+    assert "place_count = s.place_count + EXCLUDED.place_count" in sql
+    assert "review_count = s.review_count + d.reviews" in sql
+    assert "rating_sum = s.rating_sum + EXCLUDED.rating_sum" in sql
+    # Only the batch's rows are read, never every place in the cell
+    assert "= ANY(:cells)" not in sql
+
+    top = top_place_sql(3)
+    assert "p.id = ANY(:place_ids)" in top
+    assert "SELECT top_place_id FROM place_cell_stats" in top
+
+
+def test_apply_cell_deltas_runs_two_statements_per_precision():
+    """Test that a batch is applied to every precision in the caller's transaction."""
+    mock_db = mock.MagicMock()
+    mock_db.execute.return_value.rowcount = 1
+
+    written = apply_cell_deltas(mock_db, [1, 2], [2], [10, 11])
+
+    assert written == 5
+    assert mock_db.execute.call_count == 10
+    assert mock_db.execute.call_args_list[0][0][1]["new_place_ids"] == [2]
+    mock_db.commit.assert_not_called()
+    assert apply_cell_deltas(mock_db, [], [], []) == 0
@@ -0,0 +1,97 @@
+import pytest
+from unittest import mock
+
+from app.models import SourceCollection
+from app.utils.collection_expander import claim_collection, expand_collection
+
+
+def make_pages(video_ids, page_size):
+    """Split a newest-first listing into iter_collection style pages."""
+    entries = [
+        {"index": i + 1, "video_id": vid, "url": f"https://www.youtube.com/watch?v={vid}", "title": vid}
+        for i, vid in enumerate(video_ids)
+    ]
+    return [entries[i:i + page_size] for i in range(0, len(entries), page_size)]
+
+
+def make_extractor(video_ids, page_size=2):
+    extractor = mock.MagicMock()
+
+    def iter_collection(url, start_index=1, page_size=page_size):
+        for page in make_pages(video_ids, page_size):
+            page = [entry for entry in page if entry["index"] >= start_index]
+            if page:
+                yield page
+
+    extractor.iter_collection.side_effect = iter_collection
+    return extractor
+
+
+def test_expand_collection_resumes_from_cursor():
+    """Test that a full pass stops after max_pages and resumes from next_index."""
+    db = mock.MagicMock()
+    collection = SourceCollection(id=1, url="https://www.youtube.com/@chef", platform="youtube",
+                                  kind="channel", next_index=1, total_enqueued=0)
+    extractor = make_extractor(["v5", "v4", "v3", "v2", "v1"])
+
+    with mock.patch("app.utils.collection_expander.enqueue_entries", side_effect=lambda db, c, page, client_key=None: len(page)):
+        assert expand_collection(db, collection, extractor, page_size=2, max_pages=1) == 2
+        assert collection.next_index == 3
+        assert collection.status == "queued"
+
+        assert expand_collection(db, collection, extractor, page_size=2) == 3
+
+    assert collection.next_index is None
+    assert collection.status == "expanded"
+    assert collection.last_seen_video_id == "v5"
+    assert collection.total_enqueued == 5
+
+
+def test_expand_collection_incremental_stops_at_last_seen():
+    """Test that a re-sync of a channel only enqueues videos newer than the last seen one."""
+    db = mock.MagicMock()
+    collection = SourceCollection(id=1, url="https://www.youtube.com/@chef", platform="youtube",
+                                  kind="channel", next_index=None, last_seen_video_id="v5", total_enqueued=5)
+    extractor = make_extractor(["v7", "v6", "v5", "v4", "v3", "v2", "v1"])
+    enqueued_pages = []
+
+    def enqueue(db, c, page, client_key=None):
+        enqueued_pages.append([entry["video_id"] for entry in page])
+        return len(page)
+
+    with mock.patch("app.utils.collection_expander.enqueue_entries", side_effect=enqueue):
+        assert expand_collection(db, collection, extractor, page_size=2) == 2
+
+    assert enqueued_pages == [["v7", "v6"], []]
+    assert collection.last_seen_video_id == "v7"
+    assert collection.next_index is None
+    assert collection.total_enqueued == 7
+
+
+def test_claim_collection_is_one_conditional_update():
+    """Test that claiming checks and sets the expanding status in one statement, taking over stale claims."""
+    from sqlalchemy.dialects import postgresql
+
+    db = mock.MagicMock()
+    db.execute.return_value.first.return_value = None
+    assert claim_collection(db, 7) is False
+
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE source_collections SET status=")
+    assert "expanding_since < now() - " in sql
+    assert "RETURNING source_collections.id" in sql
+
+
+def test_expand_collection_failure_releases_claim():
+    """Test that a failing expansion records its error instead of staying expanding."""
+    db = mock.MagicMock()
+    collection = SourceCollection(id=1, url="https://www.youtube.com/@chef", platform="youtube",
+                                  kind="channel", next_index=1, total_enqueued=0, status="expanding")
+    extractor = make_extractor(["v2", "v1"])
+
+    with mock.patch("app.utils.collection_expander.enqueue_entries", side_effect=RuntimeError("boom")), \
+         mock.patch("app.utils.collection_expander.release_collection") as mock_release:
+        with pytest.raises(RuntimeError):
+            expand_collection(db, collection, extractor, page_size=2)
+
+    mock_release.assert_called_once_with(db, 1, "boom")
@@ -0,0 +1,99 @@
+import pytest
+import os
+import sys
+
+import spacy
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String
+
+# Add the app module to path if needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'app'))
+
+from utils.nlp.gazetteer import Gazetteer, PLACE_LABEL, CITY_LABEL
+from utils.nlp import place_extractor
+
+
+@pytest.fixture
+def nlp():
+    return spacy.blank("en")
+
+
+@pytest.fixture
+def places_db():
+    """An in-memory database with a minimal places table."""
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    places = Table(
+        "places", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("name", String),
+        Column("city", String),
+    )
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(places.insert(), [
+            {"name": "Joe's Pizza", "city": "New York"},
+            {"name": "Katz's Delicatessen", "city": "New York"},
+            {"name": "Franklin Barbecue", "city": "Austin"},
+        ])
+        yield conn, places
+
+
+def test_match_prefers_longest_known_name(nlp):
+    """Test case-insensitive matching with overlapping names resolved to the longest."""
+    gazetteer = Gazetteer(nlp)
+    gazetteer.add(PLACE_LABEL, ["Joe's", "Joe's Pizza"])
+    gazetteer.add(CITY_LABEL, ["New York"])
+
+    name, city = gazetteer.match(nlp("grabbing a slice at JOE'S PIZZA in new york tonight"))
+
+    assert name == "Joe's Pizza"
+    assert city == "New York"
+
+
+def test_add_skips_known_and_blank_names(nlp):
+    """Test that names are only compiled into the matcher once."""
+    gazetteer = Gazetteer(nlp)
+
+    assert gazetteer.add(PLACE_LABEL, ["Joe's Pizza", "joe's pizza", "", None]) == 1
+    assert len(gazetteer) == 1
+
+
+def test_refresh_is_incremental(nlp, places_db):
+    """Test that a refresh only reads places newer than the last one seen."""
+    conn, places = places_db
+    gazetteer = Gazetteer(nlp)
+
+    assert gazetteer.refresh(conn) == 3
+    assert gazetteer.refresh(conn) == 0
+
+    conn.execute(places.insert(), [{"name": "Lucali", "city": "New York"}])
+    assert gazetteer.refresh(conn) == 1
+    assert gazetteer.last_place_id == 4
+    assert gazetteer.match(nlp("Lucali in Brooklyn"))[0] == "Lucali"
+    assert gazetteer.match(nlp("brisket at franklin barbecue, austin"))[1] == "Austin"
+
+
+def test_extract_place_uses_gazetteer_first(monkeypatch):
+    """Test that a known venue wins over NER and regex guesses."""
+    gazetteer = Gazetteer(place_extractor.get_nlp())
+    gazetteer.add(PLACE_LABEL, ["Franklin Barbecue"])
+    monkeypatch.setattr(place_extractor, "_gazetteer", gazetteer)
+
+    result = place_extractor.extract_place("Lining up at 6am for franklin barbecue brisket")
+
+    assert result["name"] == "Franklin Barbecue"
+
+
+def test_spacy_is_loaded_lazily():
+    """Test that importing the extractor doesn't import spaCy or load a model."""
+    import subprocess
+
+    app_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'app')
+    code = (
+        "import sys; sys.path.insert(0, %r); "
+        "import utils.nlp.place_extractor as pe; "
+        "assert 'spacy' not in sys.modules; assert pe._nlp is None; "
+        "pe.disable_nlp(); pe.extract_place('Lunch at Joe\\'s Pizza'); "
+        "assert pe._nlp.pipe_names == []" % app_dir
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,48 @@
+from app.utils.geocell import MAX_VIEWPORT_CELLS, encode, place_cells, bbox_cells, viewport_cells, viewport_precision, is_valid_cell
+
+
+def test_encode_known_geohash():
+    """Test encoding against a published geohash example."""
+    assert encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_place_cells_are_prefixes_of_each_other():
+    """Test that coarser cells are prefixes of the finest stored cell."""
+    cells = place_cells(40.7306, -73.9352)
+
+    assert cells == {
+        "geohash_2": "dr", "geohash_3": "dr5", "geohash_4": "dr5r", "geohash_6": "dr5rtw", "geohash_8": "dr5rtwf0",
+    }
+
+
+def test_bbox_cells_cover_the_box():
+    """Test that every point in a bbox falls in one of its covering cells."""
+    cells = set(bbox_cells(-74.0, 40.70, -73.9, 40.76, 6))
+
+    for lat in (40.70, 40.73, 40.76):
+        for lng in (-74.0, -73.95, -73.9):
+            assert encode(lat, lng, 6) in cells
+
+
+def test_viewport_precision_coarsens_with_zoom():
+    """Test that larger viewports use coarser cells."""
+    assert viewport_precision(-74.0, 40.70, -73.9, 40.76) == 6
+    assert viewport_precision(-74.5, 40.5, -72.5, 41.5) == 4
+    assert viewport_precision(-100.0, 35.0, -90.0, 40.0) == 3
+    assert viewport_precision(-125.0, 25.0, -66.0, 49.0) == 2
+
+
+def test_viewport_cells_gives_up_on_huge_viewports():
+    """Test that viewport cells stay under the cap and huge viewports get none."""
+    cells = viewport_cells(-74.0, 40.70, -73.9, 40.76)
+    assert 0 < len(cells) <= MAX_VIEWPORT_CELLS
+    assert {len(cell) for cell in cells} == {6}
+    assert {len(cell) for cell in viewport_cells(-125.0, 25.0, -66.0, 49.0)} == {2}
+    assert viewport_cells(-180.0, -90.0, 180.0, 90.0) is None
+
+
+def test_is_valid_cell():
+    """Test cell validation against stored precisions and the geohash alphabet."""
+    assert is_valid_cell("dr5rtw")
+    assert not is_valid_cell("dr5rt")
+    assert not is_valid_cell("dr5ra1")
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import socket
+from unittest import mock
+
+from app.utils.pg_listener import PgListener
+
+
+class FakeConnection:
+    """A psycopg2-like LISTEN connection backed by a socket pair."""
+
+    def __init__(self, fail_poll=False):
+        self.reader, self.writer = socket.socketpair()
+        self.fail_poll = fail_poll
+        self.notifies = []
+        self.closed = False
+
+    def fileno(self):
+        return self.reader.fileno()
+
+    def poll(self):
+        self.reader.recv(1024)
+        if self.fail_poll:
+            raise Exception("server closed the connection unexpectedly")
+
+    def notify(self, channel, payload):
+        self.notifies.append(mock.MagicMock(channel=channel, payload=json.dumps(payload)))
+        self.writer.send(b"x")
+
+    def close(self):
+        self.closed = True
+        self.reader.close()
+        self.writer.close()
+
+
+def test_listener_reconnects_and_resyncs_after_losing_its_connection():
+    """Test that a dropped LISTEN connection is reopened in the background and subscribers told to resync."""
+    async def scenario():
+        engine = mock.MagicMock()
+        engine.dialect.name = "postgresql"
+        listener = PgListener(engine)
+        events, resyncs = [], []
+        listener.add_handler("place_changes", events.append, on_disconnect=lambda: resyncs.append(listener.listening))
+
+        broken, restored = FakeConnection(fail_poll=True), FakeConnection()
+        with mock.patch.object(listener, "_connect", side_effect=[Exception("connection refused"), broken, restored]), \
+             mock.patch("app.utils.pg_listener.LISTEN_RECONNECT_MIN_SECONDS", 0.01):
+            await listener.start()
+            assert not listener.listening
+
+            await listener.start()
+            assert listener.connection is broken
+
+            broken.writer.send(b"x")
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if listener.connection is restored:
+                    break
+
+            assert broken.closed
+            assert listener.connection is restored
+            # Once when the connection dropped, once when it was back
+            assert resyncs == [False, True]
+
+            restored.notify("place_changes", {"id": 1})
+            await asyncio.sleep(0.05)
+            assert events == [{"id": 1}]
+            listener.stop()
+
+    asyncio.run(scenario())
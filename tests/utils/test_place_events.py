@@ -0,0 +1,74 @@
+import asyncio
+
+from sqlalchemy import create_engine
+
+from app.utils.geocell import encode
+from app.utils.pg_listener import PgListener
+from app.utils.place_events import PlaceEventBus
+
+
+def make_event(lat, lng, **extra):
+    return {"op": "insert", "id": 1, "name": "Joe's Pizza", "lat": lat, "lng": lng,
+            "geohash_8": encode(lat, lng, 8), **extra}
+
+
+def test_events_reach_streams_watching_their_cells():
+    """Test that an event is delivered by cell prefix at any stored precision."""
+    async def scenario():
+        bus = PlaceEventBus(PgListener(create_engine("sqlite://")))
+        nyc = encode(40.7306, -73.9352, 4)
+        with bus.subscribe([nyc]) as coarse, \
+             bus.subscribe([encode(40.7306, -73.9352, 6)]) as fine, \
+             bus.subscribe([encode(51.5, -0.12, 4)]) as london:
+            bus.publish(make_event(40.7306, -73.9352))
+            assert coarse.queue.qsize() == 1
+            assert fine.queue.qsize() == 1
+            assert london.queue.empty()
+        assert not bus.by_cell
+
+    asyncio.run(scenario())
+
+
+def test_bbox_streams_hear_places_moving_out():
+    """Test bbox narrowing, and that updates match on the previous position too."""
+    async def scenario():
+        bus = PlaceEventBus(PgListener(create_engine("sqlite://")))
+        cell = encode(40.73, -73.93, 4)
+        with bus.subscribe([cell], bbox=(-74.0, 40.7, -73.9, 40.8)) as viewport:
+            # Same cell, outside the bbox
+            bus.publish(make_event(40.9, -73.7))
+            assert viewport.queue.empty()
+
+            moved = make_event(51.5, -0.12, op="update", old_lat=40.73, old_lng=-73.93,
+                               old_geohash_8=encode(40.73, -73.93, 8))
+            bus.publish(moved)
+            assert viewport.queue.get_nowait() is moved
+
+    asyncio.run(scenario())
+
+
+def test_bbox_only_streams_are_matched_by_position():
+    """Test that a subscription without cells hears events inside its bbox only."""
+    async def scenario():
+        bus = PlaceEventBus(PgListener(create_engine("sqlite://")))
+        with bus.subscribe([], bbox=(-125.0, 25.0, -66.0, 49.0)) as country:
+            assert not bus.by_cell
+            bus.publish(make_event(40.73, -73.93))
+            bus.publish(make_event(51.5, -0.12))
+            assert country.queue.qsize() == 1
+        assert not bus.by_bbox
+
+    asyncio.run(scenario())
+
+
+def test_slow_streams_are_told_to_resync():
+    """Test that a full stream queue drops events and flags a resync."""
+    async def scenario():
+        bus = PlaceEventBus(PgListener(create_engine("sqlite://")))
+        cell = encode(40.73, -73.93, 4)
+        with bus.subscribe([cell]) as stream:
+            for _ in range(stream.queue.maxsize + 1):
+                bus.publish(make_event(40.73, -73.93))
+            assert stream.overflowed
+
+    asyncio.run(scenario())
@@ -55,7 +55,10 @@ def test_format_place_slug():
 def test_extract_place():
     """Test the place extraction from text."""
     # Mock the NLP processor
-    with mock.patch('utils.nlp.place_extractor.nlp') as mock_nlp:
+    with mock.patch('utils.nlp.place_extractor.get_nlp') as mock_get_nlp, \
+            mock.patch('utils.nlp.place_extractor.get_gazetteer') as mock_get_gazetteer:
+        mock_nlp = mock_get_nlp.return_value
+        mock_get_gazetteer.return_value.match.return_value = (None, None)  # No known places
         # Configure the mock to return recognized entities
         mock_entities = mock.MagicMock()
         mock_entities.ents = [
@@ -133,3 +136,75 @@ def test_geocoder():
         with mock.patch.dict(os.environ, {}, clear=True):
             result = geocode("Joe's Pizza", "New York")
             assert result is None
+
+
+def test_trigram_similarity_matches_pg_trgm():
+    """Test the Python trigram similarity against pg_trgm reference values."""
+    from utils.place_utils import trigram_similarity
+
+    assert trigram_similarity("Joe's Pizza", "joe's pizza") == 1.0
+    assert round(trigram_similarity("word", "two words"), 4) == 0.3636
+    assert trigram_similarity("Joe's Pizza", "Shake Shack") < 0.4
+    assert trigram_similarity("", "Shake Shack") == 0.0
+
+
+def test_batch_duplicate_resolver_matching_rules():
+    """Test exact name, similar name and closest-place resolution in memory."""
+    from utils.place_utils import BatchDuplicateResolver
+
+    resolver = BatchDuplicateResolver(distance_meters=100)
+    resolver.add(1, 40.73061, -73.93524, "Joe's Pizza")
+    resolver.add(2, 40.73070, -73.93530, "Joes Pizza Carmine")
+    resolver.add(3, 40.73050, -73.93520, "Shake Shack")
+    resolver.add(4, 40.80000, -73.90000, "Joe's Pizza")  # Far away
+
+    # Exact name match within distance wins
+    assert resolver.find(40.73062, -73.93525, "JOE'S PIZZA") == 1
+    # Otherwise the most similar name
+    assert resolver.find(40.73062, -73.93525, "Joes Pizza Carmine St") == 2
+    # Otherwise the closest place
+    assert resolver.find(40.73051, -73.93521, "Totally Different") == 3
+    # Nothing within distance
+    assert resolver.find(40.70000, -74.10000, "Joe's Pizza") is None
+
+
+def test_batch_duplicate_resolver_finds_duplicates_at_high_longitude():
+    """Test that nearby points share a grid scale, so a 69 m pair near Tokyo is matched."""
+    from utils.place_utils import BatchDuplicateResolver, haversine_meters
+
+    assert haversine_meters(35.61694, 139.63394, 35.61743, 139.63348) < 70
+
+    resolver = BatchDuplicateResolver(distance_meters=100)
+    resolver.add(1, 35.61694, 139.63394, "Ichiran")
+    assert resolver.find(35.61743, 139.63348, "Ichiran Shibuya") == 1
+
+    # Indexing a place further from the equator re-buckets the earlier ones
+    resolver.add(2, 60.17, 24.94, "Helsinki Cafe")
+    assert resolver.find(35.61743, 139.63348, "Ichiran Shibuya") == 1
+    assert resolver.find(60.1703, 24.9404, "Helsinki Cafe") == 2
+
+
+def test_batch_duplicate_resolver_loads_batch_with_one_query():
+    """Test that the resolver reads all candidate places for a batch at once."""
+    from utils.place_utils import BatchDuplicateResolver
+
+    from sqlalchemy.dialects import postgresql
+
+    db = mock.MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [(7, "Joe's Pizza", 40.73061, -73.93524)]
+
+    resolver = BatchDuplicateResolver()
+    assert resolver.load(db, [(40.73061, -73.93524), (34.05, -118.24)]) == 1
+
+    db.query.assert_called_once()
+    # Only the indexed columns are read, around each point rather than one envelope over both
+    assert [column.key for column in db.query.call_args.args] == ["id", "name", "lat", "lng"]
+    predicate = str(db.query.return_value.filter.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert predicate.count("ST_MakeEnvelope(") == 2
+    assert " OR " in predicate
+    assert resolver.find(40.73061, -73.93524, "Joe's Pizza") == 7
+    assert resolver.find(34.05, -118.24, "In-N-Out Burger") is None
+
+    # Places created later in the batch are found too
+    resolver.add(8, 34.05, -118.24, "In-N-Out Burger")
+    assert resolver.find(34.05001, -118.24001, "In-N-Out") == 8
@@ -0,0 +1,56 @@
+import json
+import time
+from unittest import mock
+
+import pytest
+
+from app.utils import profiling
+
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    """Profile into a temporary directory, keeping every run."""
+    with mock.patch.object(profiling, "PROFILING", True), \
+         mock.patch.object(profiling, "PROFILE_DIR", str(tmp_path)), \
+         mock.patch.object(profiling, "PROFILE_THRESHOLD_MS", 0):
+        yield tmp_path
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_slow_runs_are_kept_as_flame_graphs(profile_dir):
+    """Test that a profiled block over the threshold is saved and listed."""
+    with profiling.profiled("worker", "process_queued_links"):
+        busy(0.02)
+
+    [profile] = profiling.list_profiles()
+    assert profile["kind"] == "worker"
+    assert profile["target"] == "process_queued_links"
+    with open(profiling.profile_path(profile["name"])) as f:
+        assert "speedscope" in json.load(f)["$schema"]
+
+
+def test_fast_runs_are_discarded(profile_dir):
+    """Test that runs under the threshold leave no profile behind."""
+    with mock.patch.object(profiling, "PROFILE_THRESHOLD_MS", 60000):
+        with profiling.profiled("worker", "process_queued_links"):
+            pass
+
+    assert profiling.list_profiles() == []
+
+
+def test_only_the_newest_profiles_are_kept(profile_dir):
+    """Test pruning, and that only kept profile names resolve to paths."""
+    for _ in range(3):
+        with profiling.profiled("request", "GET /api/places"):
+            busy(0.002)
+    profiling.prune_profiles(keep=2)
+
+    profiles = profiling.list_profiles()
+    assert len(profiles) == 2
+    assert profiles[0]["target"] == "GET_api_places"
+    assert profiling.profile_path("../../etc/passwd") is None
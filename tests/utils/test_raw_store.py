@@ -0,0 +1,40 @@
+import pytest
+import os
+import sys
+from unittest import mock
+
+# Add the app module to path if needed
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'app'))
+
+from utils.raw_store import encode_payload, decode_payload, put_payload
+
+
+def test_encode_payload_is_content_addressed():
+    """Test that equal payloads hash the same regardless of key order."""
+    hash_a, data_a, size_a = encode_payload({"title": "Joe's Pizza", "formats": list(range(100))})
+    hash_b, data_b, size_b = encode_payload({"formats": list(range(100)), "title": "Joe's Pizza"})
+    hash_c, _, _ = encode_payload({"title": "Shake Shack"})
+
+    assert hash_a == hash_b
+    assert hash_a != hash_c
+    assert len(hash_a) == 64
+    assert len(data_a) < size_a  # Compressed
+
+
+def test_decode_payload_round_trip():
+    """Test that a compressed payload decodes back to the original dict."""
+    payload = {"title": "BEST Pizza in New York City", "thumbnails": [{"url": "https://example.com/a.jpg"}]}
+    _, data, _ = encode_payload(payload)
+
+    assert decode_payload(data) == payload
+
+
+def test_put_payload_returns_hash():
+    """Test that storing a payload issues one insert and returns its hash."""
+    db = mock.MagicMock()
+    payload = {"title": "Video"}
+
+    payload_hash = put_payload(db, payload)
+
+    assert payload_hash == encode_payload(payload)[0]
+    db.execute.assert_called_once()
@@ -0,0 +1,71 @@
+from sqlalchemy import create_engine, text
+
+from app.utils.slow_queries import SlowQueryLog, can_analyze, fingerprint
+
+
+def test_fingerprint_ignores_parameters_and_list_lengths():
+    """Test that the same query shape shares a fingerprint."""
+    short, normalized = fingerprint("SELECT * FROM places WHERE id IN (%(id_1_1)s, %(id_1_2)s) AND name = 'x'")
+    long, _ = fingerprint("SELECT *  FROM places\nWHERE id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s) AND name = 'it''s'")
+
+    assert short == long
+    assert normalized == "SELECT * FROM places WHERE id IN (...) AND name = ?"
+    assert fingerprint("SELECT geohash_8 FROM places LIMIT 5")[1] == "SELECT geohash_8 FROM places LIMIT ?"
+    assert fingerprint("SELECT 1")[0] != fingerprint("SELECT name FROM places")[0]
+    # Casts are not placeholders
+    assert fingerprint("SELECT CAST(geom AS geography) <-> :point::geography FROM places")[1] == \
+        "SELECT CAST(geom AS geography) <-> ?::geography FROM places"
+
+
+def test_only_plain_selects_are_analyzed():
+    """Test that EXPLAIN ANALYZE is skipped for writes and locking SELECTs."""
+    assert can_analyze("SELECT id FROM places WHERE slug = %(slug)s")
+    assert not can_analyze("SELECT id FROM sources WHERE status = 'queued' FOR UPDATE SKIP LOCKED")
+    assert not can_analyze("select id from sources for no key update")
+    assert not can_analyze("SELECT id FROM sources FOR SHARE")
+    assert not can_analyze("UPDATE sources SET status = 'processing'")
+
+
+def test_slow_statements_are_recorded_in_the_background(tmp_path):
+    """Test that statements over the threshold are written to slow_queries."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE slow_queries (id INTEGER PRIMARY KEY, fingerprint TEXT, statement TEXT, "
+            "parameters TEXT, duration_ms FLOAT, plan TEXT)"
+        ))
+    log = SlowQueryLog(engine, threshold_ms=0)
+    log.install()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT :value"), {"value": 42})
+    log.drain()
+    log.threshold_ms = float("inf")
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT statement, parameters, plan FROM slow_queries")).all()
+    # The log's own writes are not logged
+    assert rows == [("SELECT ?", "[42]", None)]
+
+
+def test_slow_query_table_is_capped(tmp_path):
+    """Test that the writer thread keeps only the newest max_rows slow queries."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE slow_queries (id INTEGER PRIMARY KEY, fingerprint TEXT, statement TEXT, "
+            "parameters TEXT, duration_ms FLOAT, plan TEXT)"
+        ))
+    log = SlowQueryLog(engine, threshold_ms=0, max_rows=3, prune_every=2)
+    log.install()
+
+    with engine.connect() as conn:
+        for value in range(6):
+            conn.execute(text(f"SELECT {value}"))
+    log.drain()
+    log.threshold_ms = float("inf")
+
+    with engine.connect() as conn:
+        statements = conn.execute(text("SELECT statement FROM slow_queries ORDER BY id")).scalars().all()
+    # Pruned after the 5th record; the 6th is added on top until the next prune
+    assert statements == ["SELECT 2", "SELECT 3", "SELECT 4", "SELECT 5"]
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String
+
+from app.utils.slugs import allocate_slugs, taken_slugs
+
+
+@pytest.fixture
+def connection():
+    """An in-memory database with a minimal places table."""
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    places = Table("places", metadata, Column("id", Integer, primary_key=True), Column("slug", String, unique=True))
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(places.insert(), [
+            {"slug": "joes-pizza"},
+            {"slug": "joes-pizza-2"},
+            {"slug": "joes-pizza-new-york"},
+            {"slug": "shake-shack"},
+        ])
+        yield conn
+
+
+def test_taken_slugs_matches_base_and_numeric_suffixes(connection):
+    """Test that the lookup finds the base slug and its numbered variants only."""
+    assert taken_slugs(connection, ["joes-pizza"]) == {"joes-pizza", "joes-pizza-2"}
+    assert taken_slugs(connection, ["joes"]) == set()
+    assert taken_slugs(connection, ["katzs"]) == set()
+
+
+def test_allocate_slugs_resolves_collisions_set_wise(connection):
+    """Test that a batch gets distinct slugs past the highest suffix in use."""
+    slugs = allocate_slugs(connection, ["joes-pizza", "katzs", "joes-pizza", "katzs", "shake-shack"])
+
+    assert slugs == ["joes-pizza-3", "katzs", "joes-pizza-4", "katzs-2", "shake-shack-2"]
+
+
+def test_allocate_slugs_ignores_non_numeric_suffixes(connection):
+    """Test that longer slugs sharing a prefix don't affect suffix numbering."""
+    assert allocate_slugs(connection, ["joes-pizza-new-york"]) == ["joes-pizza-new-york-2"]
+    assert allocate_slugs(connection, ["joes"]) == ["joes"]
@@ -0,0 +1,39 @@
+import asyncio
+from unittest import mock
+
+from sqlalchemy import create_engine
+
+from app.utils.pg_listener import PgListener
+from app.utils.source_events import SourceEventBus
+
+
+def make_bus():
+    """A bus on a database without LISTEN support, so nothing connects."""
+    return SourceEventBus(PgListener(create_engine("sqlite://")))
+
+
+def test_publish_wakes_subscribed_waiters():
+    """Test that publishing a source wakes its waiters and only them."""
+    async def scenario():
+        bus = make_bus()
+        await bus.start()
+        assert not bus.listening
+        with bus.subscribe(1) as first, bus.subscribe(2) as second:
+            asyncio.get_running_loop().call_later(0.01, bus.publish, 1, "processed")
+            assert await bus.wait(first, 5)
+            assert first.result() == "processed"
+            assert not second.done()
+        assert not bus.waiters
+
+    asyncio.run(scenario())
+
+
+def test_wait_without_listener_falls_back_to_polling():
+    """Test that waits are capped at the fallback interval when not listening."""
+    async def scenario():
+        bus = make_bus()
+        with bus.subscribe(1) as future:
+            with mock.patch("app.utils.source_events.FALLBACK_POLL_SECONDS", 0.01):
+                return await bus.wait(future, 30)
+
+    assert asyncio.run(scenario()) is False
@@ -5,21 +5,31 @@ Worker script that processes queued links in the database.
 import os
 import sys
 import time
+import argparse
+import random
 import json
 import logging
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from datetime import datetime
-from typing import Optional, Dict, Any
+from sqlalchemy import select, func, update, case
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from geoalchemy2.elements import WKTElement
 
 # Add the app directory to the Python path for imports
 sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
-from database import SessionLocal
-from models import Source, Place, Review
-from utils.nlp.place_extractor import extract_place
+from database import SessionLocal, engine
+from models import Source, Place, Review, RawPayload, SOURCE_PRIORITIES
+from extractors.youtube import YouTubeExtractor
+from utils.nlp.place_extractor import extract_place, refresh_gazetteer, disable_nlp, preload as preload_nlp
 from utils.geocoder import geocode
-from utils.place_utils import find_nearby_duplicate, format_place_slug
+from utils.place_utils import find_nearby_duplicate, format_place_slug, BatchDuplicateResolver
+from utils.raw_store import put_payload, decode_payload
+from utils.geocell import place_cells
+from utils.slugs import allocate_slugs
+from utils.cell_stats import apply_cell_deltas, refresh_place_cells, rebuild_cell_stats
+from utils.profiling import profiled
+from utils.metrics import GEOCODE_REQUESTS, WORKER_LINKS, observe_stage, register_database_collector, start_metrics_server
 
 # Configure logging
 logging.basicConfig(
@@ -28,15 +38,525 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Number of sources handled per batch by the reprocess command
+REPROCESS_BATCH_SIZE = int(os.getenv("REPROCESS_BATCH_SIZE", "200"))
+
+# Links written per transaction by the queue worker, and the longest (in ms)
+# a partial batch waits before it is written anyway
+WRITE_BATCH_SIZE = int(os.getenv("WRITE_BATCH_SIZE", "50"))
+WRITE_BATCH_MAX_MS = int(os.getenv("WRITE_BATCH_MAX_MS", "2000"))
+
+# Most queued links one worker process claims per run, so several
+# processes can share the queue
+CLAIM_BATCH_SIZE = int(os.getenv("CLAIM_BATCH_SIZE", "500"))
+
+# Seconds a claim stays valid without renewal. The worker renews its
+# remaining claims before each write batch; links whose claim expired,
+# because their worker crashed, count as a failed attempt and are requeued
+CLAIM_LEASE_SECONDS = int(os.getenv("CLAIM_LEASE_SECONDS", "900"))
+
+# Share of each claim reserved for a lane while it has runnable links, so
+# bulk imports keep draining under a steady stream of interactive links.
+# Format: "lane=share,...", e.g. "bulk=0.1"
+LANE_MIN_SHARES = {
+    lane: float(share)
+    for lane, _, share in (
+        item.partition("=") for item in os.getenv("LANE_MIN_SHARES", "bulk=0.1").split(",") if item
+    )
+}
+
+# Port of the worker's Prometheus exporter; forked processes use the
+# following ports, one each. 0 disables the exporter
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
+# Failed links are retried with exponential backoff (base * 2^(attempt - 1),
+# capped, with jitter) and moved to the "dead" status after MAX_ATTEMPTS
+MAX_ATTEMPTS = int(os.getenv("MAX_ATTEMPTS", "5"))
+RETRY_BASE_SECONDS = int(os.getenv("RETRY_BASE_SECONDS", "60"))
+RETRY_MAX_SECONDS = int(os.getenv("RETRY_MAX_SECONDS", "21600"))
+
+# Attempts at re-allocating slugs taken by a concurrent writer before the batch fails
+SLUG_CONFLICT_RETRIES = 3
+
+# Fetch YouTube links with yt-dlp instead of the development mock data
+LIVE_FETCH = os.getenv("LIVE_FETCH", "false").lower() == "true"
+
+# Shared so its yt-dlp sessions are reused from batch to batch
+youtube_extractor = YouTubeExtractor()
+
+def video_text(video_data: Dict[str, Any]) -> str:
+    """Build the text that place extraction runs over."""
+    return f"{video_data.get('title', '')} {video_data.get('description', '')}"
+
+def derive_place(video_data: Dict[str, Any]) -> Tuple[str, Dict[str, str], Optional[Dict[str, Any]]]:
+    """
+    Run place extraction and geocoding over a video's metadata.
+    
+    Returns:
+        A tuple of (status, place_info, geo_result), where status is
+        "processed", "geocode_failed" or "extraction_failed" and geo_result
+        is only set when status is "processed".
+    """
+    # Extract place from video data
+    with observe_stage("nlp"):
+        place_info = extract_place(video_text(video_data))
+    
+    logger.info(f"Extracted place info: {place_info}")
+    
+    if not place_info or not place_info["name"]:
+        logger.warning("Could not extract place info from video")
+        return "extraction_failed", place_info, None
+    
+    # Try to geocode the place
+    with observe_stage("geocode"):
+        geo_result = geocode(place_info["name"], place_info["hint_loc"])
+    
+    if not geo_result:
+        GEOCODE_REQUESTS.labels("no_result").inc()
+        logger.warning(f"Could not geocode place: {place_info['name']}")
+        return "geocode_failed", place_info, None
+    GEOCODE_REQUESTS.labels("ok").inc()
+    
+    logger.info(f"Geocoded result: {geo_result['name']} at {geo_result['lat']}, {geo_result['lng']}")
+    return "processed", place_info, geo_result
+
+def place_values(geo_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the column values of a new place from a geocoding result."""
+    # Create WKT point from lat/lng; lat/lng columns are generated from it
+    point_wkt = f"POINT({geo_result['lng']} {geo_result['lat']})"
+    
+    # Parse address components
+    address_parts = parse_address(geo_result["address"])
+    
+    return {
+        "name": geo_result["name"],
+        "slug": format_place_slug(geo_result["name"], geo_result.get("city")),
+        "address": geo_result["address"],
+        "city": address_parts.get("city"),
+        "state": address_parts.get("state"),
+        "country": address_parts.get("country"),
+        "postal_code": address_parts.get("postal_code"),
+        "geom": WKTElement(point_wkt, srid=4326),
+        **place_cells(geo_result["lat"], geo_result["lng"]),
+    }
+
+def save_place(db: Session, geo_result: Dict[str, Any], resolver: Optional[BatchDuplicateResolver] = None) -> int:
+    """
+    Find a nearby duplicate of a geocoded place or create a new one.
+    
+    Args:
+        db: Database session
+        geo_result: The geocoding result for the place
+        resolver: Optional batch resolver preloaded with the places around
+            the batch; when given, duplicates are resolved in memory
+    
+    Returns:
+        The id of the existing or newly created place.
+    """
+    if resolver is not None:
+        existing_id = resolver.find(geo_result["lat"], geo_result["lng"], geo_result["name"])
+        if existing_id:
+            logger.info(f"Found existing place id: {existing_id}")
+            return existing_id
+        existing_place = None
+    else:
+        # Check for nearby duplicates
+        existing_place = find_nearby_duplicate(
+            db, 
+            geo_result["lat"], 
+            geo_result["lng"], 
+            geo_result["name"]
+        )
+    
+    # Use existing place or create new one
+    if existing_place:
+        logger.info(f"Found existing place: {existing_place.name} (id: {existing_place.id})")
+        return existing_place.id
+    
+    # Create new place
+    new_place = Place(**place_values(geo_result))
+    
+    db.add(new_place)
+    db.flush()  # Get the ID without committing
+    logger.info(f"Created new place: {new_place.name} (id: {new_place.id})")
+    
+    # Later links in the same batch should resolve to this place
+    if resolver is not None:
+        resolver.add(new_place.id, geo_result["lat"], geo_result["lng"], geo_result["name"])
+    return new_place.id
+
+def fetch_videos(links: List[Source]) -> Dict[int, Optional[Dict[str, Any]]]:
+    """
+    Fetch the video metadata of a batch of links.
+    
+    With LIVE_FETCH, the batch's YouTube links are fetched together through
+    YouTubeExtractor.fetch_many; other links get mock data.
+    
+    Returns:
+        A dictionary mapping each link id to its video metadata, or to None
+        if fetching it failed.
+    """
+    live = [link for link in links if LIVE_FETCH and link.platform == "youtube"]
+    fetched = youtube_extractor.fetch_many([link.url for link in live]) if live else {}
+    
+    videos = {}
+    for link in links:
+        if LIVE_FETCH and link.platform == "youtube":
+            videos[link.id] = fetched.get(link.url)
+        else:
+            videos[link.id] = mock_extract_video_data(link.url, link.platform)
+    return videos
+
+def update_map_cells(db: Session, place_ids: Iterable[int], new_place_ids: Iterable[int], review_ids: Iterable[int]):
+    """
+    Add a committed batch's new places and reviews to the map aggregates.
+    
+    Called right after the batch commits, in a short transaction of its own,
+    so /api/places/cells is never staler than the last committed batch and
+    a failure here never loses the batch; rebuild-cell-stats repairs
+    anything missed. Only the batch's rows are read (see apply_cell_deltas).
+    """
+    place_ids = set(place_ids)
+    if not place_ids:
+        return
+    try:
+        updated = apply_cell_deltas(db, place_ids, new_place_ids, review_ids)
+        db.commit()
+        logger.info(f"Updated cell aggregates for {len(place_ids)} places ({updated} cells gained places)")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error updating cell aggregates: {str(e)}")
+
+def refresh_map_cells(db: Session, place_ids: Iterable[int]):
+    """
+    Recompute the map aggregates of the cells containing the given places.
+    
+    Used by reprocessing, which moves reviews between places and so can
+    shrink a cell or dethrone its top place, which deltas can't express.
+    Runs in a transaction of its own after the caller's commit.
+    """
+    place_ids = set(place_ids)
+    if not place_ids:
+        return
+    try:
+        refreshed = refresh_place_cells(db, place_ids)
+        db.commit()
+        logger.info(f"Refreshed {refreshed} cell aggregates")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error refreshing cell aggregates: {str(e)}")
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Backoff before the next attempt of a link that has failed attempts times.
+    
+    Half of the exponential delay is fixed and half is random ("equal
+    jitter"), so links that failed together, e.g. during a geocoder outage,
+    don't all retry at the same moment.
+    """
+    delay = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return timedelta(seconds=delay / 2 + random.uniform(0, delay / 2))
+
+def schedule_retry(link: Source, failure: str):
+    """
+    Record a failed attempt and requeue the link, or dead-letter it after MAX_ATTEMPTS.
+    
+    Args:
+        link: The link that failed
+        failure: Why it failed (fetch_failed, extraction_failed, geocode_failed, error)
+    """
+    link.attempts = (link.attempts or 0) + 1
+    link.last_error = failure
+    link.claimed_at = None
+    link.updated_at = datetime.now()
+    if link.attempts >= MAX_ATTEMPTS:
+        WORKER_LINKS.labels("dead").inc()
+        link.status = "dead"
+        link.next_attempt_at = None
+        logger.warning(f"Link {link.id} failed {link.attempts} times ({failure}), moved to dead letters")
+    else:
+        WORKER_LINKS.labels("retry").inc()
+        link.status = "queued"
+        # Scheduled on the database clock, the one claim_links compares against
+        delay = retry_delay(link.attempts)
+        link.next_attempt_at = func.now() + delay
+        logger.info(f"Link {link.id} failed ({failure}), retry {link.attempts} in {delay.total_seconds():.0f} s")
+
+class BatchWriter:
+    """
+    Persist processed links in batches, one transaction per batch.
+    
+    Links are buffered until batch_size of them are pending or max_delay_ms
+    has passed since the first one, then written with one multi-row
+    INSERT ... RETURNING for new places and one for reviews, and committed.
+    The map aggregates of the batch's cells are refreshed right after each
+    commit. A batch that fails is rolled back and only its own links are
+    scheduled for a retry; batches committed before it are unaffected.
+    """
+    
+    def __init__(self, db: Session, batch_size: int = WRITE_BATCH_SIZE, max_delay_ms: int = WRITE_BATCH_MAX_MS):
+        self.db = db
+        self.batch_size = batch_size
+        self.max_delay_ms = max_delay_ms
+        self.resolved: List[Tuple[Source, Dict[str, Any], Dict[str, Any]]] = []
+        self.finished: List[Tuple[Source, str]] = []
+        self.started_at: Optional[float] = None
+        # Places that gained a review during the run
+        self.touched_place_ids = set()
+        self.batches = 0
+    
+    def add(self, link: Source, video_data: Dict[str, Any], geo_result: Dict[str, Any]):
+        """Queue a geocoded link for a place and review."""
+        self.resolved.append((link, video_data, geo_result))
+        self.mark_started()
+    
+    def finish(self, link: Source, failure: str):
+        """Queue a link that failed (fetch_failed, extraction_failed, geocode_failed, error) for a retry."""
+        self.finished.append((link, failure))
+        self.mark_started()
+    
+    def mark_started(self):
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+    
+    def pending(self) -> int:
+        return len(self.resolved) + len(self.finished)
+    
+    def due(self) -> bool:
+        """Whether the pending batch is full or has waited long enough."""
+        if not self.pending():
+            return False
+        if self.pending() >= self.batch_size:
+            return True
+        return (time.monotonic() - self.started_at) * 1000 >= self.max_delay_ms
+    
+    def flush_if_due(self):
+        if self.due():
+            self.flush()
+    
+    def flush(self):
+        """Write and commit the pending batch."""
+        if not self.pending():
+            return
+        
+        resolved, finished = self.resolved, self.finished
+        self.resolved, self.finished, self.started_at = [], [], None
+        self.batches += 1
+        
+        try:
+            with observe_stage("persist"):
+                place_ids, new_place_ids = self.write_places([geo_result for _, _, geo_result in resolved])
+                review_ids = self.write_reviews(resolved, place_ids)
+                for link, _, _ in resolved:
+                    link.status = "processed"
+                    link.next_attempt_at = None
+                    link.claimed_at = None
+                    link.updated_at = datetime.now()
+                for link, failure in finished:
+                    schedule_retry(link, failure)
+                self.db.commit()
+            WORKER_LINKS.labels("processed").inc(len(resolved))
+            self.touched_place_ids.update(place_ids)
+            logger.info(f"Committed batch {self.batches}: {len(resolved)} processed, {len(finished)} failed")
+            update_map_cells(self.db, place_ids, new_place_ids, review_ids)
+        
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"Error writing batch {self.batches}: {str(e)}")
+            for link, _, _ in resolved:
+                schedule_retry(link, "error")
+            for link, failure in finished:
+                schedule_retry(link, failure)
+            self.db.commit()
+    
+    def write_places(self, geo_results: List[Dict[str, Any]]) -> Tuple[List[int], List[int]]:
+        """
+        Resolve each geocoded place to an existing or newly inserted place.
+        
+        Duplicates are resolved in memory against one read of the places
+        around the batch; places new to the batch get a temporary negative
+        key so later links in the same batch resolve to them too.
+        
+        Returns:
+            The place id for each geocoding result, in order, and the ids of
+            the places this call inserted.
+        """
+        if not geo_results:
+            return [], []
+        
+        with observe_stage("dedupe"):
+            resolver = BatchDuplicateResolver()
+            resolver.load(self.db, [(geo_result["lat"], geo_result["lng"]) for geo_result in geo_results])
+            
+            keys = []
+            new_rows = []
+            for geo_result in geo_results:
+                key = resolver.find(geo_result["lat"], geo_result["lng"], geo_result["name"])
+                if key is None:
+                    new_rows.append(place_values(geo_result))
+                    key = -len(new_rows)
+                    resolver.add(key, geo_result["lat"], geo_result["lng"], geo_result["name"])
+                keys.append(key)
+        
+        new_ids = self.insert_places(new_rows)
+        return [new_ids[-key - 1] if key < 0 else key for key in keys], new_ids
+    
+    def insert_places(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Insert new places with one INSERT ... ON CONFLICT (slug) DO NOTHING RETURNING.
+        
+        Slugs are allocated for the whole batch up front (see allocate_slugs).
+        Rows that still conflict, because another writer took the slug in the
+        meantime, get freshly allocated slugs and are inserted again.
+        
+        Returns:
+            The new place ids, in the order of rows.
+        """
+        ids: List[Optional[int]] = [None] * len(rows)
+        base_slugs = [row["slug"] for row in rows]
+        remaining = list(range(len(rows)))
+        for attempt in range(SLUG_CONFLICT_RETRIES + 1):
+            if not remaining:
+                break
+            slugs = allocate_slugs(self.db, [base_slugs[index] for index in remaining])
+            for index, slug in zip(remaining, slugs):
+                rows[index]["slug"] = slug
+            
+            stmt = insert(Place).values([rows[index] for index in remaining]).on_conflict_do_nothing(
+                index_elements=["slug"]
+            ).returning(Place.id, Place.slug)
+            inserted = {slug: place_id for place_id, slug in self.db.execute(stmt).all()}
+            
+            for index in remaining:
+                ids[index] = inserted.get(rows[index]["slug"])
+            remaining = [index for index in remaining if ids[index] is None]
+        
+        if remaining:
+            raise RuntimeError(f"Could not allocate a free slug for {len(remaining)} places")
+        logger.info(f"Created {len(rows)} new places")
+        return ids
+    
+    def write_reviews(self, resolved: List[Tuple[Source, Dict[str, Any], Dict[str, Any]]], place_ids: List[int]) -> List[int]:
+        """
+        Insert one review per link, linking its source to its place, in one statement.
+        
+        Returns:
+            The new review ids.
+        """
+        if not resolved:
+            return []
+        rows = [
+            {
+                "source_id": link.id,
+                "place_id": place_id,
+                "title": video_data.get("title"),
+                "thumbnail_url": video_data.get("thumbnail_url"),
+            }
+            for (link, video_data, _), place_id in zip(resolved, place_ids)
+        ]
+        return [review_id for review_id, in self.db.execute(insert(Review).values(rows).returning(Review.id)).all()]
+
+def reap_expired_claims(db: Session) -> int:
+    """
+    Requeue links whose worker stopped renewing their claim, in the caller's transaction.
+    
+    The expired claim counts as a failed attempt ("lease_expired"), so a
+    link that keeps crashing its worker ends up dead-lettered after
+    MAX_ATTEMPTS like any other failing link.
+    
+    Returns:
+        The number of links reaped.
+    """
+    attempts = Source.attempts + 1
+    result = db.execute(
+        update(Source)
+        .where(
+            Source.status == "processing",
+            Source.claimed_at < func.now() - timedelta(seconds=CLAIM_LEASE_SECONDS),
+        )
+        .values(
+            attempts=attempts,
+            last_error="lease_expired",
+            status=case((attempts >= MAX_ATTEMPTS, "dead"), else_="queued"),
+            next_attempt_at=case((attempts >= MAX_ATTEMPTS, None), else_=func.now()),
+            claimed_at=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        logger.warning(f"Requeued {result.rowcount} links whose claim expired")
+    return result.rowcount or 0
+
+def renew_claims(db: Session, links: List[Source]):
+    """Extend the lease of links this worker is still processing, and commit."""
+    if not links:
+        return
+    db.execute(
+        update(Source)
+        .where(Source.id.in_([link.id for link in links]), Source.status == "processing")
+        .values(claimed_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+def claim_links(db: Session, limit: int = CLAIM_BATCH_SIZE) -> List[Source]:
+    """
+    Lock up to limit runnable links for this worker, honoring lane priorities.
+    
+    Each lane in LANE_MIN_SHARES first gets its reserved share of the claim
+    (if it has that many runnable links); the rest of the claim is filled
+    strictly by priority, then due time. Rows locked by another worker
+    process are skipped. Expired claims are reaped first (see
+    reap_expired_claims), so their links can be claimed again right away.
+    
+    Returns:
+        The claimed links, highest priority first, then the reserved lanes.
+    """
+    reap_expired_claims(db)
+    
+    def runnable():
+        return db.query(Source).filter(
+            Source.status == "queued",
+            Source.next_attempt_at <= func.now()
+        )
+    
+    reserved = []
+    for lane, share in LANE_MIN_SHARES.items():
+        quota = int(limit * share)
+        if quota <= 0 or lane not in SOURCE_PRIORITIES:
+            continue
+        reserved.extend(
+            runnable().filter(Source.priority == SOURCE_PRIORITIES[lane]).order_by(
+                Source.next_attempt_at
+            ).limit(quota).with_for_update(skip_locked=True).all()
+        )
+    
+    query = runnable()
+    if reserved:
+        query = query.filter(Source.id.notin_([link.id for link in reserved]))
+    claimed = query.order_by(
+        Source.priority, Source.next_attempt_at
+    ).limit(limit - len(reserved)).with_for_update(skip_locked=True).all()
+    
+    links = {}
+    for link in claimed + reserved:
+        links.setdefault(link.id, link)
+    return list(links.values())
+
+@profiled("worker", "process_queued_links")
 def process_queued_links():
     """
     Fetches links with 'queued' status, extracts place information,
     and creates place entries in the database.
+    
+    Results are written in batches (see BatchWriter), so a failure only
+    loses its own batch and no transaction stays open for the whole run.
     """
     db = SessionLocal()
     try:
-        # Find queued links
-        queued_links = db.query(Source).filter(Source.status == "queued").all()
+        # Find runnable links by lane and due time, from the partial index
+        # over queued rows
+        queued_links = claim_links(db)
         
         if not queued_links:
             logger.info("No queued links found")
@@ -44,110 +564,220 @@ def process_queued_links():
         
         logger.info(f"Found {len(queued_links)} queued links to process")
         
+        # Claim the whole run with one commit to avoid duplicate processing;
+        # the lease is renewed batch by batch below
         for link in queued_links:
-            logger.info(f"Processing link {link.id}: {link.url}")
+            link.status = "processing"
+            link.claimed_at = func.now()
+        db.commit()
+        
+        # Teach the extractor the places created since the last run
+        try:
+            refresh_gazetteer(db)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not refresh the place gazetteer: {str(e)}")
+        
+        writer = BatchWriter(db)
+        for start in range(0, len(queued_links), writer.batch_size):
+            batch = queued_links[start:start + writer.batch_size]
+            if start:
+                renew_claims(db, queued_links[start:])
             
+            # Fetch the whole batch at once so live fetches run concurrently
             try:
-                # Mark as processing to avoid duplicate processing
-                link.status = "processing"
-                db.commit()
+                with observe_stage("fetch"):
+                    videos = fetch_videos(batch)
+            except Exception as e:
+                logger.error(f"Error fetching links {batch[0].id}-{batch[-1].id}: {str(e)}")
+                videos = {}
+            
+            for link in batch:
+                logger.info(f"Processing link {link.id}: {link.url}")
+                
+                try:
+                    video_data = videos.get(link.id)
+                    if video_data is None:
+                        writer.finish(link, "fetch_failed")
+                        continue
+                    link.raw_data_hash = put_payload(db, video_data)
+                    
+                    status, place_info, geo_result = derive_place(video_data)
+                    
+                    if status == "processed":
+                        writer.add(link, video_data, geo_result)
+                    else:
+                        writer.finish(link, status)
                 
-                # For now we'll use a simple mock implementation
-                # In a real implementation, we would use the extractors
-                # to get real data from the platform
+                except Exception as e:
+                    logger.error(f"Error processing link {link.id}: {str(e)}")
+                    writer.finish(link, "error")
                 
-                # Mock video data extraction
-                video_data = mock_extract_video_data(link.url, link.platform)
-                link.raw_data = json.dumps(video_data)
+                finally:
+                    writer.flush_if_due()
+        
+        writer.flush()
+        logger.info("All queued links processed")
+        
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error in process_queued_links: {str(e)}")
+    finally:
+        db.close()
+
+def describe_place(name: Optional[str], address: Optional[str]) -> str:
+    """Format a place for reprocessing diff output."""
+    if not name:
+        return "<no place>"
+    return f"{name} ({address})" if address else name
+
+def reprocess_sources(
+    since: Optional[datetime] = None,
+    statuses: Optional[List[str]] = None,
+    platform: Optional[str] = None,
+    batch_size: int = REPROCESS_BATCH_SIZE,
+    dry_run: bool = False,
+    force_geocode: bool = False,
+    limit: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Re-derive places for already fetched sources from their stored raw payloads.
+    
+    Sources are streamed in id-keyed batches; each batch loads its payloads,
+    reviews and places with one query apiece, is committed on its own, has
+    the map aggregates of the cells it changed refreshed, and is then dropped
+    from the session, so memory stays bounded by batch_size.
+    
+    Geocoding is skipped when the re-extracted name still matches the linked
+    place, unless force_geocode is set.
+    
+    Args:
+        since: Only reprocess sources created at or after this time
+        statuses: Only reprocess sources with one of these statuses
+        platform: Only reprocess sources from this platform
+        batch_size: Number of sources per batch
+        dry_run: Log the differences without writing anything
+        force_geocode: Geocode every source even if its place name is unchanged
+        limit: Stop after this many sources
+        
+    Returns:
+        Counts of seen, unchanged, changed, failed and missing_payload sources.
+    """
+    counts = {"seen": 0, "unchanged": 0, "changed": 0, "failed": 0, "missing_payload": 0}
+    last_id = 0
+    db = SessionLocal()
+    
+    try:
+        while not limit or counts["seen"] < limit:
+            query = db.query(Source).filter(Source.id > last_id, Source.raw_data_hash.isnot(None))
+            if since:
+                query = query.filter(Source.created_at >= since)
+            if statuses:
+                query = query.filter(Source.status.in_(statuses))
+            if platform:
+                query = query.filter(Source.platform == platform)
+            
+            size = min(batch_size, limit - counts["seen"]) if limit else batch_size
+            batch = query.order_by(Source.id).limit(size).all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+            
+            # Load everything the batch needs up front instead of per source
+            payloads = dict(
+                db.query(RawPayload.hash, RawPayload.data)
+                .filter(RawPayload.hash.in_({link.raw_data_hash for link in batch}))
+                .all()
+            )
+            reviews = {
+                review.source_id: review
+                for review in db.query(Review).filter(Review.source_id.in_([link.id for link in batch]))
+            }
+            places = {
+                place.id: place
+                for place in db.query(Place).filter(Place.id.in_({review.place_id for review in reviews.values()}))
+            }
+            
+            # Places that gained or lost a review in this batch
+            touched_place_ids = set()
+            
+            for link in batch:
+                counts["seen"] += 1
                 
-                # Extract place from video data
-                text_to_analyze = f"{video_data.get('title', '')} {video_data.get('description', '')}"
-                place_info = extract_place(text_to_analyze)
+                data = payloads.get(link.raw_data_hash)
+                if data is None:
+                    logger.warning(f"Source {link.id}: raw payload {link.raw_data_hash} not found")
+                    counts["missing_payload"] += 1
+                    continue
+                video_data = decode_payload(data)
                 
-                logger.info(f"Extracted place info: {place_info}")
+                review = reviews.get(link.id)
+                place = places.get(review.place_id) if review else None
+                old = describe_place(place.name, place.address) if place else "<no place>"
                 
-                if place_info and place_info["name"]:
-                    # Try to geocode the place
-                    geo_result = geocode(place_info["name"], place_info["hint_loc"])
+                try:
+                    if place and not force_geocode:
+                        place_info = extract_place(video_text(video_data))
+                        if place_info and place_info["name"] and place_info["name"].lower() == place.name.lower():
+                            GEOCODE_REQUESTS.labels("reused").inc()
+                            counts["unchanged"] += 1
+                            continue
                     
-                    if geo_result:
-                        logger.info(f"Geocoded result: {geo_result['name']} at {geo_result['lat']}, {geo_result['lng']}")
-                        
-                        # Check for nearby duplicates
-                        existing_place = find_nearby_duplicate(
-                            db, 
-                            geo_result["lat"], 
-                            geo_result["lng"], 
-                            geo_result["name"]
-                        )
-                        
-                        # Use existing place or create new one
-                        place_id = None
-                        if existing_place:
-                            logger.info(f"Found existing place: {existing_place.name} (id: {existing_place.id})")
-                            place_id = existing_place.id
-                        else:
-                            # Create new place
-                            slug = format_place_slug(geo_result["name"], geo_result.get("city"))
-                            
-                            # Create WKT point from lat/lng
-                            point_wkt = f"POINT({geo_result['lng']} {geo_result['lat']})"
-                            location = WKTElement(point_wkt, srid=4326)
-                            
-                            # Parse address components
-                            address_parts = parse_address(geo_result["address"])
-                            
-                            new_place = Place(
-                                name=geo_result["name"],
-                                slug=slug,
-                                address=geo_result["address"],
-                                city=address_parts.get("city"),
-                                state=address_parts.get("state"),
-                                country=address_parts.get("country"),
-                                postal_code=address_parts.get("postal_code"),
-                                location=location
-                            )
-                            
-                            db.add(new_place)
-                            db.flush()  # Get the ID without committing
-                            place_id = new_place.id
-                            logger.info(f"Created new place: {new_place.name} (id: {new_place.id})")
-                        
-                        # Create a review linking the source to the place
-                        review = Review(
-                            source_id=link.id,
-                            place_id=place_id,
-                            title=video_data.get("title"),
-                            thumbnail_url=video_data.get("thumbnail_url")
-                        )
-                        
-                        db.add(review)
-                        link.status = "processed"
-                    else:
-                        logger.warning(f"Could not geocode place: {place_info['name']}")
-                        link.status = "geocode_failed"
+                    status, place_info, geo_result = derive_place(video_data)
+                except Exception as e:
+                    logger.error(f"Error reprocessing source {link.id}: {str(e)}")
+                    counts["failed"] += 1
+                    continue
+                
+                if status != "processed":
+                    logger.info(f"DIFF source {link.id}: {old} -> <{status}>")
+                    counts["failed"] += 1
+                    continue
+                
+                new = describe_place(geo_result["name"], geo_result["address"])
+                if new == old:
+                    counts["unchanged"] += 1
+                    continue
+                
+                logger.info(f"DIFF source {link.id}: {old} -> {new}")
+                counts["changed"] += 1
+                
+                if dry_run:
+                    continue
+                
+                place_id = save_place(db, geo_result)
+                touched_place_ids.add(place_id)
+                if review:
+                    touched_place_ids.add(review.place_id)
+                    review.place_id = place_id
                 else:
-                    logger.warning("Could not extract place info from video")
-                    link.status = "extraction_failed"
+                    db.add(Review(
+                        source_id=link.id,
+                        place_id=place_id,
+                        title=video_data.get("title"),
+                        thumbnail_url=video_data.get("thumbnail_url")
+                    ))
+                link.status = "processed"
+                link.updated_at = datetime.now()
             
-            except Exception as e:
-                logger.error(f"Error processing link {link.id}: {str(e)}")
-                link.status = "error"
-                continue
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+                refresh_map_cells(db, touched_place_ids)
             
-            # Update timestamp
-            link.updated_at = datetime.now()
-            db.add(link)
-        
-        # Commit all changes
-        db.commit()
-        logger.info("All queued links processed")
-        
+            # Drop the batch's objects so the identity map doesn't grow
+            db.expunge_all()
+            logger.info(f"Reprocessed through source {last_id}: {counts}")
+    
     except Exception as e:
         db.rollback()
-        logger.error(f"Error in process_queued_links: {str(e)}")
+        logger.error(f"Error in reprocess_sources: {str(e)}")
+        raise
     finally:
         db.close()
+    
+    return counts
 
 def mock_extract_video_data(url: str, platform: str) -> Dict[str, Any]:
     """
@@ -228,7 +858,114 @@ def run_worker(once=False):
             logger.info("Sleeping for 30 seconds")
             time.sleep(30)
 
+def run_workers(processes: int, once=False, preload=False):
+    """
+    Run several worker processes forked from this one.
+    
+    With preload, the spaCy pipeline and gazetteer are loaded once in the
+    parent before forking, so the children share the model's memory pages
+    copy-on-write instead of each loading its own copy.
+    """
+    if preload:
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            preload_nlp(db)
+        finally:
+            db.close()
+        logger.info(f"Preloaded NLP pipeline in {time.perf_counter() - start:.2f}s")
+    
+    # Connections must not be shared across the fork
+    engine.dispose()
+    
+    children = []
+    for index in range(processes):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                if WORKER_METRICS_PORT:
+                    start_metrics_server(WORKER_METRICS_PORT + index)
+                run_worker(once=once)
+            except BaseException:
+                logger.exception("Worker process failed")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        children.append(pid)
+    logger.info(f"Started {processes} worker processes: {children}")
+    
+    for pid in children:
+        os.waitpid(pid, 0)
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Parse worker command line arguments."""
+    parser = argparse.ArgumentParser(description="Process queued links in the database.")
+    parser.add_argument("--once", action="store_true", help="Process the queue once and exit")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Number of worker processes to fork")
+    parser.add_argument("--preload", action="store_true",
+                        help="Load the NLP model before forking so processes share it")
+    parser.add_argument("--no-nlp", action="store_true",
+                        help="Don't load the spaCy model; extract with the gazetteer and patterns only")
+    
+    subparsers = parser.add_subparsers(dest="command")
+    reprocess = subparsers.add_parser(
+        "reprocess",
+        help="Re-derive places from stored raw payloads without refetching",
+    )
+    reprocess.add_argument("--since", type=datetime.fromisoformat,
+                           help="Only sources created at or after this ISO date/time")
+    reprocess.add_argument("--status", action="append",
+                           help="Only sources with this status (repeatable, or comma-separated)")
+    reprocess.add_argument("--platform", help="Only sources from this platform")
+    reprocess.add_argument("--batch-size", type=int, default=REPROCESS_BATCH_SIZE,
+                           help="Sources per batch")
+    reprocess.add_argument("--limit", type=int, help="Stop after this many sources")
+    reprocess.add_argument("--dry-run", action="store_true",
+                           help="Log the place differences without writing anything")
+    reprocess.add_argument("--force-geocode", action="store_true",
+                           help="Geocode every source, even if its place name is unchanged")
+    
+    rebuild = subparsers.add_parser(
+        "rebuild-cell-stats",
+        help="Rebuild the per-cell map aggregates from scratch",
+    )
+    rebuild.add_argument("--precision", type=int, action="append",
+                         help="Only rebuild this geohash precision (repeatable)")
+    
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    # Check if we should run once or continuously
-    run_once = "--once" in sys.argv
-    run_worker(once=run_once)
+    args = parse_args(sys.argv[1:])
+    register_database_collector(engine)
+    
+    if args.no_nlp:
+        disable_nlp()
+    
+    if args.command == "reprocess":
+        statuses = [status for value in args.status or [] for status in value.split(",") if status]
+        counts = reprocess_sources(
+            since=args.since,
+            statuses=statuses or None,
+            platform=args.platform,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+            force_geocode=args.force_geocode,
+            limit=args.limit,
+        )
+        logger.info(f"Reprocessing finished: {counts}")
+    elif args.command == "rebuild-cell-stats":
+        db = SessionLocal()
+        try:
+            written = rebuild_cell_stats(db, precisions=args.precision)
+            logger.info(f"Rebuilt {written} cell aggregates")
+        finally:
+            db.close()
+    elif args.processes > 1 or args.preload:
+        run_workers(args.processes, once=args.once, preload=args.preload)
+    else:
+        if WORKER_METRICS_PORT:
+            start_metrics_server(WORKER_METRICS_PORT)
+        # Check if we should run once or continuously
+        run_worker(once=args.once)